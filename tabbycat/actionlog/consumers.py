@@ -1,6 +1,11 @@
-from utils.consumers import TournamentConsumer, WSLoginRequiredMixin
+from utils.consumers import AsyncTournamentConsumer, TournamentConsumer, WSLoginRequiredMixin
 
 
 class ActionLogEntryConsumer(TournamentConsumer, WSLoginRequiredMixin):
 
     group_prefix = 'actionlogs'
+
+
+class AsyncActionLogEntryConsumer(AsyncTournamentConsumer, WSLoginRequiredMixin):
+
+    group_prefix = ActionLogEntryConsumer.group_prefix
@@ -1,9 +1,8 @@
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 from django.contrib.auth import get_user_model
 
 from actionlog.consumers import ActionLogEntryConsumer
 from tournaments.models import Round
+from utils.broadcast import broadcast
 from utils.misc import get_ip_address
 
 from .models import ActionLogEntry
@@ -106,10 +105,7 @@ class LogActionMixin:
         if self.tournament:
             print('Broadcasting notification of ActionLogEntryConsumer')
             group_name = ActionLogEntryConsumer.group_prefix + "_" + self.tournament.slug
-            async_to_sync(get_channel_layer().group_send)(group_name, {
-                "type": "send_json",
-                "data": log.serialize,
-            })
+            broadcast(group_name, log.serialize)
 
     # If these methods exist, add `self.log_action()` to them.
     # (If they don't, this should be harmless.)
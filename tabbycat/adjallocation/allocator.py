@@ -2,6 +2,9 @@ import logging
 
 from django.utils.translation import gettext as _
 
+from .utils import invalidate_histories_cache_once
+
+from utils.publiccache import bump_data_versions_once
 from utils.views import BadJsonRequestError
 
 logger = logging.getLogger(__name__)
@@ -15,8 +18,10 @@ def allocate_adjudicators(round, alloc_class):
     adjs = list(round.active_adjudicators.all())
     allocator = alloc_class(debates, adjs, round)
 
-    for alloc in allocator.allocate():
-        alloc.save()
+    with invalidate_histories_cache_once(round.tournament_id), \
+            bump_data_versions_once(round.tournament_id, round.id):
+        for alloc in allocator.allocate():
+            alloc.save()
 
     round.adjudicator_status = round.STATUS_DRAFT
     round.save()
@@ -25,6 +30,7 @@ def allocate_adjudicators(round, alloc_class):
 class Allocator(object):
     def __init__(self, debates, adjudicators, round):
         self.tournament = round.tournament
+        self.round = round
         self.debates = list(debates)
         self.adjudicators = adjudicators
         if len(self.adjudicators) == 0:
@@ -1,15 +1,18 @@
 import logging
 import random
-from math import exp
 
-from munkres import Munkres
+import numpy as np
 
 from django.utils.translation import gettext as _
 
+from draw.models import DebateTeam
+from utils.assignment import get_assignment_solver
 from utils.views import BadJsonRequestError
 
 from .allocation import AdjudicatorAllocation
 from .allocator import Allocator
+from .models import (AdjudicatorAdjudicatorConflict, AdjudicatorConflict,
+                     AdjudicatorInstitutionConflict, DebateAdjudicator)
 
 logger = logging.getLogger(__name__)
 
@@ -29,10 +32,11 @@ class BaseHungarianAllocator(Allocator):
         self.duplicate_allocations = t.pref('duplicate_adjs')
         self.feedback_weight = t.current_round.feedback_weight
 
-        self.munkres = Munkres()
+        self.solver = get_assignment_solver(t.pref('assignment_solver'))
 
     def allocate(self):
         self.populate_adj_scores(self.adjudicators)
+        self.populate_incidence_matrices()
         return self.run_allocation()
 
     def populate_adj_scores(self, adjudicators):
@@ -50,25 +54,126 @@ class BaseHungarianAllocator(Allocator):
         if ntoosmall > 0:
             logger.warning("%d normalised scores are smaller than 0.0", ntoosmall)
 
-    def calc_cost(self, debate, adj, adjustment=0, chair=None):
-        cost = 0
+    def populate_incidence_matrices(self):
+        """Loads all conflicts and histories relevant to this allocation, and
+        from them builds the NumPy arrays used by `calc_cost_matrix()`:
+
+         - `self._team_costs[a, t]`, the conflict and history penalty for
+           adjudicator `a` adjudicating team `t`;
+         - `self._adj_costs[a, b]`, the conflict and history penalty for
+           adjudicators `a` and `b` being on the same panel;
+         - `self._scores[a]`, adjudicator `a`'s normalised score;
+         - `self._debate_teams[debate_id]`, the team indices of each debate, in
+           the order of `self.tournament.sides`.
+
+        Adjudicator indices are positions in `self.adjudicators`; team indices
+        are positions in `self._team_index`. This uses a fixed number of
+        queries, regardless of the number of debates or adjudicators."""
+
+        adj_ids = [adj.id for adj in self.adjudicators]
+        self._adj_index = {adj_id: i for i, adj_id in enumerate(adj_ids)}
+        self._scores = np.array([adj._normalized_score for adj in self.adjudicators])
+        n_adjs = len(adj_ids)
+
+        self._team_index = {}
+        institution_index = {}
+        team_institutions = []
+        debate_sides = {}
+        debateteams = DebateTeam.objects.filter(debate__in=self.debates).values_list(
+                'debate_id', 'side', 'team_id', 'team__institution_id')
+        for debate_id, side, team_id, institution_id in debateteams:
+            if team_id not in self._team_index:
+                self._team_index[team_id] = len(self._team_index)
+                team_institutions.append(institution_index.setdefault(institution_id, len(institution_index))
+                                         if institution_id is not None else -1)
+            debate_sides.setdefault(debate_id, {})[side] = self._team_index[team_id]
+        self._debate_teams = {debate_id: [sides[side] for side in self.tournament.sides]
+                              for debate_id, sides in debate_sides.items()}
+        team_ids = list(self._team_index.keys())
+        n_teams = len(team_ids)
+
+        adj_institutions = [institution_index.setdefault(adj.institution_id, len(institution_index))
+                            if adj.institution_id is not None else -1 for adj in self.adjudicators]
+        institution_conflicts = [(self._adj_index[adj_id], institution_index.setdefault(institution_id, len(institution_index)))
+                for adj_id, institution_id in AdjudicatorInstitutionConflict.objects.filter(
+                adjudicator_id__in=adj_ids).values_list('adjudicator_id', 'institution_id')]
+
+        # adj × institution
+        adj_institution_conflicts = np.zeros((n_adjs, len(institution_index)), dtype=bool)
+        for a, i in institution_conflicts:
+            adj_institution_conflicts[a, i] = True
+
+        # adj × team: conflicts, directly or through the team's institution
+        team_conflicts = np.zeros((n_adjs, n_teams), dtype=bool)
+        for adj_id, team_id in AdjudicatorConflict.objects.filter(adjudicator_id__in=adj_ids,
+                team_id__in=team_ids).values_list('adjudicator_id', 'team_id'):
+            team_conflicts[self._adj_index[adj_id], self._team_index[team_id]] = True
+        team_institutions = np.array(team_institutions, dtype=int)
+        has_institution = team_institutions >= 0
+        team_conflicts[:, has_institution] |= adj_institution_conflicts[:, team_institutions[has_institution]]
+
+        # adj × team: number of times the adjudicator has seen the team
+        team_histories = np.zeros((n_adjs, n_teams))
+        for adj_id, team_id in DebateAdjudicator.objects.filter(adjudicator_id__in=adj_ids,
+                debate__round__seq__lt=self.round.seq, debate__debateteam__team_id__in=team_ids).values_list(
+                'adjudicator_id', 'debate__debateteam__team_id'):
+            team_histories[self._adj_index[adj_id], self._team_index[team_id]] += 1
+
+        # adj × adj: conflicts in either direction, directly or through institutions
+        adj_conflicts = np.zeros((n_adjs, n_adjs), dtype=bool)
+        for adj_id, other_id in AdjudicatorAdjudicatorConflict.objects.filter(adjudicator_id__in=adj_ids,
+                conflict_adjudicator_id__in=adj_ids).values_list('adjudicator_id', 'conflict_adjudicator_id'):
+            adj_conflicts[self._adj_index[adj_id], self._adj_index[other_id]] = True
+        adj_institutions = np.array(adj_institutions, dtype=int)
+        has_institution = adj_institutions >= 0
+        adj_institution_adj_conflicts = np.zeros((n_adjs, n_adjs), dtype=bool)
+        adj_institution_adj_conflicts[:, has_institution] = adj_institution_conflicts[:, adj_institutions[has_institution]]
+        adj_conflicts |= adj_conflicts.T | adj_institution_adj_conflicts | adj_institution_adj_conflicts.T
+
+        # adj × adj: number of times the adjudicators have been on a panel together
+        adj_histories = np.zeros((n_adjs, n_adjs))
+        for adj_id, other_id in DebateAdjudicator.objects.filter(adjudicator_id__in=adj_ids,
+                debate__round__seq__lt=self.round.seq, debate__debateadjudicator__adjudicator_id__in=adj_ids).values_list(
+                'adjudicator_id', 'debate__debateadjudicator__adjudicator_id'):
+            if adj_id != other_id:
+                adj_histories[self._adj_index[adj_id], self._adj_index[other_id]] += 1
+
+        self._team_costs = self.conflict_penalty * team_conflicts + self.history_penalty * team_histories
+        self._adj_costs = self.conflict_penalty * adj_conflicts + self.history_penalty * adj_histories
+
+    def calc_cost_matrix(self, debates, adjs, adjustments=None, chairs=None):
+        """Returns a NumPy array of costs, with one row for each debate in
+        `debates` (which may repeat a debate, once for each panel position) and
+        one column for each adjudicator in `adjs`. If given, `adjustments` is a
+        list of importance adjustments for each row, and `chairs` is a list of
+        the chair (or None) against whom each row's adjudicator would be
+        checked for conflicts and history.
+
+        `populate_incidence_matrices()` must be called before this method."""
+
+        columns = np.array([self._adj_index[adj.id] for adj in adjs], dtype=int)
+        scores = self._scores[columns]
+
+        # Conflicts and histories with teams: index the team costs of the
+        # relevant adjudicators by the teams in each row's debate, and sum
+        # over sides
+        debate_teams = np.array([self._debate_teams[debate.id] for debate in debates], dtype=int)
+        cost = self._team_costs[columns].T[debate_teams].sum(axis=1)
+
+        # Conflicts and histories with the chair
+        if chairs is not None:
+            has_chair = np.array([chair is not None for chair in chairs], dtype=bool)
+            chair_rows = np.array([self._adj_index[chair.id] for chair in chairs if chair is not None], dtype=int)
+            cost[has_chair] += self._adj_costs[np.ix_(chair_rows, columns)]
 
         # Normalise debate importances back to the 1-5 (not ±2) range expected
-        normalised_importance = debate.importance + 3
+        importances = np.array([debate.importance + 3 for debate in debates], dtype=float)
+        if adjustments is not None:
+            importances += np.array(adjustments, dtype=float)
+        diff = 5 + importances[:, np.newaxis] - scores[np.newaxis, :]
+        cost += np.where(diff > 0.25, 1000 * np.exp(diff - 0.25), 0)
 
-        for side in self.tournament.sides:
-            cost += self.conflict_penalty * adj.conflicts_with_team(debate.get_team(side))
-            cost += self.history_penalty * adj.seen_team(debate.get_team(side), debate.round)
-        if chair:
-            cost += self.conflict_penalty * adj.conflicts_with_adj(chair)
-            cost += self.history_penalty * adj.seen_adjudicator(chair, debate.round)
-
-        impt = normalised_importance + adjustment
-        diff = 5 + impt - adj._normalized_score
-        if diff > 0.25:
-            cost += 1000 * exp(diff - 0.25)
-
-        cost += self.max_score - adj._normalized_score
+        cost += self.max_score - scores[np.newaxis, :]
 
         return cost
 
@@ -77,15 +182,12 @@ class BaseHungarianAllocator(Allocator):
             allocation_by_debate = {aa.debate: aa for aa in allocation}
 
             logger.info("costing trainees")
-            cost_matrix = []
-            for debate in debates:
-                chair = allocation_by_debate[debate].chair
-                row = [self.calc_cost(debate, adj, adjustment=-2.0, chair=chair) for adj in trainees]
-                cost_matrix.append(row)
-
-            logger.info("optimizing trainees (matrix size: %d positions by %d trainees)", len(cost_matrix), len(cost_matrix[0]))
-            indexes = self.munkres.compute(cost_matrix)
-            total_cost = sum(cost_matrix[i][j] for i, j in indexes)
+            chairs = [allocation_by_debate[debate].chair for debate in debates]
+            cost_matrix = self.calc_cost_matrix(debates, trainees, [-2.0] * len(debates), chairs)
+
+            logger.info("optimizing trainees (matrix size: %d positions by %d trainees)", *cost_matrix.shape)
+            indexes = self.solver.solve(cost_matrix)
+            total_cost = sum(cost_matrix[i, j] for i, j in indexes)
             logger.info('total cost for %d trainees: %f', len(indexes), total_cost)
 
             result = ((debates[i], trainees[j]) for i, j in indexes if i < len(debates))
@@ -157,14 +259,11 @@ class VotingHungarianAllocator(BaseHungarianAllocator):
 
         if len(solos) > 0 and len(solo_debates) > 0:
             logger.info("costing solos")
-            cost_matrix = []
-            for debate in solo_debates:
-                row = [self.calc_cost(debate, adj) for adj in solos]
-                cost_matrix.append(row)
-
-            logger.info("optimizing solos (matrix size: %d positions by %d adjudicators)", len(cost_matrix), len(cost_matrix[0]))
-            indexes = self.munkres.compute(cost_matrix)
-            total_cost = sum(cost_matrix[i][j] for i, j in indexes)
+            cost_matrix = self.calc_cost_matrix(solo_debates, solos)
+
+            logger.info("optimizing solos (matrix size: %d positions by %d adjudicators)", *cost_matrix.shape)
+            indexes = self.solver.solve(cost_matrix)
+            total_cost = sum(cost_matrix[i, j] for i, j in indexes)
             logger.info('total cost for %d solo debates: %f', len(solos), total_cost)
 
             result = ((solo_debates[i], solos[j]) for i, j in indexes if i < len(solo_debates))
@@ -179,18 +278,19 @@ class VotingHungarianAllocator(BaseHungarianAllocator):
         # Allocate panellists
         if len(panellists) > 0 and len(panel_debates) > 0:
             logger.info("costing panellists")
-            cost_matrix = []
+            rows = []
+            adjustments = []
             for i, debate in enumerate(panel_debates):
                 for j in range(3):
                     # for the top half of these debates, the final panellist
                     # can be of lower quality than the other 2
-                    adjustment = -1.0 if i < len(panel_debates)/2 and j == 2 else 0.0
-                    row = [self.calc_cost(debate, adj, adjustment) for adj in panellists]
-                    cost_matrix.append(row)
+                    rows.append(debate)
+                    adjustments.append(-1.0 if i < len(panel_debates)/2 and j == 2 else 0.0)
+            cost_matrix = self.calc_cost_matrix(rows, panellists, adjustments)
 
-            logger.info("optimizing panellists (matrix size: %d positions by %d adjudicators)", len(cost_matrix), len(cost_matrix[0]))
-            indexes = self.munkres.compute(cost_matrix)
-            total_cost = sum(cost_matrix[i][j] for i, j in indexes)
+            logger.info("optimizing panellists (matrix size: %d positions by %d adjudicators)", *cost_matrix.shape)
+            indexes = self.solver.solve(cost_matrix)
+            total_cost = sum(cost_matrix[i, j] for i, j in indexes)
             logger.info('total cost for %d panel debates: %f', len(panel_debates), total_cost)
 
             # transfer the indices to the debates
@@ -257,17 +357,19 @@ class ConsensusHungarianAllocator(BaseHungarianAllocator):
 
         # Allocate voting
         logger.info("costing voting adjudicators")
-        cost_matrix = []
+        rows = []
+        adjustments = []
         for debate, njudges in zip(debates_sorted, judges_per_room):
             for i in range(njudges):
-                row = [self.calc_cost(debate, adj, adjustment=-i) for adj in voting]
-                cost_matrix.append(row)
+                rows.append(debate)
+                adjustments.append(-i)
+        cost_matrix = self.calc_cost_matrix(rows, voting, adjustments)
 
         logger.info("optimizing voting adjudicators (matrix size: %d positions by %d adjudicators)",
-                len(cost_matrix), len(cost_matrix[0]))
-        indexes = self.munkres.compute(cost_matrix)
+                *cost_matrix.shape)
+        indexes = self.solver.solve(cost_matrix)
         indexes.sort()
-        total_cost = sum(cost_matrix[i][j] for i, j in indexes)
+        total_cost = sum(cost_matrix[i, j] for i, j in indexes)
         logger.info('total cost for %d debates: %f', n_debates, total_cost)
 
         # transfer the indices to the debates
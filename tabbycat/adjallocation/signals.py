@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from draw.models import DebateTeam
+from tournaments.utils import get_debate_round_ids
+
+from .models import DebateAdjudicator
+from .utils import histories_invalidation_deferred, invalidate_histories_cache
+
+
+@receiver(post_delete, sender=DebateTeam)
+@receiver(post_save, sender=DebateTeam)
+@receiver(post_delete, sender=DebateAdjudicator)
+@receiver(post_save, sender=DebateAdjudicator)
+def update_histories_cache(sender, instance, **kwargs):
+    if histories_invalidation_deferred():
+        return  # the caller will invalidate the cache itself
+    ids = get_debate_round_ids(instance)
+    if ids is None:
+        return  # the debate is being deleted too, so there's nothing left to match
+    invalidate_histories_cache(ids[0])
@@ -1,6 +1,9 @@
 import math
+import threading
+from contextlib import contextmanager
 from itertools import permutations
 
+from django.core.cache import cache
 from django.db.models import Q
 
 from .models import AdjudicatorAdjudicatorConflict, AdjudicatorConflict, AdjudicatorInstitutionConflict, DebateAdjudicator
@@ -121,52 +124,93 @@ def get_clashes(t, r):
     return clashes
 
 
-def populate_histories(histories, seen_adj_or_team, seen_adj_or_team_histories,
+def histories_cache_key(t, r):
+    version = cache.get_or_set("%d_%s" % (t.id, 'histories_version'), 0, None)
+    return "%d_%d_%s_%d" % (t.id, r.id, 'histories', version)
+
+
+def invalidate_histories_cache(tournament_id):
+    """Invalidates the cached histories of every round in the tournament. This
+    is called whenever a debate's adjudicators or teams change (see signals.py),
+    since that changes the histories of all later rounds."""
+    cached_key = "%d_%s" % (tournament_id, 'histories_version')
+    try:
+        cache.incr(cached_key)
+    except ValueError:
+        cache.set(cached_key, 1, None)
+
+
+_deferred_invalidations = threading.local()
+
+
+def histories_invalidation_deferred():
+    return getattr(_deferred_invalidations, 'depth', 0) > 0
+
+
+@contextmanager
+def invalidate_histories_cache_once(tournament_id):
+    """Within this block, saving debate teams and adjudicators doesn't
+    invalidate the histories cache; instead, it's invalidated once at the end.
+    Use this around operations that save many of them."""
+    _deferred_invalidations.depth = getattr(_deferred_invalidations, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _deferred_invalidations.depth -= 1
+        invalidate_histories_cache(tournament_id)
+
+
+def populate_histories(histories, seen_adj_or_team_histories, other_seats_by_debate,
                        type, for_type, current_round):
-    adj_or_team_id = seen_adj_or_team[0]
+    """For each DebateAdjudicator/DebateTeam in `seen_adj_or_team_histories`,
+    adds who was in the same debate (according to `other_seats_by_debate`, a
+    dict mapping debate IDs to lists of adjudicator or team IDs) to
+    `histories`."""
 
-    # Make the base dictionary structure for each adj if it doesn't exist already
-    if adj_or_team_id not in histories[for_type]:
-        histories[for_type][adj_or_team_id] = {'team': [], 'adjudicator': []}
-
-    seen_round_debate_id = seen_adj_or_team[1]
-    seen_round_seq = seen_adj_or_team[2]
-
-    # We don't know who they saw just based on a DebateAdjudicator/Team; so we need
-    # to match things upagainst the other objects
-    for history in seen_adj_or_team_histories:
-        debate_id = history[1]
-        check_team_or_adj_id = history[0]
-
-        if type is 'adjudicator' and adj_or_team_id == check_team_or_adj_id:
-            # Don't match conflicts to self
-            continue
-        if seen_round_debate_id == debate_id:
-            # If the root DA/DT saw this DT/DA
-            histories[for_type][adj_or_team_id][type].append(
-                {'ago': current_round.seq - seen_round_seq, 'id': history[0]})
+    for adj_or_team_id, debate_id, seq in seen_adj_or_team_histories:
+
+        # Make the base dictionary structure for each adj if it doesn't exist already
+        history = histories[for_type].setdefault(adj_or_team_id, {'team': [], 'adjudicator': []})
+
+        for seen_id in other_seats_by_debate.get(debate_id, []):
+            if type == 'adjudicator' and for_type == 'for_adjs' and adj_or_team_id == seen_id:
+                # Don't match conflicts to self
+                continue
+            history[type].append({'ago': current_round.seq - seq, 'id': seen_id})
 
     return histories
 
 
 def get_histories(t, r):
+    """Returns a dict of the adjudicators and teams each adjudicator and team
+    has seen in previous rounds. The result is cached until the adjudicators or
+    teams of any debate in the tournament change."""
+
+    cached_key = histories_cache_key(t, r)
+    histories = cache.get(cached_key)
+    if histories is not None:
+        return histories
 
     adj_histories = DebateAdjudicator.objects.filter(
-        debate__round__tournament=t, debate__round__seq__lt=r.seq).select_related(
-            'debate__round').values_list('adjudicator', 'debate', 'debate__round__seq').order_by('-debate__round__seq')
+        debate__round__tournament=t, debate__round__seq__lt=r.seq).values_list(
+            'adjudicator', 'debate', 'debate__round__seq').order_by('-debate__round__seq')
     team_histories = DebateTeam.objects.filter(
-        debate__round__tournament=t, debate__round__seq__lt=r.seq).select_related(
-            'debate__round').values_list('team', 'debate', 'debate__round__seq').order_by('-debate__round__seq')
+        debate__round__tournament=t, debate__round__seq__lt=r.seq).values_list(
+            'team', 'debate', 'debate__round__seq').order_by('-debate__round__seq')
+
+    # Index who was in each debate, so that matching things up is linear
+    adjs_by_debate = {}
+    for adj_id, debate_id, seq in adj_histories:
+        adjs_by_debate.setdefault(debate_id, []).append(adj_id)
+    teams_by_debate = {}
+    for team_id, debate_id, seq in team_histories:
+        teams_by_debate.setdefault(debate_id, []).append(team_id)
 
     # Make a dictionary of conflicts with adj or team ID as key
     histories = {'for_teams': {}, 'for_adjs': {}}
-    for seen_adj in adj_histories:
-        histories = populate_histories(histories, seen_adj, adj_histories,
-                                       'adjudicator', 'for_adjs', r)
-        histories = populate_histories(histories, seen_adj, team_histories,
-                                       'team', 'for_adjs', r)
-    for seen_team in team_histories:
-        histories = populate_histories(histories, seen_team, adj_histories,
-                                       'adjudicator', 'for_teams', r)
+    populate_histories(histories, adj_histories, adjs_by_debate, 'adjudicator', 'for_adjs', r)
+    populate_histories(histories, adj_histories, teams_by_debate, 'team', 'for_adjs', r)
+    populate_histories(histories, team_histories, adjs_by_debate, 'adjudicator', 'for_teams', r)
 
+    cache.set(cached_key, histories, None)
     return histories
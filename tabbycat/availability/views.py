@@ -17,10 +17,12 @@ from . import utils
 from availability.models import RoundAvailability
 from actionlog.mixins import LogActionMixin
 from actionlog.models import ActionLogEntry
+from breakqual.utils import get_live_thresholds, liveness
 from checkins.utils import get_checkins
 from draw.generator.utils import partial_break_round_split
 from draw.models import Debate
 from participants.models import Adjudicator, Team
+from participants.prefetch import populate_win_counts
 from tournaments.mixins import RoundMixin
 from utils.tables import TabbycatTableBuilder
 from utils.mixins import AdministratorMixin
@@ -201,12 +203,18 @@ class AvailabilityTypeTeamView(AvailabilityTypeBase):
     update_view = 'availability-update-teams'
 
     def get_queryset(self):
-        return super().get_queryset().prefetch_related('speaker_set').prefetch_related('speaker_set__checkin_identifier')
+        return super().get_queryset().prefetch_related('speaker_set', 'speaker_set__checkin_identifier',
+                'break_categories')
 
-    @staticmethod
-    def add_description_columns(table, teams):
+    def add_description_columns(self, table, teams):
         table.add_team_columns(teams)
 
+        if not self.round.is_break_round and self.tournament.breakcategory_set.exists():
+            populate_win_counts(teams)
+            thresholds = get_live_thresholds(self.tournament, self.round)
+            table.add_column({'key': 'liveness', 'title': _("Break Liveness")},
+                    [liveness(team, thresholds) for team in teams])
+
     @staticmethod
     def annotate_checkins(queryset, t):
         return get_checkins(queryset, t, 'checkin_window_people')
@@ -116,7 +116,8 @@ class BaseBreakGenerator:
         metrics = self.category.tournament.pref('team_standings_precedence')
         self.check_required_metrics(metrics)
 
-        generator = TeamStandingsGenerator(metrics, self.rankings)
+        generator = TeamStandingsGenerator(metrics, self.rankings,
+                materialized=self.category.tournament.pref('team_standings_materialized'))
         generated = generator.generate(self.team_queryset)
         self.standings = list(generated)
 
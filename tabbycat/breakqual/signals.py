@@ -0,0 +1,51 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from options.models import TournamentPreferenceModel
+from participants.models import Team
+from results.models import BallotSubmission
+from tournaments.models import Round
+from tournaments.utils import get_debate_round_ids
+
+from .models import BreakCategory
+from .utils import invalidate_live_thresholds_cache
+
+
+@receiver(post_delete, sender=BallotSubmission)
+@receiver(post_save, sender=BallotSubmission)
+def update_live_thresholds_cache_for_ballot(sender, instance, **kwargs):
+    # Thresholds only count confirmed ballots, but saving is how ballots are
+    # both confirmed and unconfirmed, so we can't skip unconfirmed ones.
+    ids = get_debate_round_ids(instance)
+    if ids is None:
+        return  # the debate is being deleted too
+    invalidate_live_thresholds_cache(ids[0])
+
+
+@receiver(post_delete, sender=BreakCategory)
+@receiver(post_save, sender=BreakCategory)
+@receiver(post_delete, sender=Team)
+@receiver(post_save, sender=Team)
+def update_live_thresholds_cache(sender, instance, **kwargs):
+    invalidate_live_thresholds_cache(instance.tournament_id)
+
+
+@receiver(post_delete, sender=Round)
+@receiver(post_save, sender=Round)
+def update_live_thresholds_cache_for_round(sender, instance, **kwargs):
+    # Thresholds depend on the number of preliminary rounds
+    invalidate_live_thresholds_cache(instance.tournament_id)
+
+
+@receiver(post_delete, sender=TournamentPreferenceModel)
+@receiver(post_save, sender=TournamentPreferenceModel)
+def update_live_thresholds_cache_for_preference(sender, instance, **kwargs):
+    # Thresholds depend on teams_in_debate, among other preferences
+    invalidate_live_thresholds_cache(instance.instance_id)
+
+
+@receiver(m2m_changed, sender=Team.break_categories.through)
+def update_live_thresholds_cache_for_eligibility(sender, instance, action, **kwargs):
+    # `instance` is a team or a break category, depending on which side changed
+    if action.startswith('post_'):
+        invalidate_live_thresholds_cache(instance.tournament_id)
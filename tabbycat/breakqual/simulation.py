@@ -0,0 +1,109 @@
+"""Monte Carlo estimates of break probabilities.
+
+The functions in liveness.py give closed-form thresholds that don't depend on
+how the tournament actually pans out. This module instead plays out the rest of
+the tournament many times over, with every simulation run in parallel as rows
+of NumPy arrays, and counts how often each team breaks in each category.
+
+The model is deliberately simple:
+ - Each remaining round is power-paired, by sorting teams on their points with
+   ties broken randomly and taking them in consecutive groups of two (or four,
+   in BP). If the number of teams isn't a multiple of the debate size, the
+   lowest-ranked teams are left out of the round.
+ - Every team in a debate is equally likely to win it (or, in BP, to take any
+   of 3, 2, 1 and 0 points).
+ - At the end, teams are ranked on points with ties broken randomly, standing
+   in for speaker scores and other tiebreaks. Categories are then filled in
+   descending order of priority, and a team that breaks in a higher-priority
+   category can't break in a lower-priority one. A team can break in several
+   categories of equal priority, as `BreakCategory.priority` allows.
+"""
+
+from itertools import permutations
+
+import numpy as np
+
+
+def _ranking_keys(sims, max_points, random_state):
+    """Returns an array of keys that sort teams in descending order of points,
+    with ties broken randomly. The keys are 16-bit integers, which NumPy can
+    sort with a (linear-time) radix sort."""
+    spread = 1 << (16 - max(int(max_points).bit_length(), 1))  # so that keys fit in 16 bits
+    keys = (max_points - sims).astype(np.uint16) * np.uint16(spread)
+    keys += random_state.randint(0, spread, size=sims.shape, dtype=np.uint16)
+    return keys
+
+
+def simulate_rounds(points, nrounds, teams_per_debate, nsimulations, random_state):
+    """Returns an array of shape (nsimulations, nteams), with each row being the
+    points of each team after `nrounds` further rounds, starting from the list
+    `points`, and the highest number of points any team could have."""
+    nteams = len(points)
+    ndebates = nteams // teams_per_debate
+    nplaying = ndebates * teams_per_debate
+    max_points = int(max(points, default=0)) + nrounds * (teams_per_debate - 1)
+    sims = np.tile(np.asarray(points, dtype=np.int16), (nsimulations, 1))
+    offsets = np.arange(0, nsimulations * nteams, nteams)[:, np.newaxis]
+
+    # Each permutation of 0, 1, ..., teams_per_debate-1 is a possible result
+    # of a debate: 1 and 0 points for two-team, 3 to 0 for BP.
+    results = np.array(list(permutations(range(teams_per_debate))), dtype=np.int16)
+
+    for i in range(nrounds):
+        keys = _ranking_keys(sims, max_points, random_state)
+        order = np.argsort(keys, axis=1, kind='stable')[:, :nplaying]
+        choices = random_state.randint(0, len(results), size=(nsimulations, ndebates), dtype=np.uint8)
+        awards = np.take(results, choices, axis=0)
+        # Flat indices are much faster than indexing by (row, column) arrays
+        sims.ravel()[(order + offsets).ravel()] += awards.ravel()
+
+    return sims, max_points
+
+
+def break_probabilities(points, eligibility, break_sizes, nrounds, priorities=None,
+                        teams_per_debate=2, nsimulations=10000, seed=None):
+    """Returns an array of shape (ncategories, nteams), with the probability of
+    each team breaking in each category.
+
+    `points` is a list of the current points of each team. `eligibility` is a
+    list of lists (or boolean array) of shape (ncategories, nteams), indicating
+    which teams are eligible for which categories. `break_sizes` and
+    `priorities` are lists of the break size and priority of each category; if
+    `priorities` is omitted, categories are taken to be in descending order of
+    priority. `nrounds` is the number of rounds still to be debated."""
+    random_state = np.random.RandomState(seed)
+    ncategories = len(break_sizes)
+    eligibility = np.asarray(eligibility, dtype=bool).reshape(ncategories, len(points))
+    if priorities is None:
+        priorities = range(ncategories, 0, -1)
+
+    sims, max_points = simulate_rounds(points, nrounds, teams_per_debate, nsimulations, random_state)
+    keys = _ranking_keys(sims, max_points, random_state).astype(np.int32)
+    excluded = np.iinfo(np.int32).max
+    rows = np.arange(nsimulations)[:, np.newaxis]
+    counts = np.zeros(eligibility.shape, dtype=np.int64)
+
+    # Teams that break in a category are only excluded from categories of
+    # strictly lower priority, so `taken` is only updated between priorities.
+    taken = np.zeros(sims.shape, dtype=bool)
+    taken_this_priority = taken.copy()
+    last_priority = None
+
+    for i in sorted(range(ncategories), key=lambda i: priorities[i], reverse=True):
+        if priorities[i] != last_priority:
+            taken |= taken_this_priority
+            last_priority = priorities[i]
+
+        break_size = min(break_sizes[i], len(points))
+        if break_size <= 0:
+            continue
+        candidates = eligibility[i] & ~taken
+        category_keys = np.where(candidates, keys, excluded)
+        top = np.argpartition(category_keys, break_size - 1, axis=1)[:, :break_size]
+        breaking = np.zeros(sims.shape, dtype=bool)
+        breaking[rows, top] = True
+        breaking &= candidates  # in case there are fewer candidates than spots
+        counts[i] = breaking.sum(axis=0)
+        taken_this_priority |= breaking
+
+    return counts / nsimulations
@@ -0,0 +1,42 @@
+from unittest import TestCase
+
+import numpy as np
+
+from ..simulation import break_probabilities, simulate_rounds
+
+
+class TestBreakSimulation(TestCase):
+
+    def test_points_awarded(self):
+        random_state = np.random.RandomState(0)
+        sims, max_points = simulate_rounds([0] * 8, 3, 4, 100, random_state)
+        self.assertEqual(max_points, 9)
+        self.assertTrue((sims.sum(axis=1) == 3 * 2 * 6).all())  # 2 debates per round, 6 points each
+        self.assertTrue((sims <= 9).all())
+
+    def test_odd_team_out(self):
+        random_state = np.random.RandomState(0)
+        sims, max_points = simulate_rounds([0] * 5, 2, 2, 100, random_state)
+        self.assertTrue((sims.sum(axis=1) == 2 * 2).all())
+
+    def test_certain_break(self):
+        probabilities = break_probabilities([9, 0, 0, 0, 0, 0, 0, 0], [[True] * 8], [1], 2, seed=0)
+        self.assertEqual(probabilities.tolist(), [[1, 0, 0, 0, 0, 0, 0, 0]])
+
+    def test_probabilities_sum_to_break_size(self):
+        points = [3, 3, 2, 2, 1, 1, 0, 0, 2, 1, 1, 0]
+        probabilities = break_probabilities(points, [[True] * 12], [4], 2, teams_per_debate=4, seed=0)
+        self.assertAlmostEqual(probabilities.sum(), 4)
+        self.assertGreater(probabilities[0, 0], probabilities[0, 7])
+
+    def test_higher_priority_excludes(self):
+        eligibility = [[True] * 4, [True, True, False, False]]
+        probabilities = break_probabilities([5, 0, 0, 0], eligibility, [1, 1], 1,
+                priorities=[2, 1], seed=0)
+        self.assertEqual(probabilities.tolist(), [[1, 0, 0, 0], [0, 1, 0, 0]])
+
+    def test_equal_priority_allows_both(self):
+        eligibility = [[True] * 4, [True, False, False, False]]
+        probabilities = break_probabilities([5, 0, 0, 0], eligibility, [1, 1], 1,
+                priorities=[1, 1], seed=0)
+        self.assertEqual(probabilities.tolist(), [[1, 0, 0, 0], [1, 0, 0, 0]])
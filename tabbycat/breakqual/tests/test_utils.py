@@ -0,0 +1,56 @@
+import logging
+from unittest.mock import patch
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Sum
+
+from results.models import BallotSubmission
+from utils.tests import suppress_logs, TournamentTestCase
+
+from ..utils import (calculate_all_live_thresholds, get_live_thresholds, get_scores_by_category,
+                     live_thresholds_cache_key)
+
+
+class TestLiveThresholds(TournamentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.round = self.t.prelim_rounds().last()
+
+    def test_scores_by_category(self):
+        categories = self.t.breakcategory_set.filter(is_general=False)
+        scores = get_scores_by_category(categories, self.round)
+
+        for bc in categories:
+            expected = list(bc.team_set.filter(
+                debateteam__debate__round__seq__lt=self.round.seq,
+                debateteam__teamscore__ballot_submission__confirmed=True,
+            ).annotate(score=Sum('debateteam__teamscore__points')).values_list('score', flat=True))
+            expected += [0] * (bc.team_set.count() - len(expected))
+            self.assertCountEqual(scores[bc.id], expected)
+
+    @patch('breakqual.utils.cache', LocMemCache('breakqual-test', {}))
+    def test_thresholds_cached_until_ballot_saved(self):
+        with suppress_logs('breakqual.utils', logging.INFO):
+            thresholds = get_live_thresholds(self.t, self.round)
+            self.assertEqual(thresholds, calculate_all_live_thresholds(self.t, self.round))
+            self.assertCountEqual(thresholds.keys(), self.t.breakcategory_set.values_list('id', flat=True))
+
+            with self.assertNumQueries(0):
+                get_live_thresholds(self.t, self.round)
+
+            key = live_thresholds_cache_key(self.t, self.round)
+            ballot = BallotSubmission.objects.filter(debate__round__tournament=self.t, confirmed=True).first()
+            ballot.confirmed = False
+            ballot.save()
+            self.assertNotEqual(live_thresholds_cache_key(self.t, self.round), key)
+
+    @patch('breakqual.utils.cache', LocMemCache('breakqual-test', {}))
+    def test_thresholds_invalidated_by_rounds_and_preferences(self):
+        key = live_thresholds_cache_key(self.t, self.round)
+        self.round.save()
+        self.assertNotEqual(live_thresholds_cache_key(self.t, self.round), key)
+
+        key = live_thresholds_cache_key(self.t, self.round)
+        self.t.preferences['debate_rules__teams_in_debate'] = 'bp'
+        self.assertNotEqual(live_thresholds_cache_key(self.t, self.round), key)
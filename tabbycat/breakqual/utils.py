@@ -1,10 +1,14 @@
 import logging
 
+from django.core.cache import cache
 from django.db.models import Count, Q, Sum
+from django.utils.translation import gettext as _
 
+from participants.models import Team
 from standings.teams import TeamStandingsGenerator
 
 from .liveness import liveness_bp, liveness_twoteam
+from .simulation import break_probabilities
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +23,8 @@ def get_breaking_teams(category, prefetch=(), rankings=('rank',)):
     """
     teams = category.breaking_teams.all().prefetch_related(*prefetch)
     metrics = category.tournament.pref('team_standings_precedence')
-    generator = TeamStandingsGenerator(metrics, rankings)
+    generator = TeamStandingsGenerator(metrics, rankings,
+            materialized=category.tournament.pref('team_standings_materialized'))
     standings = generator.generate(teams)
 
     breakingteams_by_team_id = {bt.team_id: bt for bt in category.breakingteam_set.all()}
@@ -49,30 +54,29 @@ def breakcategories_with_counts(tournament):
     return categories
 
 
-def liveness(self, team, teams_count, prelims, current_round):
-    live_info = {'text': team.wins_count, 'tooltip': ''}
+def liveness(team, thresholds):
+    """Returns a table cell describing whether `team` is safe, live or dead in
+    each of its break categories. `thresholds` should be the dict returned by
+    `get_live_thresholds()`, and `team` should have its break categories and
+    points prefetched."""
+    live_info = {'text': team.points_count, 'sort': team.points_count, 'tooltip': ''}
 
-    # The actual calculation should be shifed to be a cached method on
-    # the relevant break category
-    highest_liveness = 3
+    statuses = []
     for bc in team.break_categories.all():
-        import random
-        status = random.choice([1,2,3])
-        highest_liveness = 3
-        if status is 1:
-            live_info['tooltip'] += 'Definitely in for the %s break<br>test' % bc.name
-            if highest_liveness != 2:
-                highest_liveness = 1  # Live not ins are the most important highlight
-        elif status is 2:
-            live_info['tooltip'] += 'Still live for the %s break<br>test' % bc.name
-            highest_liveness = 2
-        elif status is 3:
-            live_info['tooltip'] += 'Cannot break in %s break<br>test' % bc.name
-
-    if highest_liveness is 1:
-        live_info['class'] = 'bg-success'
-    elif highest_liveness is 2:
+        status = determine_liveness(thresholds.get(bc.id, (None, None)), team.points_count)
+        statuses.append(status)
+        if status == 'safe':
+            live_info['tooltip'] += _("Definitely in for the %(category)s break<br>") % {'category': bc.name}
+        elif status == 'dead':
+            live_info['tooltip'] += _("Cannot break in %(category)s break<br>") % {'category': bc.name}
+        else:
+            live_info['tooltip'] += _("Still live for the %(category)s break<br>") % {'category': bc.name}
+
+    # Live teams are the most important highlight
+    if 'live' in statuses or '?' in statuses:
         live_info['class'] = 'bg-warning'
+    elif 'safe' in statuses:
+        live_info['class'] = 'bg-success'
 
     return live_info
 
@@ -93,29 +97,125 @@ def determine_liveness(thresholds, points):
         return 'live'
 
 
-def calculate_live_thresholds(bc, tournament, round):
+def get_scores_by_category(categories, round):
+    """Returns a dict mapping the IDs of each of `categories` to a list of the
+    points, from confirmed ballots before `round`, of every team in that
+    category. Teams without any points are included as zeroes. This uses a
+    single grouped query for all categories."""
+    scores = {bc.id: [] for bc in categories}
+    if not scores:
+        return scores
+
+    memberships = Team.break_categories.through.objects.filter(
+        breakcategory_id__in=scores.keys(),
+    ).values('breakcategory_id', 'team_id').annotate(score=Sum('team__debateteam__teamscore__points', filter=Q(
+        team__debateteam__debate__round__seq__lt=round.seq,
+        team__debateteam__teamscore__ballot_submission__confirmed=True,
+    ))).order_by()
+
+    for membership in memberships:
+        scores[membership['breakcategory_id']].append(membership['score'] or 0)
+    return scores
+
+
+def calculate_all_live_thresholds(tournament, round, categories=None):
+    """Returns a dict mapping break category IDs to (safe, dead) tuples, as
+    passed to `determine_liveness()`, for every break category in `categories`
+    (by default, all of the tournament's break categories)."""
+    if categories is None:
+        categories = tournament.breakcategory_set.all()
+
     total_teams = tournament.team_set.count()
     total_rounds = tournament.prelim_rounds().count()
+    liveness_function = liveness_bp if tournament.pref('teams_in_debate') == 'bp' else liveness_twoteam
+    scores = get_scores_by_category([bc for bc in categories if not bc.is_general], round)
 
-    if not bc.is_general:
-        team_scores = bc.team_set.filter(
-            debateteam__debate__round__seq__lt=round.seq,
-            debateteam__teamscore__ballot_submission__confirmed=True,
-        ).annotate(score=Sum('debateteam__teamscore__points')).values_list('score', flat=True)
-        team_scores = list(team_scores)
-        team_scores += [0] * (bc.team_set.count() - len(team_scores))
-    else:
-        team_scores = None
+    thresholds = {}
+    for bc in categories:
+        if bc.break_size <= 1 or total_teams == 0:
+            thresholds[bc.id] = (None, None) # Bad input
+            continue
 
-    if bc.break_size <= 1 or total_teams == 0:
-        return None, None # Bad input
-    elif tournament.pref('teams_in_debate') == 'bp':
-        safe, dead = liveness_bp(bc.is_general, round.seq, bc.break_size,
-                            total_teams, total_rounds, team_scores)
-    else:
-        safe, dead = liveness_twoteam(bc.is_general, round.seq, bc.break_size,
-                              total_teams, total_rounds, team_scores)
+        safe, dead = liveness_function(bc.is_general, round.seq, bc.break_size,
+                total_teams, total_rounds, scores.get(bc.id))
+        logger.info("Liveness in %s R%d/%d with break size %d, %d teams: safe at %d, dead at %d",
+            tournament.short_name, round.seq, total_rounds, bc.break_size, total_teams, safe, dead)
+        thresholds[bc.id] = (safe, dead)
 
-    logger.info("Liveness in %s R%d/%d with break size %d, %d teams: safe at %d, dead at %d",
-        tournament.short_name, round.seq, total_rounds, bc.break_size, total_teams, safe, dead)
-    return safe, dead
+    return thresholds
+
+
+def calculate_live_thresholds(bc, tournament, round):
+    return calculate_all_live_thresholds(tournament, round, [bc])[bc.id]
+
+
+def calculate_break_probabilities(tournament, round, nsimulations=10000):
+    """Returns a dict mapping break category IDs to dicts, each mapping team
+    IDs to the estimated probability of that team breaking in that category,
+    found by simulating the remaining preliminary rounds from `round` onwards.
+    Teams with no chance of breaking in a category are omitted."""
+    categories = list(tournament.breakcategory_set.all())
+    if not categories or round.stage != round.STAGE_PRELIMINARY:
+        return {}
+    nrounds = tournament.prelim_rounds().filter(seq__gte=round.seq).count()
+
+    points = dict(tournament.team_set.annotate(score=Sum('debateteam__teamscore__points', filter=Q(
+        debateteam__debate__round__seq__lt=round.seq,
+        debateteam__teamscore__ballot_submission__confirmed=True,
+    ))).values_list('id', 'score'))
+    team_ids = list(points.keys())
+    team_indices = {team_id: i for i, team_id in enumerate(team_ids)}
+
+    eligibility = [[False] * len(team_ids) for bc in categories]
+    category_indices = {bc.id: i for i, bc in enumerate(categories)}
+    memberships = Team.break_categories.through.objects.filter(
+        breakcategory__tournament=tournament).values_list('breakcategory_id', 'team_id')
+    for bc_id, team_id in memberships:
+        eligibility[category_indices[bc_id]][team_indices[team_id]] = True
+
+    teams_per_debate = 4 if tournament.pref('teams_in_debate') == 'bp' else 2
+    probabilities = break_probabilities([points[team_id] or 0 for team_id in team_ids], eligibility,
+            [bc.break_size for bc in categories], nrounds, priorities=[bc.priority for bc in categories],
+            teams_per_debate=teams_per_debate, nsimulations=nsimulations)
+
+    return {bc.id: {team_ids[j]: p for j, p in enumerate(row.tolist()) if p > 0}
+            for bc, row in zip(categories, probabilities)}
+
+
+def live_thresholds_cache_key(t, r, name='live_thresholds'):
+    version = cache.get_or_set("%d_%s" % (t.id, 'live_thresholds_version'), 0, None)
+    return "%d_%d_%s_%d" % (t.id, r.id, name, version)
+
+
+def invalidate_live_thresholds_cache(tournament_id):
+    """Invalidates the cached thresholds and break probabilities of every round
+    in the tournament. This is called whenever a ballot is confirmed, or teams,
+    break categories, rounds or preferences change; see signals.py."""
+    key = "%d_%s" % (tournament_id, 'live_thresholds_version')
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_live_thresholds(tournament, round):
+    """Returns a dict mapping break category IDs to (safe, dead) tuples for
+    every break category in the tournament, as at `round`. The result is cached
+    until it's invalidated by `invalidate_live_thresholds_cache()`."""
+    key = live_thresholds_cache_key(tournament, round)
+    thresholds = cache.get(key)
+    if thresholds is None:
+        thresholds = calculate_all_live_thresholds(tournament, round)
+        cache.set(key, thresholds, None)
+    return thresholds
+
+
+def get_break_probabilities(tournament, round):
+    """Returns the result of `calculate_break_probabilities()`, cached in the
+    same way as `get_live_thresholds()`."""
+    key = live_thresholds_cache_key(tournament, round, 'break_probabilities')
+    probabilities = cache.get(key)
+    if probabilities is None:
+        probabilities = calculate_break_probabilities(tournament, round)
+        cache.set(key, probabilities, None)
+    return probabilities
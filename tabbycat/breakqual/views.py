@@ -11,7 +11,8 @@ from actionlog.mixins import LogActionMixin
 from actionlog.models import ActionLogEntry
 from participants.models import Team
 from utils.misc import reverse_tournament
-from utils.mixins import AdministratorMixin
+from utils.mixins import AdministratorMixin, ConditionalGetMixin
+from utils.publiccache import invalidate_public_pages
 from utils.views import PostOnlyRedirectView, VueTableTemplateView
 from utils.tables import TabbycatTableBuilder
 from tournaments.mixins import PublicTournamentPageMixin, SingleObjectFromTournamentMixin, TournamentMixin
@@ -73,7 +74,7 @@ class BaseBreakingTeamsView(SingleObjectFromTournamentMixin, VueTableTemplateVie
         return super().get(request, *args, **kwargs)
 
 
-class PublicBreakingTeamsView(PublicTournamentPageMixin, BaseBreakingTeamsView):
+class PublicBreakingTeamsView(ConditionalGetMixin, PublicTournamentPageMixin, BaseBreakingTeamsView):
     public_page_preference = 'public_breaking_teams'
     cache_timeout = settings.PUBLIC_SLOW_CACHE_TIMEOUT
 
@@ -94,6 +95,7 @@ class GenerateBreakMixin:
                     "%(category)s: %(message)s") % {'category': category.name, 'message': str(e)})
             else:
                 successes.append(category.name)
+        invalidate_public_pages(self.tournament, self.request)
         return ", ".join(successes)
 
 
@@ -215,7 +217,7 @@ class AdminBreakingAdjudicatorsView(AdministratorMixin, BaseBreakingAdjudicators
     template_name = 'breaking_adjs.html'
 
 
-class PublicBreakingAdjudicatorsView(PublicTournamentPageMixin, BaseBreakingAdjudicatorsView):
+class PublicBreakingAdjudicatorsView(ConditionalGetMixin, PublicTournamentPageMixin, BaseBreakingAdjudicatorsView):
     public_page_preference = 'public_breaking_adjs'
     cache_timeout = settings.PUBLIC_SLOW_CACHE_TIMEOUT
 
@@ -1,11 +1,10 @@
 from asgiref.sync import async_to_sync
-from django.core.exceptions import ObjectDoesNotExist
+from channels.db import database_sync_to_async
 from django.utils.translation import gettext_lazy as _
 
-from utils.consumers import TournamentConsumer, WSPublicAccessMixin
+from utils.consumers import AsyncTournamentConsumer, TournamentConsumer, WSPublicAccessMixin
 
-from .models import Event, Identifier
-from .utils import get_unexpired_checkins
+from .utils import process_checkins
 
 
 class CheckInEventConsumer(TournamentConsumer, WSPublicAccessMixin):
@@ -18,52 +17,49 @@ class CheckInEventConsumer(TournamentConsumer, WSPublicAccessMixin):
         if not self.scope["user"].is_authenticated:
             return
 
+        # Process the check-ins here, once, rather than in every consumer in
+        # the group; only the results are sent to the group. Errors are only
+        # sent to this consumer's client.
+        return_content, error = process_checkins(self.tournament(), content)
+        if error is not None:
+            self.send_error(_("Checkins"), error, content)
+            return
+
         # Send message to room group about the new checkin
         async_to_sync(self.channel_layer.group_send)(
             self.group_name(), {
                 'type': 'broadcast_checkin',
-                'content': content
+                'content': return_content
             }
         )
 
-    # Issue the relevant checkins
+    # Send the processed checkins to the client
     def broadcast_checkin(self, event):
-        content = event['content']
-        tournament = self.tournament()
-        barcode_ids = [b for b in content['barcodes'] if b is not None]
-        return_content = {'created': content['status'], 'checkins': [],
-                          'component_id': content['component_id']}
-
-        for barcode in barcode_ids:
-            try:
-                identifier = Identifier.objects.get(barcode=barcode)
-                if content['status'] is True:
-                    # If checking-in someone
-                    checkin = Event.objects.create(identifier=identifier,
-                                                   tournament=tournament)
-                    return_content['checkins'].append(checkin.serialize())
-                else:
-                    # If undoing/revoking a check-in
-                    if content['type'] == 'people':
-                        window = 'checkin_window_people'
-                    else:
-                        window = 'checkin_window_venues'
-
-                    checkins = get_unexpired_checkins(tournament, window)
-                    checkins.filter(identifier=identifier).delete()
-                    return_content['checkins'].append({'identifier': barcode})
-
-            except ObjectDoesNotExist:
-                # Only raise an error for single check-ins as for multi-check-in
-                # events via the status page its clear what has failed or not
-                if len(barcode_ids) == 1:
-                    msg = _("Sent checkin identifier doesn't exist")
-                    self.send_error(_("Checkins"), msg, content)
-                    return
-
-        if len(return_content['checkins']) == 0 and content['status'] is not False:
-            msg = _("No checkin identifiers exist for sent barcodes")
-            self.send_error(_("Checkins"), msg, content)
+        self.send_json(event['content'])
+
+
+class AsyncCheckInEventConsumer(AsyncTournamentConsumer, WSPublicAccessMixin):
+
+    group_prefix = CheckInEventConsumer.group_prefix
+
+    async def receive_json(self, content):
+        # Because the public can receive but not send checkins we need to
+        # re-authenticate here (the user was resolved on connecting):
+        if not self.scope["user"].is_authenticated:
+            return
+
+        tournament = await self.tournament()
+        return_content, error = await database_sync_to_async(process_checkins)(tournament, content)
+        if error is not None:
+            await self.send_error(_("Checkins"), error, content)
             return
 
-        self.send_json(return_content)
+        await self.channel_layer.group_send(
+            await self.group_name(), {
+                'type': 'broadcast_checkin',
+                'content': return_content
+            }
+        )
+
+    async def broadcast_checkin(self, event):
+        await self.send_json(event['content'])
@@ -7,11 +7,16 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
-def generate_identifier():
+def generate_barcode(length=5):
+    """Generates a random barcode, without checking the database."""
     # First number should not be 0 so it is easier import into Excel etc
     numbers = [str(random.choice([1,2,3,4,5,6,7,8,9]))]
-    numbers.extend([str(random.choice(digits)) for n in range(4)])
-    new_id = ''.join(numbers)
+    numbers.extend([str(random.choice(digits)) for n in range(length - 1)])
+    return ''.join(numbers)
+
+
+def generate_identifier():
+    new_id = generate_barcode()
     if Identifier.objects.filter(barcode=new_id).count() == 0:
         return new_id
     else:
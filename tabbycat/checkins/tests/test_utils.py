@@ -0,0 +1,76 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+
+from draw.models import Debate
+from participants.models import Adjudicator, Person
+from tournaments.models import Round, Tournament
+from venues.models import Venue
+
+from ..models import DebateIdentifier, Identifier, PersonIdentifier, VenueIdentifier
+from ..utils import create_identifiers, generate_identifiers, get_identifiers
+
+
+class TestBulkCreateIdentifiers(TestCase):
+
+    NUM_VENUES = 20
+
+    def setUp(self):
+        self.tournament = Tournament.objects.create(slug="checkinutilstest")
+        for i in range(self.NUM_VENUES):
+            Venue.objects.create(tournament=self.tournament, name=str(i), priority=i)
+
+    def tearDown(self):
+        self.tournament.delete()
+
+    def test_create_identifiers(self):
+        venues = self.tournament.venue_set.all()
+        create_identifiers(VenueIdentifier, venues)
+        self.assertEqual(VenueIdentifier.objects.filter(venue__in=venues).count(), self.NUM_VENUES)
+        barcodes = VenueIdentifier.objects.values_list('barcode', flat=True)
+        self.assertEqual(len(set(barcodes)), self.NUM_VENUES)
+        for barcode in barcodes:
+            Identifier.validate_alphanumeric(barcode)
+
+    def test_create_identifiers_without_bulk_insert_ids(self):
+        venues = self.tournament.venue_set.all()
+        with patch.object(connection.features, 'can_return_ids_from_bulk_insert', False):
+            create_identifiers(VenueIdentifier, venues)
+        self.assertEqual(VenueIdentifier.objects.filter(venue__in=venues).count(), self.NUM_VENUES)
+
+    def test_only_missing_identifiers_created(self):
+        venue = self.tournament.venue_set.first()
+        VenueIdentifier.objects.create(venue=venue, barcode="12345")
+        create_identifiers(VenueIdentifier, self.tournament.venue_set.all())
+        self.assertEqual(VenueIdentifier.objects.get(venue=venue).barcode, "12345")
+        self.assertEqual(VenueIdentifier.objects.count(), self.NUM_VENUES)
+
+    def test_collisions_retried(self):
+        adj = Adjudicator.objects.create(tournament=self.tournament, name="Existing")
+        PersonIdentifier.objects.create(person=adj, barcode="111111")
+        for i in range(3):
+            Adjudicator.objects.create(tournament=self.tournament, name=str(i))
+
+        barcodes = iter(["111111", "222222", "222222", "333333", "444444"])
+        with patch('checkins.utils.generate_barcode', side_effect=lambda length: next(barcodes)):
+            generate_identifiers(Person.objects.filter(adjudicator__tournament=self.tournament,
+                    checkin_identifier__isnull=True))
+
+        self.assertCountEqual(PersonIdentifier.objects.values_list('barcode', flat=True),
+                ["111111", "222222", "333333", "444444"])
+
+    def test_get_identifiers_uses_select_related(self):
+        round = Round.objects.create(tournament=self.tournament, seq=1, abbreviation="R1")
+        debates = [Debate.objects.create(round=round) for i in range(3)]
+        identifier = DebateIdentifier.objects.create(debate=debates[0], barcode="12345")
+
+        debates = list(Debate.objects.filter(round=round).select_related('checkin_identifier'))
+        with self.assertNumQueries(0):
+            identifiers = get_identifiers(DebateIdentifier, debates)
+        self.assertEqual(identifiers, {debates[0].pk: identifier})
+
+        debates = list(Debate.objects.filter(round=round))
+        with self.assertNumQueries(1):
+            identifiers = get_identifiers(DebateIdentifier, debates)
+        self.assertEqual(identifiers, {debates[0].pk: identifier})
@@ -1,21 +1,15 @@
 import datetime
 import logging
-import random
-import string
 
-from django.db import IntegrityError
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import connections, router, transaction
 from django.utils.translation import gettext as _
 
-from .models import DebateIdentifier, Event, PersonIdentifier, VenueIdentifier
-
-logger = logging.getLogger(__name__)
+from utils.misc import assign_unique_keys
 
+from .models import DebateIdentifier, Event, generate_barcode, Identifier, PersonIdentifier, VenueIdentifier
 
-def generate_identifier(length=6):
-    """Generates a random identifier and saves it to the database."""
-    chars = string.ascii_uppercase + string.digits
-    return ''.join(random.SystemRandom().choice(chars) for _ in range(length))
+logger = logging.getLogger(__name__)
 
 
 IDENTIFIER_CLASSES = {
@@ -25,23 +19,45 @@ IDENTIFIER_CLASSES = {
 }
 
 
+def bulk_create_identifiers(klass, instances, length=5, num_attempts=10):
+    """Creates an identifier of class `klass` for every instance in
+    `instances`, using a few queries per batch rather than several per
+    identifier. Barcodes are checked for collisions all at once, and only
+    those that collided are regenerated."""
+
+    def find_existing(barcodes):
+        return set(Identifier.objects.filter(barcode__in=barcodes).values_list('barcode', flat=True))
+
+    using = router.db_for_write(klass)
+
+    def save(assignments):
+        if not assignments:
+            return
+        # Without primary keys from bulk_create(), there's nothing to insert
+        # the child rows against, so save them one by one instead.
+        if not connections[using].features.can_return_ids_from_bulk_insert:
+            for instance, barcode in assignments:
+                klass.objects.create(barcode=barcode, **{klass.instance_attr: instance})
+            return
+        # bulk_create() doesn't support multi-table inheritance, so create the
+        # parent rows first, then insert the child rows against their keys,
+        # using Django's internal `Manager._insert()` (as of Django 2.0).
+        with transaction.atomic(using=using):
+            parents = Identifier.objects.bulk_create([Identifier(barcode=barcode) for instance, barcode in assignments])
+            children = [klass(pk=parent.pk, barcode=barcode, **{klass.instance_attr: instance})
+                        for parent, (instance, barcode) in zip(parents, assignments)]
+            klass.objects._insert(children, fields=klass._meta.local_concrete_fields, using=using)
+
+    failed = assign_unique_keys(instances, lambda: generate_barcode(length),
+            find_existing, save, num_attempts=num_attempts)
+    for instance in failed:
+        logger.error("Could not generate unique identifier for %r after %d tries", instance, num_attempts)
+
+
 def generate_identifiers(queryset, length=6, num_attempts=10):
     """Generates identifiers for every instance in the given QuerySet."""
     klass = IDENTIFIER_CLASSES[queryset.model._meta.label]
-    attr = klass.instance_attr
-
-    for instance in queryset:
-        identifier = generate_identifier(length=length)
-        for i in range(num_attempts):
-            try:
-                klass.objects.create(identifier=identifier, **{attr: instance})
-            except IntegrityError:
-                logger.warning("Identifier was not unique, trying again (%d of %d)", i, num_attempts)
-                continue
-            else:
-                break
-        else:
-            logger.error("Could not generate unique identifier for %r after %d tries", instance, num_attempts)
+    bulk_create_identifiers(klass, queryset, length=length, num_attempts=num_attempts)
 
 
 def delete_identifiers(queryset):
@@ -62,30 +78,72 @@ def get_unexpired_checkins(tournament, window_preference_type):
     return events
 
 
-def create_identifiers(model_to_make, items_to_check):
-    kind = model_to_make.instance_attr
-    identifiers_to_make = items_to_check.filter(checkin_identifier__isnull=True)
+def process_checkins(tournament, content):
+    """Issues or revokes the check-ins for the barcodes in `content`, as sent
+    by the check-ins websocket. Returns a tuple `(return_content, error)`, where
+    `return_content` is the content to be broadcast to clients, or None if
+    there was an error, in which case `error` is the error message."""
+    barcode_ids = [b for b in content['barcodes'] if b is not None]
+    return_content = {'created': content['status'], 'checkins': [],
+                      'component_id': content['component_id']}
+
+    identifiers = Identifier.objects.in_bulk(barcode_ids, field_name='barcode')
+
+    # Only raise an error for single check-ins as for multi-check-in
+    # events via the status page its clear what has failed or not
+    if len(barcode_ids) == 1 and not identifiers:
+        return None, _("Sent checkin identifier doesn't exist")
+
+    if content['status'] is True:
+        # If checking-in people
+        events = [Event(identifier=identifiers[barcode], tournament=tournament)
+                  for barcode in barcode_ids if barcode in identifiers]
+        Event.objects.bulk_create(events)
+        return_content['checkins'] = [event.serialize() for event in events]
+    else:
+        # If undoing/revoking check-ins
+        if content['type'] == 'people':
+            window = 'checkin_window_people'
+        else:
+            window = 'checkin_window_venues'
 
-    for item in identifiers_to_make:
-        model_to_make.objects.create(**{kind: item})
+        checkins = get_unexpired_checkins(tournament, window)
+        checkins.filter(identifier__in=identifiers.values()).delete()
+        return_content['checkins'] = [{'identifier': barcode}
+                                      for barcode in barcode_ids if barcode in identifiers]
 
-    return
+    if len(return_content['checkins']) == 0 and content['status'] is not False:
+        return None, _("No checkin identifiers exist for sent barcodes")
 
+    return return_content, None
 
-def single_checkin(instance, events):
+
+def create_identifiers(model_to_make, items_to_check):
+    identifiers_to_make = items_to_check.filter(checkin_identifier__isnull=True)
+    bulk_create_identifiers(model_to_make, identifiers_to_make)
+
+
+def single_checkin(instance, events, identifiers=None):
+    """Annotates `instance` with its check-in status. `events` is a dict
+    mapping barcodes to check-in times. If `identifiers` is given, it should be
+    a dict mapping primary keys to Identifier instances, and is used instead of
+    `instance.checkin_identifier`."""
     instance.checked_icon = ''
     instance.checked_in = False
     try:
-        identifier = instance.checkin_identifier
+        if identifiers is not None:
+            identifier = identifiers[instance.pk]
+        else:
+            identifier = instance.checkin_identifier
         instance.barcode = identifier.barcode
         instance.checked_tooltip = _("Not checked-in (barcode %(barcode)s)") % {'barcode': identifier.barcode}
-    except ObjectDoesNotExist:
+    except (KeyError, ObjectDoesNotExist):
         identifier = None
         instance.barcode = None
         instance.checked_tooltip = _("Not checked-in; no barcode assigned")
 
     if identifier:
-        instance.time = next((e['time'] for e in events if e['identifier__barcode'] == identifier.barcode), None)
+        instance.time = events.get(identifier.barcode)
         if instance.time:
             instance.checked_in = True
             instance.checked_icon = 'check'
@@ -93,13 +151,13 @@ def single_checkin(instance, events):
     return instance
 
 
-def multi_checkin(team, events, t):
+def multi_checkin(team, events, t, identifiers=None):
     team.checked_icon = ''
     team.checked_in = False
     tooltips = []
 
     for speaker in team.speaker_set.all():
-        speaker = single_checkin(speaker, events)
+        speaker = single_checkin(speaker, events, identifiers)
         if speaker.checked_in:
             tooltip = _("%(speaker)s checked-in at %(time)s.") % {'speaker': speaker.name, 'time': speaker.time.strftime('%H:%M')}
         else:
@@ -120,13 +178,47 @@ def multi_checkin(team, events, t):
     return team
 
 
-def get_checkins(queryset, t, window_preference_type):
-    events = get_unexpired_checkins(t, window_preference_type).values(
-        'time', 'identifier__barcode')
+def get_checkins(queryset, t, window_preference_type, identifiers=None):
+    """Annotates each instance in `queryset` with its check-in status, using
+    the latest unexpired check-in for each barcode. Teams are checked in
+    according to their speakers.
+
+    If `identifiers` is given, it should be a dict mapping the primary keys of
+    the instances (or, for teams, of their speakers) to Identifier instances,
+    e.g. as returned by `get_identifiers()`. Otherwise, the instances'
+    `checkin_identifier` attributes are used, which should be prefetched."""
+    events = get_unexpired_checkins(t, window_preference_type).values_list(
+        'identifier__barcode', 'time')
+    events_by_barcode = dict(events)  # ordered by time, so the latest wins
+
     for instance in queryset:
         if hasattr(instance, 'use_institution_prefix'):
-            instance = multi_checkin(instance, events, t)
+            instance = multi_checkin(instance, events_by_barcode, t, identifiers)
         else:
-            instance = single_checkin(instance, events)
+            instance = single_checkin(instance, events_by_barcode, identifiers)
 
     return queryset
+
+
+def get_identifiers(identifier_class, instances):
+    """Returns a dict mapping the primary keys of `instances` to their
+    identifiers of class `identifier_class` (e.g. DebateIdentifier). Identifiers
+    already fetched with the instances (e.g. using `select_related()`) are used
+    as they are; the rest are fetched in a single query."""
+    attr = identifier_class.instance_attr
+    related = identifier_class._meta.get_field(attr).remote_field
+
+    result = {}
+    uncached = []
+    for instance in instances:
+        if related.is_cached(instance):
+            identifier = related.get_cached_value(instance)
+            if identifier is not None:
+                result[instance.pk] = identifier
+        else:
+            uncached.append(instance)
+
+    if uncached:
+        identifiers = identifier_class.objects.filter(**{attr + '__in': uncached})
+        result.update({getattr(identifier, attr + '_id'): identifier for identifier in identifiers})
+    return result
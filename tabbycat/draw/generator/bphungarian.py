@@ -6,7 +6,8 @@ from math import log2
 from statistics import pvariance
 
 from django.utils.translation import gettext as _
-import munkres
+
+from utils.assignment import DISALLOWED, get_assignment_solver
 
 from .common import BaseBPDrawGenerator, DrawUserError
 from .pairing import BPPairing
@@ -64,6 +65,14 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
             "hungarian_preshuffled" - Hungarian algorithm, with the rows and
                                       columns of the cost matrix permuted
                                       randomly beforehand.
+
+        "assignment_solver" - Implementation used to solve the assignment
+                              problem. Permitted values:
+
+            "munkres" - Pure-Python implementation in the munkres package.
+
+            "scipy"   - SciPy's linear_sum_assignment(), falling back to
+                        munkres if SciPy isn't installed.
     """
 
     requires_even_teams = True
@@ -75,13 +84,14 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
         "renyi_order"      : 1.0,
         "exponent"         : 4.0,
         "assignment_method": "hungarian_preshuffled",
+        "assignment_solver": "scipy",
     }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.check_teams_for_attribute("points")
         self.check_teams_for_attribute("side_history")
-        self.munkres = munkres.Munkres()
+        self.solver = get_assignment_solver(self.options["assignment_solver"])
 
     def generate(self):
         self._rooms = self.define_rooms([team.points for team in self.teams])
@@ -237,7 +247,7 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
             row = []
             for level, allowed in rooms:
                 if team.points not in allowed:
-                    row.extend([munkres.DISALLOWED] * 4)
+                    row.extend([DISALLOWED] * 4)
                 else:
                     row.extend([cost(pos, team.side_history) ** exponent for pos in range(4)])
             assert len(row) == nteams
@@ -259,7 +269,7 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
         """
         function = self.get_option_function("assignment_method", self.ASSIGNMENT_ALGORITHM_FUNCTIONS)
         start = time.perf_counter()
-        logger.info("Running assignment algorithm for %d teams...", len(costs))
+        logger.info("Running assignment algorithm (%s) for %d teams...", self.solver.name, len(costs))
         indices = function(costs)
         total_cost = sum(costs[i][j] for i, j in indices)
         elapsed = time.perf_counter() - start
@@ -267,14 +277,14 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
         return indices
 
     def _assign_hungarian(self, costs):
-        return self.munkres.compute(costs)
+        return self.solver.compute(costs)
 
     def _assign_hungarian_preshuffled(self, costs):
         n = len(costs)
         K = random.sample(range(n), n)             # noqa: N806
         J = random.sample(range(n), n)             # noqa: N806
         C = [[costs[i][j] for j in J] for i in K]  # noqa: N806
-        indices = self.munkres.compute(C)
+        indices = self.solver.compute(C)
         return [(K[i], J[j]) for i, j in indices]
 
     # Make pairings
@@ -0,0 +1,83 @@
+import random
+import time
+from itertools import cycle, islice
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from utils.management.base import RoundCommand
+
+from ...generator.pairing import BPPairing, Pairing
+from ...manager import BaseDrawManager
+from ...models import Debate, DebateTeam
+
+
+def legacy_make_debates(manager, pairings):
+    """The draw persistence used before debates were bulk-created, kept here for
+    comparison. It saves each debate and each debate team separately."""
+    random.shuffle(pairings)
+
+    for pairing in pairings:
+        debate = Debate(round=manager.round)
+        debate.division = pairing.division
+        debate.bracket = pairing.bracket
+        debate.room_rank = pairing.room_rank
+        debate.flags = ",".join(pairing.flags)
+        if (manager.round.tournament.pref('draw_side_allocations') == "manual-ballot" or
+                manager.round.is_break_round):
+            debate.sides_confirmed = False
+        debate.save()
+
+        for team, side in zip(pairing.teams, manager.round.tournament.sides):
+            DebateTeam.objects.create(debate=debate, team=team, side=side,
+                    flags=",".join(pairing.get_team_flags(team)))
+
+
+def bulk_make_debates(manager, pairings):
+    manager._make_debates(pairings)
+
+
+class Command(RoundCommand):
+
+    help = "Times saving draws of 50, 100 and 200 rooms to the database, with and without " \
+           "bulk inserts. Teams are reused to make up the numbers. Everything is rolled back " \
+           "afterwards, so the database isn't modified."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--rooms", type=int, nargs='+', default=[50, 100, 200],
+            help="Numbers of rooms to benchmark (default 50 100 200)")
+
+    def make_pairings(self, round, nrooms):
+        if round.tournament.pref('teams_in_debate') == 'bp':
+            pairing_class, nteams = BPPairing, 4
+        else:
+            pairing_class, nteams = Pairing, 2
+        teams = list(round.tournament.team_set.all())
+        if len(teams) < nteams:
+            return None
+        teams = list(islice(cycle(teams), nrooms * nteams))
+        return [pairing_class(teams[i*nteams:(i+1)*nteams], bracket=0, room_rank=i+1) for i in range(nrooms)]
+
+    def time_function(self, function, manager, pairings):
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                function(manager, pairings)
+                elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return elapsed, len(context.captured_queries)
+
+    def handle_round(self, round, **options):
+        manager = BaseDrawManager(round)
+        self.stdout.write("Draw creation in {:s}:".format(round.name))
+
+        for nrooms in options["rooms"]:
+            pairings = self.make_pairings(round, nrooms)
+            if pairings is None:
+                self.stdout.write("Tournament \"{:s}\" doesn't have enough teams, skipping".format(round.tournament.name))
+                return
+            for name, function in [("one at a time", legacy_make_debates), ("bulk", bulk_make_debates)]:
+                elapsed, nqueries = self.time_function(function, manager, list(pairings))
+                self.stdout.write("  {:4d} rooms, {:<15s} {:8.1f} ms, {:5d} queries".format(
+                        nrooms, name, elapsed * 1000, nqueries))
@@ -1,8 +1,12 @@
 import logging
 import random
+import time
 
+from django.db import transaction
 from django.utils.translation import gettext as _
 
+from adjallocation.utils import invalidate_histories_cache
+from participants.prefetch import populate_team_history
 from participants.utils import get_side_history
 from tournaments.models import Round
 from standings.teams import TeamStandingsGenerator
@@ -29,6 +33,7 @@ OPTIONS_TO_CONFIG_MAPPING = {
     "assignment_method"     : "draw_rules__bp_assignment_method",
     "renyi_order"           : "draw_rules__bp_renyi_order",
     "exponent"              : "draw_rules__bp_position_cost_exponent",
+    "assignment_solver"     : "draw_rules__assignment_solver",
 }
 
 
@@ -101,22 +106,37 @@ class BaseDrawManager:
                 team.allocated_side = tsas[team]
 
     def _make_debates(self, pairings):
+        """Saves the debates and debate teams for `pairings` to the database,
+        using one bulk insert for each (PostgreSQL returns the debates' IDs)."""
+        start = time.perf_counter()
         random.shuffle(pairings)  # to avoid IDs indicating room ranks
 
+        sides = self.round.tournament.sides
+        sides_confirmed = not (self.round.tournament.pref('draw_side_allocations') == "manual-ballot" or
+                               self.round.is_break_round)
+
+        debates = []
         for pairing in pairings:
             debate = Debate(round=self.round)
             debate.division = pairing.division
             debate.bracket = pairing.bracket
             debate.room_rank = pairing.room_rank
             debate.flags = ",".join(pairing.flags)  # comma-separated list
-            if (self.round.tournament.pref('draw_side_allocations') == "manual-ballot" or
-                    self.round.is_break_round):
-                debate.sides_confirmed = False
-            debate.save()
+            debate.sides_confirmed = sides_confirmed
+            debates.append(debate)
+
+        with transaction.atomic():
+            Debate.objects.bulk_create(debates)
+            DebateTeam.objects.bulk_create([
+                DebateTeam(debate=debate, team=team, side=side, flags=",".join(pairing.get_team_flags(team)))
+                for debate, pairing in zip(debates, pairings)
+                for team, side in zip(pairing.teams, sides)
+            ])
+
+        # bulk_create() doesn't send the signals that would normally do this
+        invalidate_histories_cache(self.round.tournament_id)
 
-            for team, side in zip(pairing.teams, self.round.tournament.sides):
-                DebateTeam.objects.create(debate=debate, team=team, side=side,
-                        flags=",".join(pairing.get_team_flags(team)))
+        logger.info("Saved %d debates in %.2f seconds", len(debates), time.perf_counter() - start)
 
     def delete(self):
         self.round.debate_set.all().delete()
@@ -140,6 +160,7 @@ class BaseDrawManager:
         rrseq = self.get_rrseq()
 
         self._populate_side_history(teams)
+        populate_team_history(teams, self.round.tournament, self.round.seq)
         if options.get("side_allocations") == "preallocated":
             self._populate_team_side_allocations(teams)
 
@@ -178,7 +199,7 @@ class PowerPairedDrawManager(BaseDrawManager):
                 "pullup_restriction", "side_allocations"
             ])
         elif self.teams_in_debate == 'bp':
-            options.extend(["pullup", "position_cost", "assignment_method", "renyi_order", "exponent"])
+            options.extend(["pullup", "position_cost", "assignment_method", "assignment_solver", "renyi_order", "exponent"])
         return options
 
     def get_teams(self):
@@ -188,7 +209,8 @@ class PowerPairedDrawManager(BaseDrawManager):
             annotate_npullups(teams, self.round.prev)
 
         metrics = self.round.tournament.pref('team_standings_precedence')
-        generator = TeamStandingsGenerator(metrics, ('rank', 'subrank'), tiebreak="random")
+        generator = TeamStandingsGenerator(metrics, ('rank', 'subrank'), tiebreak="random",
+                materialized=self.round.tournament.pref('team_standings_materialized'))
         standings = generator.generate(teams, round=self.round.prev)
 
         ranked = []
@@ -1,5 +1,7 @@
 import unittest
 
+from utils.assignment import DISALLOWED, get_assignment_solver, linear_sum_assignment, UnsolvableMatrix
+
 from ..generator.bphungarian import BPHungarianDrawGenerator
 from .utils import TestTeam
 
@@ -45,3 +47,33 @@ class TestDefineRooms(unittest.TestCase):
 
     def test_pullup_one_room(self):
         self._test_define_rooms("one_room", self.one_room)
+
+
+class TestAssignmentSolvers(unittest.TestCase):
+    """Checks that the assignment solvers agree on the optimal total cost."""
+
+    testdata = [
+        [[4, 1, 3], [2, 0, 5], [3, 2, 2]],
+        [[7, 2, 9, 4], [3, 8, 1, 6]],
+        [[DISALLOWED, 2, 3], [1, DISALLOWED, 4], [5, 6, DISALLOWED]],
+        [[DISALLOWED, 1000, 1], [DISALLOWED, 1, 1000], [0, DISALLOWED, DISALLOWED]],
+    ]
+
+    def total_cost(self, solver, costs):
+        return sum(costs[i][j] for i, j in solver.compute(costs))
+
+    @unittest.skipIf(linear_sum_assignment is None, "SciPy not installed")
+    def test_scipy_matches_munkres(self):
+        munkres_solver = get_assignment_solver("munkres")
+        scipy_solver = get_assignment_solver("scipy")
+        for i, costs in enumerate(self.testdata):
+            with self.subTest(case=i):
+                self.assertEqual(self.total_cost(scipy_solver, costs), self.total_cost(munkres_solver, costs))
+
+    @unittest.skipIf(linear_sum_assignment is None, "SciPy not installed")
+    def test_scipy_unsolvable(self):
+        costs = [[DISALLOWED, DISALLOWED], [1, 2]]
+        self.assertRaises(UnsolvableMatrix, get_assignment_solver("scipy").compute, costs)
+
+    def test_unknown_solver(self):
+        self.assertRaises(ValueError, get_assignment_solver, "nonexistent")
@@ -34,9 +34,10 @@ from tournaments.mixins import (CrossTournamentPageMixin, CurrentRoundMixin,
 from tournaments.models import Round
 from tournaments.views import BaseSaveDragAndDropDebateJsonView
 from tournaments.utils import get_side_name
-from utils.mixins import AdministratorMixin
+from utils.mixins import AdministratorMixin, ConditionalGetMixin
 from utils.views import BadJsonRequestError, PostOnlyRedirectView, VueTableTemplateView
 from utils.misc import reverse_round, reverse_tournament
+from utils.publiccache import invalidate_public_pages
 from utils.tables import TabbycatTableBuilder
 from venues.allocator import allocate_venues
 from venues.models import VenueCategory, VenueConstraint
@@ -120,7 +121,9 @@ class BasePublicDrawTableView(RoundMixin, VueTableTemplateView):
 # Viewing Draw (Public)
 # ==============================================================================
 
-class PublicDrawForRoundView(PublicTournamentPageMixin, BasePublicDrawTableView):
+class PublicDrawForRoundView(ConditionalGetMixin, PublicTournamentPageMixin, BasePublicDrawTableView):
+
+    round_data_versions = True
 
     def is_page_enabled(self, tournament):
         return tournament.pref('public_draw') == 'all-released'
@@ -301,7 +304,8 @@ class AdminDrawView(RoundMixin, AdministratorMixin, AdminDrawUtiltiesMixin, VueT
         side_histories_before = get_side_history(teams, self.tournament.sides, self.round.prev.seq)
         side_histories_now = get_side_history(teams, self.tournament.sides, self.round.seq)
         metrics = self.tournament.pref('team_standings_precedence')
-        generator = TeamStandingsGenerator(metrics[0:1], ())
+        generator = TeamStandingsGenerator(metrics[0:1], (),
+                materialized=self.tournament.pref('team_standings_materialized'))
         standings = generator.generate(teams, round=self.round.prev)
         draw_table = PositionBalanceReportDrawTableBuilder(view=self)
         draw_table.build(draw, teams, side_histories_before, side_histories_now, standings)
@@ -339,7 +343,8 @@ class AdminDrawView(RoundMixin, AdministratorMixin, AdminDrawUtiltiesMixin, VueT
             metrics = self.tournament.pref('team_standings_precedence')
             # subrank only makes sense if there's a second metric to rank on
             rankings = ('rank', 'subrank') if len(metrics) > 1 else ('rank',)
-            generator = TeamStandingsGenerator(metrics, rankings)
+            generator = TeamStandingsGenerator(metrics, rankings,
+                    materialized=self.tournament.pref('team_standings_materialized'))
             standings = generator.generate(teams, round=r.prev)
             if not r.is_break_round:
                 table.add_debate_ranking_columns(draw, standings)
@@ -451,7 +456,8 @@ class PositionBalanceReportView(RoundMixin, AdministratorMixin, VueTableTemplate
         side_histories_before = get_side_history(teams, self.tournament.sides, self.round.prev.seq)
         side_histories_now = get_side_history(teams, self.tournament.sides, self.round.seq)
         metrics = self.tournament.pref('team_standings_precedence')
-        generator = TeamStandingsGenerator(metrics[0:1], ())
+        generator = TeamStandingsGenerator(metrics[0:1], (),
+                materialized=self.tournament.pref('team_standings_materialized'))
         standings = generator.generate(teams, round=self.round.prev)
 
         summary_table = PositionBalanceReportSummaryTableBuilder(view=self,
@@ -577,6 +583,7 @@ class DrawReleaseView(DrawStatusEdit):
         self.round.draw_status = Round.STATUS_RELEASED
         self.round.save()
         self.log_action()
+        invalidate_public_pages(self.tournament, request, self.round)
 
         email_success_message = ""
         if self.tournament.pref('enable_adj_email'):
@@ -606,6 +613,7 @@ class DrawUnreleaseView(DrawStatusEdit):
         self.round.draw_status = Round.STATUS_CONFIRMED
         self.round.save()
         self.log_action()
+        invalidate_public_pages(self.tournament, request, self.round)
         messages.success(request, _("Unreleased the draw."))
         return super().post(request, *args, **kwargs)
 
@@ -10,6 +10,9 @@ from django.utils.translation import gettext as _
 from participants.models import Adjudicator, Institution, Speaker, Team
 from venues.models import Venue
 
+from .jobs import count_rows
+from .models import ImportJob
+
 logger = logging.getLogger(__name__)
 TEAM_SHORT_REFERENCE_LENGTH = Team._meta.get_field('short_reference').max_length
 
@@ -341,3 +344,41 @@ class AdjudicatorDetailsForm(SharedBetweenTournamentsObjectForm, BaseInstitution
         if commit and adj.institution:
             adj.adjudicatorinstitutionconflict_set.create(institution=adj.institution)
         return adj
+
+
+# ==============================================================================
+# Background import forms
+# ==============================================================================
+
+class ImportJobForm(forms.ModelForm):
+    """Form that takes an uploaded CSV file, in the format used by the
+    `importtournament` command, and creates a job to import it in the
+    background."""
+
+    file = forms.FileField(label=_("CSV file"))
+
+    class Meta:
+        model = ImportJob
+        fields = ('kind',)
+
+    def __init__(self, tournament, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tournament = tournament
+
+    def clean_file(self):
+        try:
+            data = self.cleaned_data['file'].read().decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ValidationError(_("The file must be encoded in UTF-8."))
+        if count_rows(data) == 0:
+            raise ValidationError(_("There were no rows to import."))
+        return data
+
+    def save(self, commit=True):
+        job = super().save(commit=False)
+        job.tournament = self.tournament
+        job.data = self.cleaned_data['file']
+        job.rows_total = count_rows(job.data)
+        if commit:
+            job.save()
+        return job
@@ -3,12 +3,17 @@
 import csv
 import re
 import logging
-from collections import Counter
+from collections import Counter, defaultdict
 from types import GeneratorType
 
-from django.core.exceptions import FieldError, MultipleObjectsReturned, ObjectDoesNotExist, ValidationError
+from django.core.exceptions import (FieldDoesNotExist, FieldError, MultipleObjectsReturned,
+                                    ObjectDoesNotExist, ValidationError)
+from django.db import connection, connections, router, transaction
+from django.db.models import Model
+from django.db.models.signals import post_save, pre_save
 
 NON_FIELD_ERRORS = '__all__'
+BULK_BATCH_SIZE = 500
 DUPLICATE_INFO = 19  # Logging level just below INFO
 logging.addLevelName(DUPLICATE_INFO, 'DUPLICATE_INFO')
 
@@ -160,6 +165,8 @@ class BaseTournamentDataImporter(object):
         if 'loglevel' in kwargs:
             self.logger.setLevel(kwargs['loglevel'])
         self.expect_unique = kwargs.get('expect_unique', True)
+        self.bulk = kwargs.get('bulk', False)
+        self.line_offset = kwargs.get('line_offset', 0)
         self.reset_counts()
 
     def reset_counts(self):
@@ -202,21 +209,68 @@ class BaseTournamentDataImporter(object):
         duplicate objects before saving any of the objects it creates. If
         `expect_unique` is False, it will just skip objects that would be
         duplicates and log a DUPLICATE_INFO message to say so.
+
+        Line numbers are offset by `self.line_offset`, so that a large file can
+        be imported in chunks while reporting line numbers in the whole file.
+
+        If `self.bulk` is True, existing objects are looked up with a single
+        query for the whole file, instances are validated in batch and they're
+        written using `bulk_create()` where possible. Errors are reported in the
+        same way, but not necessarily in line order.
         """
         if hasattr(csvfile, 'seek') and callable(csvfile.seek):
             csvfile.seek(0)
-        reader = csv.DictReader(csvfile)
-        kwargs_seen = list()
-        instances = dict()
         errors = TournamentDataImporterError()
         if expect_unique is None:
             expect_unique = self.expect_unique
-        skipped_because_existing = 0
+
+        rows = self._interpret_rows(csvfile, model, interpreter, errors, expect_unique)
+        if self.bulk:
+            instances, skipped_because_existing = self._build_instances_bulk(rows, model, errors, expect_unique)
+        else:
+            instances, skipped_because_existing = self._build_instances(rows, model, errors, expect_unique)
+
+        # Report errors, if any
+        if errors:
+            if self.strict:
+                for message in errors.itermessages():
+                    self.logger.error(message)
+                raise errors
+            else:
+                for message in errors.itermessages():
+                    self.logger.warning(message)
+                self.errors.update(errors)
+
+        # Create the instances
+        if self.bulk:
+            self._bulk_save(model, list(instances.values()))
+        else:
+            for inst in instances.values():
+                inst.save()
+        for lineno, inst in instances.items():
+            self.logger.debug("Made %s from line %s: %r", model._meta.verbose_name, lineno, inst)
+
+        self.logger.info("Imported %d %s", len(instances), model._meta.verbose_name_plural)
+        if skipped_because_existing:
+            self.logger.info("(skipped %d %s)", skipped_because_existing, model._meta.verbose_name_plural)
+
+        self.counts.update({model: len(instances)})
+
+        return instances
+
+    def _interpret_rows(self, csvfile, model, interpreter, errors, expect_unique):
+        """Reads `csvfile` and passes each line through `interpreter`, adding
+        any errors to `errors`. Yields a tuple `(key, lineno, kwargs,
+        description)` for each set of keyword arguments that isn't a duplicate
+        of one earlier in the file."""
+        reader = csv.DictReader(csvfile)
+        kwargs_seen = set()
+        unhashable_kwargs_seen = list()
         boolean_fields = [field.name for field in model._meta.get_fields()
                           if hasattr(field, 'get_internal_type') and
                           field.get_internal_type() == 'BooleanField']
 
-        for lineno, line in enumerate(reader, start=2):
+        for lineno, line in enumerate(reader, start=2 + self.line_offset):
 
             # Strip whitespace first
             for k in line:
@@ -242,7 +296,6 @@ class BaseTournamentDataImporter(object):
             else:
                 list_provided = True
 
-            # Create the instances
             for itemno, kwargs in enumerate(kwargs_list, start=1):
 
                 # Extra conversion for booleans (Django's BooleanField.to_python() is too restrictive)
@@ -259,84 +312,329 @@ class BaseTournamentDataImporter(object):
 
                 description = model.__name__ + "(" + ", ".join(["%s=%r" % args for args in kwargs.items()]) + ")"
 
-                # Check if it's a duplicate
-                kwargs_expect_unique = kwargs.copy()
-                if kwargs_expect_unique in kwargs_seen:
+                # Check if it's a duplicate, by hash if possible (unsaved
+                # instances, for example, aren't hashable)
+                try:
+                    kwargs_hash = frozenset(kwargs.items())
+                    duplicate = kwargs_hash in kwargs_seen
+                except TypeError:
+                    kwargs_hash = None
+                    duplicate = kwargs in unhashable_kwargs_seen
+
+                if duplicate:
                     if expect_unique:
                         message = "Duplicate " + description
                         errors.add(lineno, model, message)
                     else:
                         self.logger.log(DUPLICATE_INFO, "Skipping duplicate " + description)
                     continue
-                kwargs_seen.append(kwargs_expect_unique)
 
-                # Create (but don't save) an instance (or handle an error)
-                try:
-                    inst = model.objects.get(**kwargs)
-                except ObjectDoesNotExist as e:
-                    inst = model(**kwargs)  # normal case (create object)
-                except MultipleObjectsReturned as e:
-                    if expect_unique:
-                        errors.add(lineno, model, str(e))
-                    continue
-                except FieldError as e:
-                    match = re.match("Cannot resolve keyword '(\w+)' into field.", str(e))
-                    if match:
-                        message = "There's an unrecognized column header in this file: {}".format(match.group(1))
-                        self.logger.error(message)
-                        self.logger.error("I was trying to import %s at the time.", model._meta.verbose_name_plural)
-                        self.logger.error("The original error was: " + str(e))
-                        self.logger.error("If you're writing a new importer, it might be that you "
-                                "need to delete some columns from the dict in your interpreter.")
-                        self.logger.error("If using construct_interpreter(), you can do this with the DELETE argument.")
-                        raise TournamentDataImporterFatal(message)
-                    else:
-                        raise
-                except ValueError as e:
-                    errors.add(lineno, model, str(e))
-                    continue
-                except ValidationError as e:
-                    errors.update_with_validation_error(lineno, model, e)
-                    continue
+                if kwargs_hash is None:
+                    unhashable_kwargs_seen.append(kwargs.copy())
                 else:
-                    skipped_because_existing += 1
-                    if expect_unique:
-                        message = description + " already exists"
-                        errors.add(lineno, model, message)
-                    else:
-                        self.logger.log(DUPLICATE_INFO, "Skipping %s, already exists", description)
-                    continue
-
-                try:
-                    inst.full_clean()
-                except ValidationError as e:
-                    errors.update_with_validation_error(lineno, model, e)
-                    continue
+                    kwargs_seen.add(kwargs_hash)
 
                 key = (lineno, itemno) if list_provided else lineno
-                self.logger.debug("To create from line %s: %s", key, description)
-                instances[key] = inst
+                yield key, lineno, kwargs, description
+
+    def _build_instances(self, rows, model, errors, expect_unique):
+        """Creates (but doesn't save) an instance for each row yielded by
+        `_interpret_rows()`, checking and validating each one individually.
+        Returns a tuple `(instances, skipped)`, where `instances` is a dict
+        mapping keys to instances, and `skipped` is the number of rows skipped
+        because they already existed."""
+        instances = dict()
+        skipped_because_existing = 0
 
-        # Report errors, if any
-        if errors:
-            if self.strict:
-                for message in errors.itermessages():
-                    self.logger.error(message)
-                raise errors
+        for key, lineno, kwargs, description in rows:
+            inst, existed = self._build_instance(model, lineno, kwargs, description, errors, expect_unique)
+            if existed:
+                skipped_because_existing += 1
+            if inst is None:
+                continue
+
+            try:
+                inst.full_clean()
+            except ValidationError as e:
+                errors.update_with_validation_error(lineno, model, e)
+                continue
+
+            self.logger.debug("To create from line %s: %s", key, description)
+            instances[key] = inst
+
+        return instances, skipped_because_existing
+
+    def _build_instance(self, model, lineno, kwargs, description, errors, expect_unique, count=None):
+        """Returns a tuple `(inst, existed)`. `inst` is a new, unsaved instance
+        of `model` created from `kwargs`, or None if there was an error or if an
+        object matching `kwargs` already exists, in which case `existed` is
+        True. `count`, if provided, should be the number of objects matching
+        `kwargs` in the database; otherwise, the database is queried."""
+        try:
+            if count is None:
+                model.objects.get(**kwargs)
+            elif count == 0:
+                raise model.DoesNotExist
+            elif count > 1:
+                raise model.MultipleObjectsReturned("get() returned more than one %s -- it returned %d!" %
+                        (model._meta.object_name, count))
+        except ObjectDoesNotExist:
+            try:
+                return model(**kwargs), False  # normal case (create object)
+            except ValueError as e:
+                errors.add(lineno, model, str(e))
+                return None, False
+        except MultipleObjectsReturned as e:
+            if expect_unique:
+                errors.add(lineno, model, str(e))
+            return None, False
+        except FieldError as e:
+            match = re.match("Cannot resolve keyword '(\w+)' into field.", str(e))
+            if match:
+                message = "There's an unrecognized column header in this file: {}".format(match.group(1))
+                self.logger.error(message)
+                self.logger.error("I was trying to import %s at the time.", model._meta.verbose_name_plural)
+                self.logger.error("The original error was: " + str(e))
+                self.logger.error("If you're writing a new importer, it might be that you "
+                        "need to delete some columns from the dict in your interpreter.")
+                self.logger.error("If using construct_interpreter(), you can do this with the DELETE argument.")
+                raise TournamentDataImporterFatal(message)
             else:
-                for message in errors.itermessages():
-                    self.logger.warning(message)
-                self.errors.update(errors)
+                raise
+        except ValueError as e:
+            errors.add(lineno, model, str(e))
+            return None, False
+        except ValidationError as e:
+            errors.update_with_validation_error(lineno, model, e)
+            return None, False
+
+        if expect_unique:
+            message = description + " already exists"
+            errors.add(lineno, model, message)
+        else:
+            self.logger.log(DUPLICATE_INFO, "Skipping %s, already exists", description)
+        return None, True
+
+    def _build_instances_bulk(self, rows, model, errors, expect_unique):
+        """Like `_build_instances()`, but looks up existing objects using a
+        single query and validates the instances in batch."""
+        rows = list(rows)
+        counts = self._count_existing(model, [kwargs for key, lineno, kwargs, description in rows])
+        candidates = []
+        skipped_because_existing = 0
 
-        # Create the instances
-        for lineno, inst in instances.items():
-            inst.save()
-            self.logger.debug("Made %s from line %s: %r", model._meta.verbose_name, lineno, inst)
+        for (key, lineno, kwargs, description), count in zip(rows, counts):
+            inst, existed = self._build_instance(model, lineno, kwargs, description, errors, expect_unique, count)
+            if existed:
+                skipped_because_existing += 1
+            if inst is not None:
+                candidates.append((key, lineno, description, inst))
 
-        self.logger.info("Imported %d %s", len(instances), model._meta.verbose_name_plural)
-        if skipped_because_existing:
-            self.logger.info("(skipped %d %s)", skipped_because_existing, model._meta.verbose_name_plural)
+        instances = dict()
+        for key, lineno, description, inst in self._validate_bulk(model, candidates, errors):
+            self.logger.debug("To create from line %s: %s", key, description)
+            instances[key] = inst
+
+        return instances, skipped_because_existing
+
+    def _count_existing(self, model, kwargs_list):
+        """Returns a list with, for each dict in `kwargs_list`, the number of
+        objects of `model` that match it, using a single query. If a dict has
+        keys that aren't concrete fields of `model` (e.g. lookups across
+        relations), or values that can't be converted, its count is None and the
+        caller should query the database for it separately."""
+        fields = {}
+        for kwargs in kwargs_list:
+            for name in kwargs:
+                if name in fields:
+                    continue
+                try:
+                    field = model._meta.get_field(name)
+                except FieldDoesNotExist:
+                    field = None
+                if field is not None and (not field.concrete or field.many_to_many):
+                    field = None
+                fields[name] = field
+
+        attnames = sorted({field.attname for field in fields.values() if field is not None})
+        if not attnames:
+            return [None] * len(kwargs_list)
+
+        # Narrow down the query using values that are common to all lines,
+        # typically the tournament
+        common = {name: value for name, value in kwargs_list[0].items() if fields[name] is not None and
+                  all(name in kwargs and kwargs[name] == value for kwargs in kwargs_list)}
+        try:
+            existing = list(model.objects.filter(**common).values_list(*attnames))
+        except (ValidationError, ValueError, TypeError):
+            return [None] * len(kwargs_list)
+
+        indices = {}
+        counts = []
+        for kwargs in kwargs_list:
+            names = sorted(kwargs)
+            if any(fields[name] is None for name in names):
+                counts.append(None)
+                continue
+            try:
+                values = tuple(self._prep_lookup_value(fields[name], kwargs[name]) for name in names)
+            except (ValidationError, ValueError, TypeError):
+                counts.append(None)
+                continue
 
-        self.counts.update({model: len(instances)})
+            columns = tuple(attnames.index(fields[name].attname) for name in names)
+            if columns not in indices:
+                indices[columns] = Counter(tuple(row[i] for i in columns) for row in existing)
+            counts.append(indices[columns][values])
+
+        return counts
+
+    @staticmethod
+    def _prep_lookup_value(field, value):
+        """Converts `value` to the Python type in which values of `field` are
+        returned from the database."""
+        if value is None:
+            return None
+        if field.is_relation:
+            if isinstance(value, Model):
+                return getattr(value, field.target_field.attname)
+            return field.target_field.to_python(value)
+        return field.to_python(value)
+
+    def _validate_bulk(self, model, candidates, errors):
+        """Validates `candidates`, a list of `(key, lineno, description, inst)`
+        tuples, adding any errors to `errors`. This does what `full_clean()`
+        does, except that foreign keys and uniqueness are checked with one query
+        per field or unique constraint, rather than one per instance. Returns a
+        list of the candidates that are valid.
+
+        To do so, this relies on these Django internals (as of Django 2.0),
+        which `full_clean()` uses itself: `Model._get_unique_checks()`,
+        `Model._perform_date_checks()` and `Model.unique_error_message()`."""
+        fk_fields = [field for field in model._meta.concrete_fields if field.many_to_one or field.one_to_one]
+        error_dicts = []
+        fk_values = {field: set() for field in fk_fields}
+
+        for key, lineno, description, inst in candidates:
+            exclude = []
+            for field in fk_fields:
+                value = getattr(inst, field.attname)
+                if value is None:
+                    continue
+                try:
+                    value = field.to_python(value)
+                except ValidationError:
+                    continue  # leave it to clean_fields() to report
+                setattr(inst, field.attname, value)
+                fk_values[field].add(value)
+                exclude.append(field.name)
 
-        return instances
+            try:
+                inst.full_clean(exclude=exclude, validate_unique=False)
+            except ValidationError as e:
+                error_dicts.append(dict(e.error_dict))
+            else:
+                error_dicts.append({})
+
+        # Check that foreign keys exist (as ForeignKey.validate() does)
+        missing = {}
+        for field, values in fk_values.items():
+            if not values:
+                continue
+            remote_name = field.remote_field.field_name
+            queryset = field.remote_field.model._default_manager.filter(**{remote_name + '__in': values})
+            queryset = queryset.complex_filter(field.get_limit_choices_to())
+            missing[field] = values - set(queryset.values_list(remote_name, flat=True))
+
+        for (key, lineno, description, inst), error_dict in zip(candidates, error_dicts):
+            for field, values in missing.items():
+                value = getattr(inst, field.attname)
+                if value in values:
+                    error_dict.setdefault(field.name, []).append(ValidationError(
+                        field.error_messages['invalid'], code='invalid',
+                        params={'model': field.remote_field.model._meta.verbose_name, 'pk': value,
+                                'field': field.remote_field.field_name, 'value': value},
+                    ))
+
+        # Check uniqueness, both against the database and within this file
+        unique_lookups = defaultdict(list)
+        for index, ((key, lineno, description, inst), error_dict) in enumerate(zip(candidates, error_dicts)):
+            exclude = [name for name in error_dict if name != NON_FIELD_ERRORS]
+            unique_checks, date_checks = inst._get_unique_checks(exclude=exclude)
+            for model_class, unique_check in unique_checks:
+                attnames = tuple(model_class._meta.get_field(name).attname for name in unique_check)
+                values = tuple(getattr(inst, attname) for attname in attnames)
+                if any(value is None or (value == '' and connection.features.interprets_empty_strings_as_nulls)
+                       for value in values):
+                    continue
+                unique_lookups[(model_class, unique_check, attnames)].append((index, values))
+            if date_checks:
+                for name, messages in inst._perform_date_checks(date_checks).items():
+                    error_dict.setdefault(name, []).extend(messages)
+
+        for (model_class, unique_check, attnames), lookups in unique_lookups.items():
+            first_values = {values[0] for index, values in lookups}
+            taken = set(model_class._default_manager.filter(
+                    **{attnames[0] + '__in': first_values}).values_list(*attnames))
+            for index, values in lookups:
+                if values in taken:
+                    inst = candidates[index][3]
+                    name = unique_check[0] if len(unique_check) == 1 else NON_FIELD_ERRORS
+                    error_dicts[index].setdefault(name, []).append(inst.unique_error_message(model_class, unique_check))
+                taken.add(values)
+
+        valid = []
+        for (key, lineno, description, inst), error_dict in zip(candidates, error_dicts):
+            if error_dict:
+                errors.update_with_validation_error(lineno, model, ValidationError(error_dict))
+            else:
+                valid.append((key, lineno, description, inst))
+        return valid
+
+    def _bulk_save(self, model, instances):
+        """Saves `instances` using `bulk_create()`. Since `bulk_create()` doesn't
+        call `save()`, models that override `save()`, and databases that don't
+        return primary keys from bulk inserts, fall back to saving instances one
+        at a time, as do models with `pre_save` receivers. Models with a single
+        concrete parent (e.g. Speaker and Adjudicator, which inherit from Person)
+        have their parent rows created in bulk first, using Django's internal
+        `Manager._insert()` (as of Django 2.0) for the child rows.
+
+        `post_save` is then sent for each instance, as `save()` would have, so
+        that receivers (e.g. those that bump cache versions) still run."""
+        using = router.db_for_write(model)
+        parents = model._meta.get_parent_list()
+
+        if (model.save is not Model.save or len(parents) > 1 or pre_save.has_listeners(model) or
+                not connections[using].features.can_return_ids_from_bulk_insert):
+            for inst in instances:
+                inst.save()
+            return
+
+        with transaction.atomic(using=using):
+            if not parents:
+                model._base_manager.using(using).bulk_create(instances, batch_size=BULK_BATCH_SIZE)
+            else:
+                self._bulk_save_with_parent(model, parents[0], instances, using)
+
+            if post_save.has_listeners(model):
+                for inst in instances:
+                    post_save.send(sender=model, instance=inst, created=True, update_fields=None,
+                                   raw=False, using=using)
+
+    @staticmethod
+    def _bulk_save_with_parent(model, parent, instances, using):
+        parent_link = model._meta.get_ancestor_link(parent)
+        parent_instances = [parent(**{field.attname: getattr(inst, field.attname)
+                            for field in parent._meta.concrete_fields}) for inst in instances]
+        parent._base_manager.using(using).bulk_create(parent_instances, batch_size=BULK_BATCH_SIZE)
+
+        for inst, parent_inst in zip(instances, parent_instances):
+            setattr(inst, parent._meta.pk.attname, parent_inst.pk)
+            setattr(inst, parent_link.attname, parent_inst.pk)
+        for i in range(0, len(instances), BULK_BATCH_SIZE):
+            model._base_manager._insert(instances[i:i+BULK_BATCH_SIZE],
+                    fields=model._meta.local_concrete_fields, using=using)
+        for inst in instances:
+            inst._state.adding = False
+            inst._state.db = using
@@ -0,0 +1,122 @@
+"""Runs import jobs in the background, in chunks.
+
+Import jobs are created by the web importer and run by the `importworker`
+management command. Each job's CSV data is read a chunk of rows at a time, and
+each chunk is imported in its own transaction, together with an update to the
+job's progress. So if the worker is stopped partway through an import, the
+job can be resumed from the first chunk that wasn't committed.
+
+A worker claims a job by marking it as running and updating its heartbeat
+after each chunk. Jobs that are marked as running but whose heartbeat is older
+than `STALE_AFTER` are assumed to have been abandoned, and are claimed again."""
+
+import csv
+import io
+import logging
+from collections import Counter
+from datetime import timedelta
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .importers import TournamentDataImporterError, TournamentDataImporterFatal
+from .importers.anorak import AnorakTournamentDataImporter
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 200
+STALE_AFTER = timedelta(minutes=2)
+
+
+def count_rows(data):
+    """Returns the number of rows in `data`, not counting the header row."""
+    return max(sum(1 for row in csv.reader(io.StringIO(data))) - 1, 0)
+
+
+def iter_chunks(data, start=0, size=None):
+    """Reads the CSV `data` lazily and yields a tuple `(offset, nrows, f)` for
+    each chunk of up to `size` rows, skipping the first `start` rows. `f` is
+    a file-like object with the header row followed by the rows in the chunk,
+    and `offset` is the number of rows before it."""
+    size = size or CHUNK_SIZE
+    reader = csv.reader(io.StringIO(data))
+    header = next(reader, None)
+    if header is None:
+        return
+
+    offset = start
+    rows = islice(reader, start, None)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            break
+        f = io.StringIO()
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(chunk)
+        f.seek(0)
+        yield offset, len(chunk), f
+        offset += len(chunk)
+
+
+def claim_import_job():
+    """Marks the next job waiting to be run (or resumed) as running, and
+    returns it. Returns None if there are no such jobs."""
+    stale = timezone.now() - STALE_AFTER
+    with transaction.atomic():
+        job = ImportJob.objects.select_for_update(skip_locked=True).filter(
+            Q(status=ImportJob.STATUS_PENDING) |
+            Q(status=ImportJob.STATUS_RUNNING, heartbeat__lt=stale) |
+            Q(status=ImportJob.STATUS_RUNNING, heartbeat__isnull=True)
+        ).first()
+        if job is None:
+            return None
+        if job.status == ImportJob.STATUS_RUNNING:
+            logger.warning("Resuming import job %d from row %d", job.id, job.rows_done)
+        job.status = ImportJob.STATUS_RUNNING
+        job.heartbeat = timezone.now()
+        job.save(update_fields=['status', 'heartbeat'])
+    return job
+
+
+def run_import_job(job):
+    """Imports the rows of `job` that haven't already been imported, committing
+    after each chunk. Errors in individual rows are recorded on the job and
+    those rows are skipped; errors that stop the import mark the job as
+    failed."""
+    importer = AnorakTournamentDataImporter(job.tournament, strict=False, bulk=True)
+    import_function = getattr(importer, 'import_' + job.kind)
+
+    try:
+        for offset, nrows, f in iter_chunks(job.data, start=job.rows_done):
+            importer.reset_counts()
+            importer.line_offset = offset
+            with transaction.atomic():
+                import_function(f)
+
+                counts = Counter(job.counts)
+                counts.update({str(model._meta.verbose_name_plural): count
+                               for model, count in importer.counts.items() if count})
+                job.counts = dict(counts)
+                job.errors += "".join(message + "\n" for message in importer.errors.itermessages())
+                job.rows_done = offset + nrows
+                job.heartbeat = timezone.now()
+                job.save()
+
+            logger.info("Import job %d: imported %d of %d rows", job.id, job.rows_done, job.rows_total)
+
+    except (TournamentDataImporterFatal, TournamentDataImporterError) as e:
+        logger.error("Import job %d failed: %s", job.id, e)
+        job.errors += str(e) + "\n"
+        job.status = ImportJob.STATUS_FAILED
+    except Exception:
+        logger.exception("Import job %d failed", job.id)
+        job.errors += "Unexpected error, see server logs for details\n"
+        job.status = ImportJob.STATUS_FAILED
+    else:
+        job.status = ImportJob.STATUS_DONE
+
+    job.save()
@@ -31,6 +31,8 @@ class Command(BaseCommand):
                             help='Keep existing tournament and data, skipping lines if they are duplicates.')
         parser.add_argument('--relaxed', action='store_false', dest='strict', default=True,
                             help='Don\'t crash if there is an error, just skip and keep going.')
+        parser.add_argument('--bulk', action='store_true', default=False,
+                            help='Look up, validate and create objects in bulk, which is faster for large tournaments.')
 
         # Cleaning shared objects
         parser.add_argument('--clean-shared', action='store_true', default=False,
@@ -62,7 +64,8 @@ class Command(BaseCommand):
 
         importer_class = self.get_importer_class()
         self.importer = importer_class(
-            self.t, loglevel=loglevel, strict=options['strict'], expect_unique=not options['keep_existing'])
+            self.t, loglevel=loglevel, strict=options['strict'], expect_unique=not options['keep_existing'],
+            bulk=options['bulk'])
 
         # Importer classes specify what they import, and in what order
         for item in self.importer.order:
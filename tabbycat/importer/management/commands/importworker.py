@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...jobs import claim_import_job, run_import_job
+
+
+class Command(BaseCommand):
+    help = "Runs import jobs created by the web importer, resuming any that were interrupted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=2,
+            help="Seconds to wait before checking again when there are no jobs (default 2)")
+        parser.add_argument('--once', action='store_true', default=False,
+            help="Exit when there are no more jobs, rather than waiting for new ones")
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_import_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            self.stdout.write("Running import job {:d}: {:s}".format(job.id, str(job)))
+            run_import_job(job)
+            self.stdout.write("Finished import job {:d} ({:d} of {:d} rows, status {:s})".format(
+                job.id, job.rows_done, job.rows_total, job.get_status_display()))
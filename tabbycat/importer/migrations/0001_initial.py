@@ -0,0 +1,38 @@
+# Generated by Django 2.0.8 on 2026-10-17 12:00
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('tournaments', '0002_remove_tournament_welcome_msg'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('institutions', 'institutions'), ('venues', 'venues'), ('teams', 'teams'), ('speakers', 'speakers'), ('adjudicators', 'adjudicators')], max_length=20, verbose_name='kind')),
+                ('data', models.TextField(verbose_name='data')),
+                ('status', models.CharField(choices=[('P', 'pending'), ('R', 'running'), ('D', 'done'), ('F', 'failed')], default='P', max_length=1, verbose_name='status')),
+                ('rows_total', models.PositiveIntegerField(default=0, verbose_name='rows total')),
+                ('rows_done', models.PositiveIntegerField(default=0, help_text='Number of rows imported so far; an interrupted import resumes after these', verbose_name='rows done')),
+                ('counts', django.contrib.postgres.fields.jsonb.JSONField(blank=True, default=dict, help_text='Number of objects created so far, by model', verbose_name='counts')),
+                ('errors', models.TextField(blank=True, verbose_name='errors')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='created')),
+                ('heartbeat', models.DateTimeField(blank=True, help_text='When the worker running this import last reported progress', null=True, verbose_name='heartbeat')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournaments.Tournament', verbose_name='tournament')),
+            ],
+            options={
+                'verbose_name': 'import job',
+                'verbose_name_plural': 'import jobs',
+                'ordering': ['created'],
+            },
+        ),
+    ]
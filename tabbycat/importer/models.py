@@ -0,0 +1,84 @@
+from django.contrib.postgres.fields import JSONField
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class ImportJob(models.Model):
+    """A CSV file to be imported in the background by the import worker. The
+    file is imported in chunks, and progress is saved after each chunk, so that
+    an interrupted import can be resumed where it left off."""
+
+    KIND_INSTITUTIONS = 'institutions'
+    KIND_VENUES = 'venues'
+    KIND_TEAMS = 'teams'
+    KIND_SPEAKERS = 'speakers'
+    KIND_ADJUDICATORS = 'adjudicators'
+    KIND_CHOICES = (
+        (KIND_INSTITUTIONS, _("institutions")),
+        (KIND_VENUES, _("venues")),
+        (KIND_TEAMS, _("teams")),
+        (KIND_SPEAKERS, _("speakers")),
+        (KIND_ADJUDICATORS, _("adjudicators")),
+    )
+
+    STATUS_PENDING = 'P'
+    STATUS_RUNNING = 'R'
+    STATUS_DONE = 'D'
+    STATUS_FAILED = 'F'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _("pending")),
+        (STATUS_RUNNING, _("running")),
+        (STATUS_DONE, _("done")),
+        (STATUS_FAILED, _("failed")),
+    )
+
+    tournament = models.ForeignKey('tournaments.Tournament', models.CASCADE,
+        verbose_name=_("tournament"))
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES,
+        verbose_name=_("kind"))
+    data = models.TextField(
+        verbose_name=_("data"))
+    status = models.CharField(max_length=1, choices=STATUS_CHOICES, default=STATUS_PENDING,
+        verbose_name=_("status"))
+
+    rows_total = models.PositiveIntegerField(default=0,
+        verbose_name=_("rows total"))
+    rows_done = models.PositiveIntegerField(default=0,
+        verbose_name=_("rows done"),
+        help_text=_("Number of rows imported so far; an interrupted import resumes after these"))
+    counts = JSONField(default=dict, blank=True,
+        verbose_name=_("counts"),
+        help_text=_("Number of objects created so far, by model"))
+    errors = models.TextField(blank=True,
+        verbose_name=_("errors"))
+
+    created = models.DateTimeField(auto_now_add=True,
+        verbose_name=_("created"))
+    heartbeat = models.DateTimeField(blank=True, null=True,
+        verbose_name=_("heartbeat"),
+        help_text=_("When the worker running this import last reported progress"))
+
+    class Meta:
+        verbose_name = _("import job")
+        verbose_name_plural = _("import jobs")
+        ordering = ['created']
+
+    def __str__(self):
+        return "[%s] %s (%s)" % (self.tournament.slug, self.get_kind_display(), self.get_status_display())
+
+    @property
+    def finished(self):
+        return self.status in [self.STATUS_DONE, self.STATUS_FAILED]
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'status_display': self.get_status_display(),
+            'finished': self.finished,
+            'rows_total': self.rows_total,
+            'rows_done': self.rows_done,
+            'counts': self.counts,
+            'errors': self.errors.splitlines(),
+        }
@@ -2,9 +2,11 @@
 
 import logging
 import os.path
+from unittest.mock import Mock
 
 from settings import BASE_DIR
 
+from django.db.models.signals import post_save
 from django.test import TestCase
 
 import adjallocation.models as am
@@ -183,3 +185,21 @@ class TestImporterAnorak(TestCase):
         self.assertEqual(len(self.importer.errors), 6)
         self.assertEqual(len(logscm.records), 6)
         self.importer.strict = True
+
+
+class TestImporterAnorakBulk(TestImporterAnorak):
+    """Runs the same tests with the importer in bulk mode."""
+
+    def setUp(self):
+        super().setUp()
+        self.importer.bulk = True
+
+    def test_post_save_sent(self):
+        receiver = Mock()
+        post_save.connect(receiver, sender=pm.Speaker, weak=False)
+        try:
+            self.test_speakers()
+        finally:
+            post_save.disconnect(receiver, sender=pm.Speaker)
+        self.assertEqual(receiver.call_count, 72)
+        self.assertTrue(all(call[1]['created'] for call in receiver.call_args_list))
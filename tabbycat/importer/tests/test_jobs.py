@@ -0,0 +1,57 @@
+"""Unit tests for background import jobs."""
+
+from unittest.mock import patch
+
+from django.test import TestCase
+
+import participants.models as pm
+import tournaments.models as tm
+
+from ..jobs import claim_import_job, count_rows, iter_chunks, run_import_job
+from ..models import ImportJob
+
+INSTITUTIONS_DATA = "code,name\n" + "".join("I{0:d},Institution {0:d}\n".format(i) for i in range(1, 12))
+
+
+class TestImportJobs(TestCase):
+
+    def setUp(self):
+        self.t = tm.Tournament.objects.create(slug="import-job-test")
+
+    def create_job(self, data=INSTITUTIONS_DATA, **kwargs):
+        return ImportJob.objects.create(tournament=self.t, kind=ImportJob.KIND_INSTITUTIONS,
+                data=data, rows_total=count_rows(data), **kwargs)
+
+    def test_iter_chunks(self):
+        chunks = list(iter_chunks(INSTITUTIONS_DATA, start=2, size=4))
+        self.assertEqual([(offset, nrows) for offset, nrows, f in chunks], [(2, 4), (6, 4), (10, 1)])
+        lines = chunks[0][2].read().splitlines()
+        self.assertEqual(lines, ["code,name", "I3,Institution 3", "I4,Institution 4",
+                                 "I5,Institution 5", "I6,Institution 6"])
+
+    @patch('importer.jobs.CHUNK_SIZE', 4)
+    def test_run_import_job(self):
+        job = self.create_job()
+        self.assertEqual(claim_import_job(), job)
+        run_import_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.STATUS_DONE)
+        self.assertEqual(job.rows_done, 11)
+        self.assertEqual(job.counts, {"institutions": 11})
+        self.assertEqual(job.errors, "")
+        self.assertIsNone(claim_import_job())
+
+    def test_resume_import_job(self):
+        job = self.create_job(status=ImportJob.STATUS_RUNNING, rows_done=5)
+        self.assertEqual(claim_import_job(), job)  # no heartbeat, so abandoned
+        run_import_job(job)
+        self.assertEqual(job.rows_done, 11)
+        self.assertCountEqual(pm.Institution.objects.values_list('code', flat=True),
+                ["I%d" % i for i in range(6, 12)])
+
+    def test_errors_recorded(self):
+        job = self.create_job(data=INSTITUTIONS_DATA + "I1,Institution 1\n")
+        run_import_job(job)
+        self.assertEqual(job.status, ImportJob.STATUS_DONE)
+        self.assertEqual(job.counts, {"institutions": 11})
+        self.assertIn("line 13", job.errors)
@@ -20,4 +20,14 @@ urlpatterns = [
         views.ImportVenuesWizardView.as_view(),
         name='importer-simple-venues'),
 
+    path('jobs/new/',
+        views.ImportJobCreateView.as_view(),
+        name='importer-job-create'),
+    path('jobs/<int:pk>/',
+        views.ImportJobStatusView.as_view(),
+        name='importer-job-status'),
+    path('jobs/<int:pk>/progress/',
+        views.ImportJobProgressView.as_view(),
+        name='importer-job-progress'),
+
 ]
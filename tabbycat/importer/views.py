@@ -4,10 +4,10 @@ from django.contrib import messages
 from django.core import management
 from django.forms import modelformset_factory
 from django.http import HttpResponseRedirect
-from django.shortcuts import redirect
+from django.shortcuts import get_object_or_404, redirect
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext as _, ngettext
-from django.views.generic import TemplateView
+from django.views.generic import FormView, TemplateView
 
 from formtools.wizard.views import SessionWizardView
 
@@ -17,16 +17,17 @@ from participants.emoji import set_emoji
 from participants.models import Adjudicator, Institution, Team
 from tournaments.models import Tournament
 from tournaments.mixins import TournamentMixin
-from utils.misc import redirect_tournament
+from utils.misc import redirect_tournament, reverse_tournament
 from utils.mixins import AdministratorMixin
-from utils.views import PostOnlyRedirectView
+from utils.views import JsonDataResponseView, PostOnlyRedirectView
 from venues.models import Venue
 
 from .management.commands import importtournament
 from .importers import TournamentDataImporterError
-from .forms import (AdjudicatorDetailsForm, ImportInstitutionsRawForm,
+from .forms import (AdjudicatorDetailsForm, ImportInstitutionsRawForm, ImportJobForm,
                     ImportVenuesRawForm, NumberForEachInstitutionForm,
                     TeamDetailsForm, TeamDetailsFormSet, VenueDetailsForm)
+from .models import ImportJob
 
 logger = logging.getLogger(__name__)
 
@@ -206,6 +207,51 @@ class ImportAdjudicatorsWizardView(BaseImportByInstitutionWizardView):
         return ngettext("Added %(count)d adjudicator.", "Added %(count)d adjudicators.", count)
 
 
+class ImportJobCreateView(AdministratorMixin, TournamentMixin, FormView):
+    """Accepts a CSV file and creates a job to import it in the background,
+    so that large files don't have to be imported within the request."""
+
+    template_name = 'import_job_form.html'
+    form_class = ImportJobForm
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['tournament'] = self.tournament
+        return kwargs
+
+    def form_valid(self, form):
+        self.job = form.save()
+        messages.success(self.request, ngettext(
+            "Queued %(count)d row for import.",
+            "Queued %(count)d rows for import.",
+            self.job.rows_total) % {'count': self.job.rows_total})
+        return super().form_valid(form)
+
+    def get_success_url(self):
+        return reverse_tournament('importer-job-status', self.tournament, kwargs={'pk': self.job.pk})
+
+
+class ImportJobMixin(AdministratorMixin, TournamentMixin):
+
+    def get_job(self):
+        return get_object_or_404(ImportJob, tournament=self.tournament, pk=self.kwargs['pk'])
+
+
+class ImportJobStatusView(ImportJobMixin, TemplateView):
+    template_name = 'import_job_status.html'
+
+    def get_context_data(self, **kwargs):
+        kwargs['job'] = self.get_job()
+        return super().get_context_data(**kwargs)
+
+
+class ImportJobProgressView(ImportJobMixin, JsonDataResponseView):
+    """Returns the progress of an import job, for the status page to poll."""
+
+    def get_data(self):
+        return self.get_job().serialize()
+
+
 class LoadDemoView(AdministratorMixin, PostOnlyRedirectView):
 
     def post(self, request, *args, **kwargs):
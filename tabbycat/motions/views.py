@@ -11,7 +11,8 @@ from actionlog.models import ActionLogEntry
 from tournaments.mixins import (CurrentRoundMixin, OptionalAssistantTournamentPageMixin,
                                 PublicTournamentPageMixin, RoundMixin, TournamentMixin)
 from utils.misc import redirect_round
-from utils.mixins import AdministratorMixin
+from utils.mixins import AdministratorMixin, ConditionalGetMixin
+from utils.publiccache import invalidate_public_pages
 from utils.views import ModelFormSetView, PostOnlyRedirectView
 
 from .models import Motion
@@ -19,7 +20,7 @@ from .forms import ModelAssignForm
 from .statistics import MotionStatistics
 
 
-class PublicMotionsView(PublicTournamentPageMixin, TemplateView):
+class PublicMotionsView(ConditionalGetMixin, PublicTournamentPageMixin, TemplateView):
     public_page_preference = 'public_motions'
 
     def using_division_motions(self):
@@ -138,6 +139,7 @@ class BaseReleaseMotionsView(AdministratorMixin, LogActionMixin, RoundMixin, Pos
         round.motions_released = self.motions_released
         round.save()
         self.log_action()
+        invalidate_public_pages(self.tournament, request, round)
         messages.success(request, self.message_text)
         return super().post(request, *args, **kwargs)
 
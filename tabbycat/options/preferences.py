@@ -302,6 +302,21 @@ class BPAssignmentMethod(ChoicePreference):
     default = 'hungarian_preshuffled'
 
 
+@tournament_preferences_registry.register
+class AssignmentSolver(ChoicePreference):
+    help_text = _("Which implementation to use to solve the assignment problems in BP power-paired "
+                  "draws and automatic adjudicator allocation. SciPy is much faster for large "
+                  "tournaments; if it isn't installed, Munkres is used instead.")
+    verbose_name = _("Assignment problem solver")
+    section = draw_rules
+    name = 'assignment_solver'
+    choices = (
+        ('munkres', _("Munkres (pure Python)")),
+        ('scipy', _("SciPy")),
+    )
+    default = 'scipy'
+
+
 @tournament_preferences_registry.register
 class SkipAdjCheckins(BooleanPreference):
     help_text = _("Automatically make all adjudicators available for all rounds")
@@ -549,6 +564,16 @@ class TeamStandingsExtraMetrics(MultiValueChoicePreference):
     default = []
 
 
+@tournament_preferences_registry.register
+class TeamStandingsMaterialized(BooleanPreference):
+    help_text = _("Compute team standings from a precomputed table of team results, updated when ballots are saved. "
+                  "If turning this on after results have been entered, run the rebuildteammetrics command first.")
+    verbose_name = _("Use precomputed team results for standings")
+    section = standings
+    name = 'team_standings_materialized'
+    default = False
+
+
 @tournament_preferences_registry.register
 class SpeakerStandingsPrecedence(MultiValueChoicePreference):
     help_text = _("Metrics to use to rank speakers (see documentation for further details)")
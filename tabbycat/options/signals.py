@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from utils.objectcache import bump_version, preferences_version_key
+
+from .models import TournamentPreferenceModel
+
+
+@receiver(post_delete, sender=TournamentPreferenceModel)
+@receiver(post_save, sender=TournamentPreferenceModel)
+def update_preferences_snapshot(sender, instance, **kwargs):
+    bump_version(preferences_version_key(instance.instance_id))
@@ -2,7 +2,6 @@ import logging
 from warnings import warn
 
 from django.contrib.contenttypes.fields import GenericRelation
-from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.db.models import Sum
@@ -10,6 +9,7 @@ from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 from utils.managers import LookupByNameFieldsMixin
+from utils.objectcache import get_cached_object, team_version_key
 
 from .emoji import EMOJI_FIELD_CHOICES
 
@@ -299,6 +299,10 @@ class Team(models.Model):
         return self.speaker_set.all()
 
     def seen(self, other, before_round=None):
+        # If populated by participants.prefetch.populate_team_history(), as
+        # draw managers do, the index already covers the relevant rounds
+        if before_round is None and hasattr(self, '_seen_counts'):
+            return self._seen_counts[min(self.id, other.id), max(self.id, other.id)]
         queryset = self.debateteam_set.filter(debate__debateteam__team=other)
         if before_round:
             queryset = queryset.filter(debate__round__seq__lt=before_round)
@@ -319,14 +323,11 @@ class Team(models.Model):
             return None
 
     def get_cached_institution(self):
+        if self._meta.get_field('institution').is_cached(self):
+            return self.institution  # e.g. from select_related()
         cached_key = "%s_%s_%s" % ('teamid', self.id, '_institution__object')
-        cached_value = cache.get(cached_key)
-        if cached_value:
-            return cache.get(cached_key)
-        else:
-            cached_value = self.institution
-            cache.set(cached_key, cached_value, None)
-            return cached_value
+        # There are too many teams for the local cache, so only use the shared one
+        return get_cached_object(cached_key, team_version_key(self.id), lambda: self.institution, local=False)
 
     def clean(self):
         # Require reference and short_reference if use_institution_prefix is False
@@ -1,7 +1,11 @@
+from collections import Counter
+from itertools import combinations
+
 from django.db.models import Avg, Case, Count, Sum, When
 
 from adjallocation.models import DebateAdjudicator
 from adjfeedback.models import AdjudicatorFeedback
+from draw.models import DebateTeam
 from participants.models import Adjudicator, Team
 
 
@@ -54,3 +58,27 @@ def populate_feedback_scores(adjudicators):
     for adj in adjudicators:
         if not hasattr(adj, '_feedback_score_cache'):
             adj._feedback_score_cache = None
+
+
+def populate_team_history(teams, tournament, before_seq=None):
+    """Populates the `_seen_counts` attribute of the teams in `teams` with an
+    index mapping `(team_id, other_team_id)` pairs (smaller ID first) to the
+    number of times the teams have faced each other in `tournament`, in rounds
+    before the round with sequence number `before_seq` if given. All teams
+    share the same index, so that `Team.seen()` doesn't need a query.
+    Operates in-place."""
+
+    debateteams = DebateTeam.objects.filter(debate__round__tournament=tournament)
+    if before_seq is not None:
+        debateteams = debateteams.filter(debate__round__seq__lt=before_seq)
+
+    teams_by_debate = {}
+    for debate_id, team_id in debateteams.values_list('debate_id', 'team_id'):
+        teams_by_debate.setdefault(debate_id, []).append(team_id)
+
+    seen_counts = Counter()
+    for team_ids in teams_by_debate.values():
+        seen_counts.update(combinations(sorted(team_ids), 2))
+
+    for team in teams:
+        team._seen_counts = seen_counts
@@ -1,8 +1,8 @@
-from django.core.cache import cache
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 from participants.models import Institution, Team
+from utils.objectcache import bump_version, team_version_key
 
 import logging
 logger = logging.getLogger(__name__)
@@ -19,7 +19,4 @@ def update_team_names_from_institution(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=Team)
 def update_team_cache(sender, instance, created, **kwargs):
-    cached_key = "%s_%s_%s" % ('teamid', instance.id, '_institution__object')
-    cache.delete(cached_key)
-    cached_key = "%s_%s_%s" % ('teamid', instance.id, '_speaker__objects')
-    cache.delete(cached_key)
+    bump_version(team_version_key(instance.id))
@@ -0,0 +1,34 @@
+from itertools import permutations
+
+from draw.models import Debate, DebateTeam
+from tournaments.models import Round
+from utils.tests import BaseDebateTestCase
+
+from ..models import Team
+from ..prefetch import populate_team_history
+
+
+class TestPopulateTeamHistory(BaseDebateTestCase):
+
+    def setUp(self):
+        super().setUp()
+        teams = list(Team.objects.filter(tournament=self.t).order_by('id'))
+        for seq in range(1, 4):
+            rd = Round.objects.create(tournament=self.t, seq=seq, abbreviation="R%d" % seq)
+            offset = seq % len(teams)
+            rotated = teams[offset:] + teams[:offset]
+            for aff, neg in zip(rotated[0::2], rotated[1::2]):
+                debate = Debate.objects.create(round=rd)
+                DebateTeam.objects.create(debate=debate, team=aff, side=DebateTeam.SIDE_AFF)
+                DebateTeam.objects.create(debate=debate, team=neg, side=DebateTeam.SIDE_NEG)
+
+    def test_matches_seen(self):
+        teams = list(Team.objects.filter(tournament=self.t))
+        expected = {(a.id, b.id): a.seen(b, before_round=3) for a, b in permutations(teams, 2)}
+
+        populate_team_history(teams, self.t, before_seq=3)
+        with self.assertNumQueries(0):
+            actual = {(a.id, b.id): a.seen(b) for a, b in permutations(teams, 2)}
+
+        self.assertEqual(expected, actual)
+        self.assertTrue(any(actual.values()))
@@ -4,11 +4,11 @@ import string
 from smtplib import SMTPException
 
 from django.core.mail import get_connection
-from django.db import IntegrityError
+from django.db.models import Case, SlugField, Value, When
 
 from notifications.models import SentMessageRecord
 from notifications.utils import TournamentEmailMessage
-from utils.misc import reverse_tournament
+from utils.misc import assign_unique_keys, reverse_tournament
 
 
 logger = logging.getLogger(__name__)
@@ -21,19 +21,28 @@ def generate_url_key(length=8):
 
 
 def populate_url_keys(queryset, length=8, num_attempts=10):
-    """Populates the URL key field for every instance in the given QuerySet."""
-    for instance in queryset:
-        for i in range(num_attempts):
-            instance.url_key = generate_url_key(length)
-            try:
-                instance.save()
-            except IntegrityError:
-                logger.warning("URL key was not unique, trying again (%d of %d)", i, num_attempts)
-                continue
-            else:
-                break
-        else:
-            logger.error("Could not generate unique URL for %r after %d tries", instance, num_attempts)
+    """Populates the URL key field for every instance in the given QuerySet.
+    Keys are generated in memory, checked for collisions with a single query
+    per attempt and written with a single update, so that only keys that
+    collided are regenerated."""
+    model = queryset.model
+
+    def find_existing(keys):
+        return set(model.objects.filter(url_key__in=keys).values_list('url_key', flat=True))
+
+    def save(assignments):
+        if not assignments:
+            return
+        whens = [When(pk=instance.pk, then=Value(key)) for instance, key in assignments]
+        model.objects.filter(pk__in=[instance.pk for instance, key in assignments]).update(
+                url_key=Case(*whens, output_field=SlugField()))
+        for instance, key in assignments:
+            instance.url_key = key
+
+    failed = assign_unique_keys(queryset, lambda: generate_url_key(length),
+            find_existing, save, num_attempts=num_attempts)
+    for instance in failed:
+        logger.error("Could not generate unique URL for %r after %d tries", instance, num_attempts)
 
 
 def delete_url_keys(queryset):
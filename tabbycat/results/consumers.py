@@ -1,4 +1,4 @@
-from utils.consumers import TournamentConsumer, WSLoginRequiredMixin
+from utils.consumers import AsyncTournamentConsumer, TournamentConsumer, WSLoginRequiredMixin
 
 
 class BallotResultConsumer(TournamentConsumer, WSLoginRequiredMixin):
@@ -7,3 +7,11 @@ class BallotResultConsumer(TournamentConsumer, WSLoginRequiredMixin):
 
 class BallotStatusConsumer(TournamentConsumer, WSLoginRequiredMixin):
     group_prefix = 'ballot_statuses'
+
+
+class AsyncBallotResultConsumer(AsyncTournamentConsumer, WSLoginRequiredMixin):
+    group_prefix = BallotResultConsumer.group_prefix
+
+
+class AsyncBallotStatusConsumer(AsyncTournamentConsumer, WSLoginRequiredMixin):
+    group_prefix = BallotStatusConsumer.group_prefix
@@ -13,6 +13,7 @@ from django.contrib.auth import get_user_model
 from draw.models import Debate
 from results.models import BallotSubmission
 from results.result import DebateResult
+from standings.materialized import team_round_metrics_deferred
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -20,15 +21,17 @@ User = get_user_model()
 
 def add_results_to_round(round, **kwargs):
     """Calls add_result() for every debate in the given round."""
-    for debate in round.debate_set.all():
-        add_result(debate, **kwargs)
+    with team_round_metrics_deferred():
+        for debate in round.debate_set.all():
+            add_result(debate, **kwargs)
 
 
 def add_results_to_round_partial(round, num, **kwargs):
     """Calls ``add_result()`` on ``num`` randomly-chosen debates in the given round."""
     debates = random.sample(list(round.debate_set.all()), num)
-    for debate in debates:
-        add_result(debate, **kwargs)
+    with team_round_metrics_deferred():
+        for debate in debates:
+            add_result(debate, **kwargs)
 
 
 def delete_all_ballotsubs_for_round(round):
@@ -1,8 +1,6 @@
 import logging
 from itertools import product
 
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
 from django import forms
 from django.utils import timezone
 from django.utils.translation import gettext as _
@@ -10,7 +8,9 @@ from django.utils.translation import ngettext
 
 from draw.models import Debate, DebateTeam
 from participants.models import Speaker, Team
+from standings.materialized import team_round_metrics_deferred
 from tournaments.utils import get_side_name
+from utils.broadcast import broadcast
 
 from .consumers import BallotResultConsumer, BallotStatusConsumer
 from .result import (BPDebateResult, BPEliminationDebateResult, ConsensusDebateResult,
@@ -169,26 +169,29 @@ class BaseResultForm(forms.Form):
 
     def save(self):
 
-        # 1. Unconfirm the other, if necessary
-        if self.cleaned_data['confirmed']:
-            if self.debate.confirmed_ballot != self.ballotsub and self.debate.confirmed_ballot is not None:
-                self.debate.confirmed_ballot.confirmed = False
-                self.debate.confirmed_ballot.save()
-
-        # 2. Save ballot submission so that we can create related objects
-        if self.ballotsub.pk is None:
+        # The materialized team metrics used by the standings are updated by
+        # signals as the ballot is saved, so only do that once, at the end
+        with team_round_metrics_deferred():
+            # 1. Unconfirm the other, if necessary
+            if self.cleaned_data['confirmed']:
+                if self.debate.confirmed_ballot != self.ballotsub and self.debate.confirmed_ballot is not None:
+                    self.debate.confirmed_ballot.confirmed = False
+                    self.debate.confirmed_ballot.save()
+
+            # 2. Save ballot submission so that we can create related objects
+            if self.ballotsub.pk is None:
+                self.ballotsub.save()
+
+            # 3. Save the specifics of the ballot
+            self.save_ballot()
+
+            # 4. Save ballot and result status
+            self.ballotsub.discarded = self.cleaned_data['discarded']
+            self.ballotsub.confirmed = self.cleaned_data['confirmed']
             self.ballotsub.save()
 
-        # 3. Save the specifics of the ballot
-        self.save_ballot()
-
-        # 4. Save ballot and result status
-        self.ballotsub.discarded = self.cleaned_data['discarded']
-        self.ballotsub.confirmed = self.cleaned_data['confirmed']
-        self.ballotsub.save()
-
-        self.debate.result_status = self.cleaned_data['debate_result_status']
-        self.debate.save()
+            self.debate.result_status = self.cleaned_data['debate_result_status']
+            self.debate.save()
 
         t = self.debate.round.tournament
         # Need to provide a timestamp immediately for BallotStatusConsumer
@@ -196,28 +199,22 @@ class BaseResultForm(forms.Form):
         if self.ballotsub.confirmed:
             self.ballotsub.confirm_timestamp = timezone.now()
 
-        # 5. Notify the Latest Results consumer (for results/overview)
+        # 6. Notify the Latest Results consumer (for results/overview)
         if self.ballotsub.confirmed:
             if self.debate.result_status is self.debate.STATUS_CONFIRMED:
                 group_name = BallotResultConsumer.group_prefix + "_" + t.slug
-                async_to_sync(get_channel_layer().group_send)(group_name, {
-                    "type": "send_json",
-                    "data": self.ballotsub.serialize_like_actionlog
-                })
+                broadcast(group_name, self.ballotsub.serialize_like_actionlog)
 
-        # 6. Notify the Results Page/Ballots Status Graph
+        # 7. Notify the Results Page/Ballots Status Graph
         group_name = BallotStatusConsumer.group_prefix + "_" + t.slug
         meta = get_status_meta(self.debate)
-        async_to_sync(get_channel_layer().group_send)(group_name, {
-            "type": "send_json",
-            "data": {
-                'status': self.cleaned_data['debate_result_status'],
-                'icon': meta[0],
-                'class': meta[1],
-                'sort': meta[2],
-                'ballot': self.ballotsub.serialize(t),
-                'round': self.debate.round.id
-            }
+        broadcast(group_name, {
+            'status': self.cleaned_data['debate_result_status'],
+            'icon': meta[0],
+            'class': meta[1],
+            'sort': meta[2],
+            'ballot': self.ballotsub.serialize(t),
+            'round': self.debate.round.id
         })
 
         return self.ballotsub
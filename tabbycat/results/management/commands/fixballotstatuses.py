@@ -1,6 +1,7 @@
 from utils.management.base import TournamentCommand
 
 from draw.models import Debate
+from standings.materialized import team_round_metrics_deferred
 
 from ...models import BallotSubmission
 
@@ -12,18 +13,19 @@ class Command(TournamentCommand):
         "minimalist with changes."
 
     def handle_tournament(self, tournament, **options):
-        for bsub in BallotSubmission.objects.filter(debate__round__tournament=tournament):
-            debate_status = bsub.debate.result_status
-            original = (bsub.discarded, bsub.confirmed)
-            if debate_status == Debate.STATUS_NONE:
-                bsub.discarded = True
-                bsub.confirmed = False
-            elif debate_status == Debate.STATUS_DRAFT:
-                bsub.confirmed = False
-            elif debate_status == Debate.STATUS_CONFIRMED:
-                if not bsub.discarded:
-                    bsub.confirmed = True
-            new = (bsub.discarded, bsub.confirmed)
-            if original != new:
-                self.stdout.write("{} changed from {} to {}".format(bsub, original, new))
-                bsub.save()
+        with team_round_metrics_deferred():
+            for bsub in BallotSubmission.objects.filter(debate__round__tournament=tournament):
+                debate_status = bsub.debate.result_status
+                original = (bsub.discarded, bsub.confirmed)
+                if debate_status == Debate.STATUS_NONE:
+                    bsub.discarded = True
+                    bsub.confirmed = False
+                elif debate_status == Debate.STATUS_DRAFT:
+                    bsub.confirmed = False
+                elif debate_status == Debate.STATUS_CONFIRMED:
+                    if not bsub.discarded:
+                        bsub.confirmed = True
+                new = (bsub.discarded, bsub.confirmed)
+                if original != new:
+                    self.stdout.write("{} changed from {} to {}".format(bsub, original, new))
+                    bsub.save()
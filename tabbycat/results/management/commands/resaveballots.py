@@ -1,3 +1,4 @@
+from standings.materialized import team_round_metrics_deferred
 from utils.management.base import TournamentCommand
 
 from ...models import BallotSubmission
@@ -13,6 +14,7 @@ class Command(TournamentCommand):
         self.stdout.write("Resaving {:d} ballots in tournament \"{:s}\"...".format(
                 ballotsubs.count(), tournament.name))
 
-        for bsub in ballotsubs:
-            self.stdout.write("Saving: {}".format(bsub))
-            bsub.result.save()
+        with team_round_metrics_deferred():
+            for bsub in ballotsubs:
+                self.stdout.write("Saving: {}".format(bsub))
+                bsub.result.save()
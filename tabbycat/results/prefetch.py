@@ -1,8 +1,12 @@
 """Functions that prefetch data for efficiency."""
 
+from django.db.models import Prefetch, prefetch_related_objects
+
+from adjallocation.allocation import AdjudicatorAllocation
 from adjallocation.models import DebateAdjudicator
-from checkins.utils import get_checkins
-from draw.models import DebateTeam
+from checkins.models import DebateIdentifier
+from checkins.utils import get_checkins, get_identifiers
+from draw.models import Debate, DebateTeam
 from tournaments.models import Tournament
 
 from .models import BallotSubmission, SpeakerScore, SpeakerScoreByAdj, TeamScore
@@ -67,15 +71,21 @@ def populate_confirmed_ballots(debates, motions=False, results=False):
 
 
 def populate_checkins(debates, tournament):
-    get_checkins(debates, tournament, None)
+    identifiers = get_identifiers(DebateIdentifier, debates)
+    get_checkins(debates, tournament, None, identifiers=identifiers)
 
 
-def populate_results(ballotsubs):
+def populate_results(ballotsubs, tournament=None):
     """Populates the `_result` attribute of each BallotSubmission in
-    `ballotsubs` with a populated VotingDebateResult instance.
-
-    For best performance, the ballot submissions should already have their
-    debates prefetched (using select_related).
+    `ballotsubs` with a populated DebateResult instance, loading the debate
+    teams, speaker scores and (for voting results) adjudicators' scores for all
+    of the ballot submissions together, rather than a few queries per ballot.
+    Queries for data that none of the results use are skipped.
+
+    All of the ballot submissions are assumed to be from the same tournament,
+    which can be passed as `tournament` to save a query. If the ballot
+    submissions don't already have their debates (and debates' rounds)
+    prefetched, they are fetched in one query.
     """
 
     # If the database is correct, some of the checks like `result.is_voting`,
@@ -86,86 +96,114 @@ def populate_results(ballotsubs):
     if not ballotsubs:
         return
 
-    tournament = Tournament.objects.get(round__debate__ballotsubmission=ballotsubs[0])
+    ballotsubs = list(ballotsubs)  # set ballotsubs in stone to avoid race conditions in later queries
+    if tournament is None:
+        tournament = Tournament.objects.get(round__debate__ballotsubmission=ballotsubs[0])
     positions = tournament.positions
     sides = tournament.sides
-    ballotsubs = list(ballotsubs)  # set ballotsubs in stone to avoid race conditions in later queries
+
+    # Fetch debates and their rounds, if they haven't been already
+    debate_field = BallotSubmission._meta.get_field('debate')
+    uncached = [bs for bs in ballotsubs if not debate_field.is_cached(bs)]
+    if uncached:
+        debates = Debate.objects.select_related('round').in_bulk([bs.debate_id for bs in uncached])
+        for ballotsub in uncached:
+            ballotsub.debate = debates[ballotsub.debate_id]
 
     results_by_debate_id = {}
     results_by_ballotsub_id = {}
 
     # Create the DebateResults
     for ballotsub in ballotsubs:
-        result = DebateResult(ballotsub, load=False)
+        result = DebateResult(ballotsub, load=False, tournament=tournament)
         result.init_blank_buffer()
 
         ballotsub._result = result
         results_by_debate_id.setdefault(ballotsub.debate_id, []).append(result)
         results_by_ballotsub_id[ballotsub.id] = result
 
+    results = results_by_ballotsub_id.values()
+
     # Populate debateteams (load_debateteams)
     debateteams = DebateTeam.objects.filter(
-        debate__ballotsubmission__in=ballotsubs,
+        debate_id__in=results_by_debate_id.keys(),
         side__in=sides
-    ).select_related('team').distinct()
+    ).select_related('team')
 
     for dt in debateteams:
         for result in results_by_debate_id[dt.debate_id]:
             result.debateteams[dt.side] = dt
 
     # Populate speaker positions (load_speakers)
-    speakerscores = SpeakerScore.objects.filter(
-        ballot_submission__in=ballotsubs,
-        debate_team__side__in=sides,
-        position__in=positions
-    ).select_related('debate_team')
-
-    for ss in speakerscores:
-        result = results_by_ballotsub_id[ss.ballot_submission_id]
-        result.speakers[ss.debate_team.side][ss.position] = ss.speaker
-        result.ghosts[ss.debate_team.side][ss.position] = ss.ghost
-
-        if not result.is_voting:
-            result.set_score(ss.debate_team.side, ss.position, ss.score)
-
-    # Populate scoresheets (load_scoresheets)
-
-    debateadjs = DebateAdjudicator.objects.filter(
-        debate__ballotsubmission__in=ballotsubs
-    ).exclude(
-        type=DebateAdjudicator.TYPE_TRAINEE
-    ).select_related('adjudicator').distinct()
-
-    for da in debateadjs:
-        for result in results_by_debate_id[da.debate_id]:
+    if any(result.uses_speakers for result in results):
+        speakerscores = SpeakerScore.objects.filter(
+            ballot_submission__in=ballotsubs,
+            debate_team__side__in=sides,
+            position__in=positions
+        ).select_related('debate_team')
+
+        for ss in speakerscores:
+            result = results_by_ballotsub_id[ss.ballot_submission_id]
+            result.speakers[ss.debate_team.side][ss.position] = ss.speaker
+            result.ghosts[ss.debate_team.side][ss.position] = ss.ghost
+
+            if not result.is_voting:
+                result.set_score(ss.debate_team.side, ss.position, ss.score)
+
+    # Populate adjudicators and scoresheets (load_scoresheets)
+    if any(result.is_voting for result in results):
+        populate_voting_adjudicators([result.debate for result in results if result.is_voting])
+
+        for result in results:
+            if not result.is_voting:
+                continue
+            for da in result.debate.debateadjudicator_set.all():
+                if da.type != DebateAdjudicator.TYPE_TRAINEE:
+                    result.debateadjs[da.adjudicator] = da
+                    result.scoresheets[da.adjudicator] = result.scoresheet_class(positions)
+
+        ssbas = SpeakerScoreByAdj.objects.filter(
+            ballot_submission__in=ballotsubs,
+            debate_team__side__in=sides,
+            position__in=positions
+        ).select_related('debate_adjudicator__adjudicator', 'debate_team')
+
+        for ssba in ssbas:
+            result = results_by_ballotsub_id[ssba.ballot_submission_id]
             if result.is_voting:
-                result.debateadjs[da.adjudicator] = da
-                result.scoresheets[da.adjudicator] = result.scoresheet_class(positions)
-
-    ssbas = SpeakerScoreByAdj.objects.filter(
-        ballot_submission__in=ballotsubs,
-        debate_team__side__in=sides,
-        position__in=positions
-    ).select_related('debate_adjudicator__adjudicator', 'debate_team')
-
-    for ssba in ssbas:
-        result = results_by_ballotsub_id[ssba.ballot_submission_id]
-        if result.is_voting:
-            result.set_score(ssba.debate_adjudicator.adjudicator, ssba.debate_team.side,
-                ssba.position, ssba.score)
+                result.set_score(ssba.debate_adjudicator.adjudicator, ssba.debate_team.side,
+                    ssba.position, ssba.score)
 
     # Populate advancing (load_advancing)
-    teamscores = TeamScore.objects.filter(
-        ballot_submission__in=ballotsubs,
-        debate_team__side__in=sides
-    ).select_related('debate_team')
-
-    for ts in teamscores:
-        result = results_by_ballotsub_id[ts.ballot_submission_id]
-        if result.uses_advancing and ts.win:
-            result.advancing.append(ts.debate_team.side)
+    if any(result.uses_advancing for result in results):
+        teamscores = TeamScore.objects.filter(
+            ballot_submission__in=ballotsubs,
+            debate_team__side__in=sides,
+            win=True,
+        ).select_related('debate_team')
+
+        for ts in teamscores:
+            result = results_by_ballotsub_id[ts.ballot_submission_id]
+            if result.uses_advancing:
+                result.advancing.append(ts.debate_team.side)
 
     # Finally, check that everything is in order
 
     for ballotsub in ballotsubs:
         ballotsub.result.assert_loaded()
+
+
+def populate_voting_adjudicators(debates):
+    """Prefetches the debate adjudicators (with adjudicators) of each debate in
+    `debates` that doesn't already have them prefetched, in a single query, and
+    sets up each debate's AdjudicatorAllocation from them. Operates in-place."""
+
+    debates = [debate for debate in debates if 'debateadjudicator_set' not in
+               getattr(debate, '_prefetched_objects_cache', {})]
+    if not debates:
+        return
+
+    prefetch_related_objects(debates, Prefetch('debateadjudicator_set',
+        queryset=DebateAdjudicator.objects.select_related('adjudicator')))
+    for debate in debates:
+        debate._adjudicators = AdjudicatorAllocation(debate, from_db=True)
@@ -42,6 +42,9 @@ import logging
 from functools import wraps
 from statistics import mean
 
+from django.db import transaction
+from django.db.models import Case, Value, When
+
 from adjallocation.allocation import AdjudicatorAllocation
 from adjallocation.models import DebateAdjudicator
 
@@ -55,14 +58,53 @@ class ResultError(RuntimeError):
     pass
 
 
+def bulk_save(queryset, key_fields, rows, **common):
+    """Saves `rows`, a list of dicts mapping field names to values, to the
+    model of `queryset`, which must contain every existing instance that a row
+    might correspond to. Rows whose values for `key_fields` match an existing
+    instance update that instance (if anything changed); other rows create new
+    instances, with the fields in `common` also set.
+
+    This uses at most three queries, however many rows there are: one to load
+    the existing instances, one to create new ones and one to update changed
+    ones."""
+
+    model = queryset.model
+    existing = {tuple(getattr(obj, field) for field in key_fields): obj for obj in queryset}
+    to_create = []
+    to_update = []
+
+    for row in rows:
+        obj = existing.get(tuple(row[field] for field in key_fields))
+        if obj is None:
+            to_create.append(model(**row, **common))
+            continue
+        changed = [field for field, value in row.items() if getattr(obj, field) != value]
+        for field in changed:
+            setattr(obj, field, row[field])
+        if changed:
+            to_update.append(obj)
+
+    if to_create:
+        model.objects.bulk_create(to_create)
+
+    if to_update:
+        value_fields = {field for row in rows for field in row} - set(key_fields)
+        model.objects.filter(pk__in=[obj.pk for obj in to_update]).update(**{
+            field: Case(*[When(pk=obj.pk, then=Value(getattr(obj, field))) for obj in to_update],
+                        output_field=model._meta.get_field(field))
+            for field in value_fields
+        })
+
+
 def DebateResult(ballotsub, *args, **kwargs):  # noqa: N802 (factory function)
     """Factory function. Returns an instance of a subclass of BaseDebateResult
     appropriate for the ballot submission's tournament's settings.
 
     If `tournament` is provided as a keyword argument, the function wil use this
-    to determine which subclass it should instantiate, rather than fetching
-    `ballotsub.debate.round.tournament`. Callers can use this on repeated calls
-    to avoid a deluge of repeated SQL queries.
+    to determine which subclass it should instantiate, and pass it on to the
+    instance, rather than fetching `ballotsub.debate.round.tournament`. Callers
+    can use this on repeated calls to avoid a deluge of repeated SQL queries.
 
     The different subclasses have different method signatures. It is the
     responsibility of the caller to ensure that it conforms with the signatures
@@ -75,6 +117,8 @@ def DebateResult(ballotsub, *args, **kwargs):  # noqa: N802 (factory function)
         tournament = ballotsub.debate.round.tournament
     teams_in_debate = tournament.pref('teams_in_debate')
 
+    kwargs['tournament'] = tournament
+
     if r.ballots_per_debate == 'per-adj' and teams_in_debate == 'two':
         return VotingDebateResult(ballotsub, *args, **kwargs)
     elif r.ballots_per_debate == 'per-debate' and teams_in_debate == 'two':
@@ -133,9 +177,10 @@ class BaseDebateResult:
     uses_advancing = False
     uses_speakers = False
 
-    def __init__(self, ballotsub, load=True):
+    def __init__(self, ballotsub, load=True, tournament=None):
         """Constructor.
-        `ballotsub` must be a BallotSubmission.
+        `ballotsub` must be a BallotSubmission. If `tournament` is given, it is
+        used instead of fetching `ballotsub.debate.round.tournament`.
 
         If `load` is False, the constructor will not load any data from the
         database (at all). It is then the responsibility of the caller to do so;
@@ -148,7 +193,7 @@ class BaseDebateResult:
 
         self.ballotsub = ballotsub
         self.debate = ballotsub.debate
-        self.tournament = self.debate.round.tournament
+        self.tournament = tournament if tournament is not None else self.debate.round.tournament
         self.sides = self.tournament.sides
 
         if load:
@@ -233,23 +278,38 @@ class BaseDebateResult:
             self.debateteams[dt.side] = dt
 
     def save(self):
-        """Saves to the database.
+        """Saves to the database, in a single transaction.
         Raises ResultError if the ballot set is incomplete or invalid."""
 
         if not self.is_valid():
             raise ResultError("Tried to save an invalid result.")
 
-        for side in self.sides:
-            dt = self.debateteams[side]
+        with transaction.atomic():
+            self.save_scores()
 
-            teamscorefields = {}
+        # Team scores are saved in bulk, which doesn't send signals, so the
+        # materialized team metrics must be updated here. (Imported here because
+        # results.models imports this module.)
+        from standings.materialized import update_team_round_metrics
+        update_team_round_metrics([self.debate.id])
+
+    def save_scores(self):
+        """Saves the scores to the database, using `bulk_save()` for each table
+        so that the number of queries doesn't depend on the number of teams,
+        speakers or adjudicators. Subclasses should extend this method as
+        necessary."""
+
+        rows = []
+        for side in self.sides:
+            row = {'debate_team_id': self.debateteams[side].id}
             for field in self.TEAMSCORE_FIELDS:
                 get_field = getattr(self, 'teamscorefield_%s' % field, None)
                 if get_field is not None:
-                    teamscorefields[field] = get_field(side)
+                    row[field] = get_field(side)
+            rows.append(row)
 
-            self.ballotsub.teamscore_set.update_or_create(debate_team=dt,
-                    defaults=teamscorefields)
+        bulk_save(self.ballotsub.teamscore_set.all(), ('debate_team_id',), rows,
+                  ballot_submission=self.ballotsub)
 
     # --------------------------------------------------------------------------
     # Data setting and retrieval
@@ -282,8 +342,8 @@ class BaseDebateResultWithSpeakers(BaseDebateResult):
 
     uses_speakers = True
 
-    def __init__(self, ballotsub, load=True):
-        super().__init__(ballotsub, load=False)
+    def __init__(self, ballotsub, load=True, tournament=None):
+        super().__init__(ballotsub, load=False, tournament=tournament)
 
         self.positions = self.tournament.positions
 
@@ -354,17 +414,19 @@ class BaseDebateResultWithSpeakers(BaseDebateResult):
             self.speakers[ss.debate_team.side][ss.position] = ss.speaker
             self.ghosts[ss.debate_team.side][ss.position] = ss.ghost
 
-    def save(self):
-        super().save()
+    def save_scores(self):
+        super().save_scores()
 
-        for side in self.sides:
-            dt = self.debateteams[side]
-            for pos in self.positions:
-                speaker = self.speakers[side][pos]
-                is_ghost = self.ghosts[side][pos]
-                score = self.get_speaker_score(side, pos)
-                self.ballotsub.speakerscore_set.update_or_create(debate_team=dt,
-                    position=pos, defaults=dict(speaker=speaker, score=score, ghost=is_ghost))
+        rows = [{
+            'debate_team_id': self.debateteams[side].id,
+            'position': pos,
+            'speaker_id': self.speakers[side][pos].id,
+            'score': self.get_speaker_score(side, pos),
+            'ghost': self.ghosts[side][pos],
+        } for side in self.sides for pos in self.positions]
+
+        bulk_save(self.ballotsub.speakerscore_set.all(), ('debate_team_id', 'position'), rows,
+                  ballot_submission=self.ballotsub)
 
     # --------------------------------------------------------------------------
     # Data setting and retrieval
@@ -448,8 +510,8 @@ class VotingDebateResult(BaseDebateResultWithSpeakers):
 
     is_voting = True
 
-    def __init__(self, ballotsub, load=True):
-        super().__init__(ballotsub, load)
+    def __init__(self, ballotsub, load=True, tournament=None):
+        super().__init__(ballotsub, load, tournament=tournament)
         self._decision_calculated = False
 
     # --------------------------------------------------------------------------
@@ -512,17 +574,19 @@ class VotingDebateResult(BaseDebateResultWithSpeakers):
             self.set_score(ssba.debate_adjudicator.adjudicator,
                     ssba.debate_team.side, ssba.position, ssba.score)
 
-    def save(self):
-        super().save()
+    def save_scores(self):
+        super().save_scores()
 
-        for adj, sheet in self.scoresheets.items():
-            da = self.debateadjs[adj]
-            for side in self.sides:
-                dt = self.debateteams[side]
-                for pos in self.positions:
-                    self.ballotsub.speakerscorebyadj_set.update_or_create(
-                        debate_team=dt, debate_adjudicator=da, position=pos,
-                        defaults=dict(score=self.get_score(adj, side, pos)))
+        rows = [{
+            'debate_adjudicator_id': self.debateadjs[adj].id,
+            'debate_team_id': self.debateteams[side].id,
+            'position': pos,
+            'score': self.get_score(adj, side, pos),
+        } for adj in self.scoresheets for side in self.sides for pos in self.positions]
+
+        bulk_save(self.ballotsub.speakerscorebyadj_set.all(),
+                  ('debate_adjudicator_id', 'debate_team_id', 'position'), rows,
+                  ballot_submission=self.ballotsub)
 
     # --------------------------------------------------------------------------
     # Data setting and retrieval
@@ -698,8 +762,8 @@ class BaseConsensusDebateResultWithSpeakers(BaseDebateResultWithSpeakers):
 
     is_voting = False
 
-    def __init__(self, ballotsub, load=True):
-        super().__init__(ballotsub, load=False)
+    def __init__(self, ballotsub, load=True, tournament=None):
+        super().__init__(ballotsub, load=False, tournament=tournament)
         self.scoresheet = self.scoresheet_class(self.positions)
         if load:
             self.full_load()
@@ -734,16 +798,6 @@ class BaseConsensusDebateResultWithSpeakers(BaseDebateResultWithSpeakers):
         for ss in speakerscores:
             self.set_score(ss.debate_team.side, ss.position, ss.score)
 
-    def save(self):
-        super().save()
-
-        for side in self.sides:
-            dt = self.debateteams[side]
-            for pos in self.positions:
-                self.ballotsub.speakerscore_set.update_or_create(
-                    debate_team=dt, position=pos,
-                    defaults=dict(score=self.get_score(side, pos)))
-
     # --------------------------------------------------------------------------
     # Data setting and retrieval
     # --------------------------------------------------------------------------
@@ -756,7 +810,7 @@ class BaseConsensusDebateResultWithSpeakers(BaseDebateResultWithSpeakers):
                     "self.takes_scores is %s", self.takes_scores)
             return None
 
-    get_speaker_score = get_score  # for BaseDebateResult.save()
+    get_speaker_score = get_score  # for BaseDebateResultWithSpeakers.save_scores()
 
     def set_score(self, side, position, score):
         try:
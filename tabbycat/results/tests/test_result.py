@@ -1,10 +1,13 @@
 import logging
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from draw.models import Debate, DebateTeam
 from participants.models import Adjudicator, Institution, Speaker, Team
 from results.models import BallotSubmission, SpeakerScore, SpeakerScoreByAdj, TeamScore
+from results.prefetch import populate_results
 from results.result import ConsensusDebateResult, ResultError, VotingDebateResult    # absolute import to keep logger's name consistent
 from tournaments.models import Round, Tournament
 from utils.tests import suppress_logs
@@ -192,6 +195,13 @@ class GeneralSpeakerTestsMixin:
         # Run self.save_complete_result and check completeness
         self.assertTrue(result.is_complete())
 
+    @standard_test
+    def test_populate_results(self, result, testdata, scoresheet_type):
+        ballotsub = BallotSubmission.objects.get(debate=self.debate, confirmed=True)
+        populate_results([ballotsub], tournament=self.t)
+        self.assertTrue(ballotsub.result.identical(result))
+        self.assertIs(ballotsub.result.tournament, self.t)  # not fetched again
+
     def test_unknown_speaker(self):
         self.save_complete_result(self.testdata['high'])
         result = self.get_result()
@@ -616,6 +626,41 @@ class TestVotingDebateResult(GeneralSpeakerTestsMixin, BaseTestDebateResult):
                 self.assertAlmostEqual(self._get_teamscore_in_db(side).margin, margin)
                 self.assertAlmostEqual(result.teamscorefield_margin(side), margin)
 
+    def _count_save_queries(self, nadjs):
+        result = self.save_blank_result(nadjs=nadjs, nspeakers=2)
+        for side, team, score in zip(self.SIDES, self.teams, [75.0, 76.0]):
+            speakers = team.speaker_set.all()[0:2]
+            for pos, speaker in enumerate(speakers, start=1):
+                result.set_speaker(side, pos, speaker)
+            result.set_speaker(side, 3, speakers[0])
+            for adj in self.adjs[:nadjs]:
+                for pos in [1, 2]:
+                    result.set_score(adj, side, pos, score)
+                result.set_score(adj, side, 3, score / 2)
+
+        with suppress_logs('results.result', logging.WARNING):
+            with CaptureQueriesContext(connection) as context:
+                result.save()
+        return result, len(context.captured_queries)
+
+    def test_save_query_count_independent_of_panel_size(self):
+        _, single = self._count_save_queries(nadjs=1)
+        _, panel = self._count_save_queries(nadjs=3)
+        self.assertEqual(single, panel)
+        self.assertEqual(SpeakerScoreByAdj.objects.filter(ballot_submission__confirmed=True).count(), 3 * 2 * 3)
+
+    def test_resave_updates_existing_scores(self):
+        result, _ = self._count_save_queries(nadjs=3)
+        for adj in self.adjs:
+            result.set_score(adj, 'aff', 1, 74.0)
+        with suppress_logs('results.result', logging.WARNING):
+            result.save()
+
+        ssbas = SpeakerScoreByAdj.objects.filter(ballot_submission=result.ballotsub)
+        self.assertEqual(ssbas.count(), 3 * 2 * 3)
+        self.assertEqual(set(ssbas.filter(debate_team__side='aff', position=1).values_list('score', flat=True)), {74.0})
+        self.assertEqual(self._get_speakerscore_in_db('aff', 1).score, 74.0)
+
     @incomplete_test
     def test_unfilled_scoresheet_score(self, result):
         result.scoresheets[self.adjs[0]].scores["aff"][1] = None
@@ -24,7 +24,8 @@ from tournaments.mixins import (CurrentRoundMixin, PersonalizablePublicTournamen
                                 TournamentMixin)
 from tournaments.models import Round
 from utils.misc import get_ip_address, redirect_round, reverse_round, reverse_tournament
-from utils.mixins import AdministratorMixin, AssistantMixin
+from utils.mixins import AdministratorMixin, AssistantMixin, ConditionalGetMixin
+from utils.publiccache import invalidate_public_pages
 from utils.views import VueTableTemplateView
 from utils.tables import TabbycatTableBuilder
 
@@ -93,7 +94,7 @@ class AdminResultsEntryForRoundView(AdministratorMixin, BaseResultsEntryForRound
     template_name = 'admin_results.html'
 
 
-class PublicResultsForRoundView(RoundMixin, PublicTournamentPageMixin, VueTableTemplateView):
+class PublicResultsForRoundView(ConditionalGetMixin, RoundMixin, PublicTournamentPageMixin, VueTableTemplateView):
 
     template_name = "public_results_for_round.html"
     public_page_preference = 'public_results'
@@ -101,6 +102,7 @@ class PublicResultsForRoundView(RoundMixin, PublicTournamentPageMixin, VueTableT
     page_emoji = '💥'
     default_view = 'team'
     cache_timeout = settings.PUBLIC_SLOW_CACHE_TIMEOUT
+    round_data_versions = True
 
     def get_table(self):
         view_type = self.request.session.get('results_view', self.default_view)
@@ -298,6 +300,10 @@ class BaseBallotSetView(LogActionMixin, TournamentMixin, FormView):
         self.add_success_message()
         self.round = self.ballotsub.debate.round  # for LogActionMixin
 
+        # Edits to existing ballots might unconfirm or discard them
+        if self.ballotsub.confirmed or not self.relates_to_new_ballotsub:
+            invalidate_public_pages(self.tournament, self.request, self.round)
+
         return super().form_valid(form)
 
     def populate_objects(self):
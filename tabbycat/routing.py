@@ -3,9 +3,9 @@ from django.conf.urls import url
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 
-from actionlog.consumers import ActionLogEntryConsumer
-from checkins.consumers import CheckInEventConsumer
-from results.consumers import BallotResultConsumer, BallotStatusConsumer
+from actionlog.consumers import AsyncActionLogEntryConsumer
+from checkins.consumers import AsyncCheckInEventConsumer
+from results.consumers import AsyncBallotResultConsumer, AsyncBallotStatusConsumer
 
 
 # This acts like a urls.py equivalent; need to import the channel routes
@@ -20,11 +20,11 @@ application = ProtocolTypeRouter({
     "websocket": AuthMiddlewareStack(
         URLRouter([
             # TournamentOverviewContainer
-            url(r'^ws/(?P<tournament_slug>[-\w_]+)/action_logs/$', ActionLogEntryConsumer),
-            url(r'^ws/(?P<tournament_slug>[-\w_]+)/ballot_results/$', BallotResultConsumer),
-            url(r'^ws/(?P<tournament_slug>[-\w_]+)/ballot_statuses/$', BallotStatusConsumer),
+            url(r'^ws/(?P<tournament_slug>[-\w_]+)/action_logs/$', AsyncActionLogEntryConsumer),
+            url(r'^ws/(?P<tournament_slug>[-\w_]+)/ballot_results/$', AsyncBallotResultConsumer),
+            url(r'^ws/(?P<tournament_slug>[-\w_]+)/ballot_statuses/$', AsyncBallotStatusConsumer),
             # CheckInStatusContainer
-            url(r'^ws/(?P<tournament_slug>[-\w_]+)/checkins/$', CheckInEventConsumer)
+            url(r'^ws/(?P<tournament_slug>[-\w_]+)/checkins/$', AsyncCheckInEventConsumer)
         ])
     ),
 })
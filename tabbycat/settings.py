@@ -167,6 +167,21 @@ PUBLIC_FAST_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_FAST_CACHE_TIMEOUT', 60 *
 PUBLIC_SLOW_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_SLOW_CACHE_TIMEOUT', 60 * 3.5))
 TAB_PAGES_CACHE_TIMEOUT = int(os.environ.get('TAB_PAGES_CACHE_TIMEOUT', 60 * 120))
 
+# Number of tournaments, rounds, etc. each process keeps in memory; see utils/objectcache.py
+OBJECT_CACHE_SIZE = int(os.environ.get('OBJECT_CACHE_SIZE', 256))
+# How long (in seconds) copies of them last in the shared cache, so that superseded copies don't accumulate
+OBJECT_CACHE_TIMEOUT = int(os.environ.get('OBJECT_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# Whether to render public pages into the cache after their content changes,
+# and how long to wait for further changes first; see utils/publiccache.py
+PUBLIC_CACHE_PREWARM = bool(int(os.environ.get('PUBLIC_CACHE_PREWARM', 1)))
+PUBLIC_CACHE_PREWARM_DELAY = float(os.environ.get('PUBLIC_CACHE_PREWARM_DELAY', 2))
+
+# How long stale copies of public pages are kept, to be served while another
+# worker recomputes the page, and how long a worker may hold the recomputation lock
+PUBLIC_STALE_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_STALE_CACHE_TIMEOUT', 60 * 60))
+PUBLIC_CACHE_LOCK_TIMEOUT = int(os.environ.get('PUBLIC_CACHE_LOCK_TIMEOUT', 30))
+
 # Default non-heroku cache is to use local memory
 # Can't cache without redis; but code assumes caching exists
 CACHES = {
@@ -314,6 +329,10 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Seconds over which status messages to websocket groups are collected and
+# sent together; see utils/broadcast.py. Zero sends each message immediately.
+WEBSOCKET_BROADCAST_WINDOW = float(os.environ.get('WEBSOCKET_BROADCAST_WINDOW', 0.5))
+
 # ==============================================================================
 # Dynamic preferences
 # ==============================================================================
@@ -0,0 +1,96 @@
+import time
+
+from django.db import connection
+from django.db.models import Prefetch
+from django.test.utils import CaptureQueriesContext
+
+from draw.models import DebateTeam
+from draw.prefetch import populate_opponents
+from tournaments.models import Round
+from utils.management.base import TournamentCommand
+
+from ...base import Standings
+from ...teams import DrawStrengthMetricAnnotator, PointsMetricAnnotator
+
+
+def opponent_query_draw_strengths(queryset, round=None):
+    """The draw strength implementation used before draw strength was computed
+    in a single pass, kept here for comparison. It annotates points on every
+    team, prefetches every debate team, then finds opponents using a correlated
+    subquery per debate team. Only one opponent per debate is counted."""
+    prefetch_queryset = DebateTeam.objects.filter(debate__round__stage=Round.STAGE_PRELIMINARY)
+    if round is not None:
+        prefetch_queryset = prefetch_queryset.filter(debate__round__seq__lte=round.seq)
+
+    points_queryset = PointsMetricAnnotator().get_annotated_queryset(
+            queryset[0].tournament.team_set.all(), 'points', round).prefetch_related(
+            Prefetch('debateteam_set', queryset=prefetch_queryset, to_attr='debateteams'))
+    points_queryset_teams = {team.id: team for team in points_queryset}
+    points_queryset_debateteams = {team.id: list(team.debateteams) for team in points_queryset}
+
+    populate_opponents([dt for dts in points_queryset_debateteams.values() for dt in dts])
+
+    draw_strengths = {}
+    for team in queryset:
+        draw_strength = 0
+        for dt in points_queryset_debateteams[team.id]:
+            points = points_queryset_teams[dt.opponent.team_id].points
+            if points is not None:
+                draw_strength += points
+        draw_strengths[team.id] = draw_strength
+    return draw_strengths
+
+
+def single_pass_draw_strengths(queryset, round=None):
+    standings = Standings(queryset)
+    DrawStrengthMetricAnnotator().annotate(queryset, standings, round)
+    return {info.instance_id: info.metrics[DrawStrengthMetricAnnotator.key] for info in standings.infoview()}
+
+
+class Command(TournamentCommand):
+
+    help = "Compares the speed of the single-pass draw strength computation with the " \
+           "previous opponent-subquery implementation, e.g. on the bp88team demo data. " \
+           "This doesn't modify the database."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("-r", "--repeats", type=int, default=5,
+            help="Number of times to run each implementation (default 5)")
+
+    def time_function(self, function, queryset, round, repeats):
+        times = []
+        for i in range(repeats):
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                result = function(queryset, round)
+                times.append(time.perf_counter() - start)
+        return result, min(times), len(context.captured_queries)
+
+    def handle_tournament(self, tournament, **options):
+        queryset = tournament.team_set.all()
+        if not queryset.exists():
+            self.stdout.write("Tournament \"{:s}\" has no teams, skipping".format(tournament.name))
+            return
+
+        round = tournament.prelim_rounds().order_by('seq').last()
+        self.stdout.write("Draw strength for {:d} teams in \"{:s}\", up to {:s}:".format(
+                queryset.count(), tournament.name, round.name if round else "no round"))
+
+        results = {}
+        for name, function in [("opponent subquery", opponent_query_draw_strengths),
+                               ("single pass", single_pass_draw_strengths)]:
+            results[name], elapsed, nqueries = self.time_function(function, queryset, round, options["repeats"])
+            self.stdout.write("  {:<20s} {:8.1f} ms (best of {:d}), {:4d} queries".format(
+                    name, elapsed * 1000, options["repeats"], nqueries))
+
+        differences = [team_id for team_id, value in results["single pass"].items()
+                       if results["opponent subquery"].get(team_id) != value]
+        if not differences:
+            self.stdout.write(self.style.SUCCESS("  Both implementations agree for all teams."))
+        elif tournament.pref('teams_in_debate') == 'bp':
+            self.stdout.write("  The implementations differ for {:d} teams; this is expected in British "
+                    "Parliamentary, because the single-pass implementation counts all three "
+                    "opponents.".format(len(differences)))
+        else:
+            self.stdout.write(self.style.ERROR("  The implementations differ for {:d} teams.".format(len(differences))))
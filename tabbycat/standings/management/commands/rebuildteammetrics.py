@@ -0,0 +1,43 @@
+from utils.management.base import TournamentCommand
+
+from ...materialized import rebuild_team_round_metrics, verify_team_round_metrics
+
+
+class Command(TournamentCommand):
+
+    help = "Rebuilds the precomputed team results used for team standings when the " \
+           "\"Use precomputed team results for standings\" preference is enabled, " \
+           "and optionally checks them against standings computed from team scores."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--verify", action="store_true",
+            help="After rebuilding, check that standings computed from the precomputed "
+                 "results match those computed from team scores, for every preliminary round")
+        parser.add_argument("--verify-only", action="store_true",
+            help="Check the existing precomputed results without rebuilding them first")
+
+    def handle_tournament(self, tournament, **options):
+        if not options["verify_only"]:
+            count = rebuild_team_round_metrics(tournament)
+            self.stdout.write("Rebuilt {:d} team results in tournament \"{:s}\"".format(count, tournament.name))
+
+        if not options["verify"] and not options["verify_only"]:
+            return
+
+        rounds = [None] + list(tournament.prelim_rounds())
+        failed = False
+        for round in rounds:
+            for team, metric, live, materialized in verify_team_round_metrics(tournament, round):
+                failed = True
+                self.stdout.write(self.style.ERROR(
+                    "{round}, {team}, {metric}: {live} from team scores, but {materialized} "
+                    "from precomputed results".format(round=round.name if round else "All rounds",
+                    team=team.short_name, metric=metric, live=live, materialized=materialized)))
+
+        if failed:
+            self.stdout.write(self.style.ERROR("Precomputed team results in \"{:s}\" don't match team "
+                    "scores; run this command without --verify-only to rebuild them.".format(tournament.name)))
+        else:
+            self.stdout.write(self.style.SUCCESS("Precomputed team results in \"{:s}\" match team "
+                    "scores in all {:d} checks.".format(tournament.name, len(rounds))))
@@ -0,0 +1,118 @@
+"""Maintenance of the materialized team metrics table used by the team
+standings generator when the `team_standings_materialized` preference is on.
+
+The table (`TeamRoundMetrics`) mirrors the TeamScores of confirmed ballot
+submissions. It is rebuilt per debate by signal handlers (see signals.py)
+whenever a ballot submission or team score is saved or deleted, and by
+`BaseDebateResult.save()`, which saves team scores in bulk. Code that saves many
+ballots can use `team_round_metrics_deferred()` so that each debate is only
+rebuilt once. The table can also be rebuilt per tournament (e.g. after enabling
+the preference on a tournament that already has results) using the
+`rebuildteammetrics` management command."""
+
+import logging
+import threading
+from contextlib import contextmanager
+from math import isclose
+
+from django.db import transaction
+
+from results.models import TeamScore
+from tournaments.models import Round
+from utils.publiccache import bump_data_versions
+
+from .models import TeamRoundMetrics
+from .teams import TeamStandingsGenerator
+
+logger = logging.getLogger(__name__)
+
+TEAMSCORE_FIELDS = ('points', 'win', 'margin', 'score', 'votes_given', 'votes_possible', 'forfeit')
+
+
+def _metrics_from_teamscores(teamscores):
+    """Returns a list of unsaved TeamRoundMetrics instances, one for each
+    TeamScore in `teamscores`, using a single query."""
+    rows = teamscores.values('debate_team_id', 'ballot_submission_id', *TEAMSCORE_FIELDS)
+    return [TeamRoundMetrics(
+        debate_team_id=row['debate_team_id'],
+        ballot_submission_id=row['ballot_submission_id'],
+        **{field: row[field] for field in TEAMSCORE_FIELDS}
+    ) for row in rows]
+
+
+_deferred = threading.local()
+
+
+@contextmanager
+def team_round_metrics_deferred():
+    """Within this block, updates to the materialized metrics are collected,
+    and done at the end, once per debate."""
+    if getattr(_deferred, 'depth', 0) == 0:
+        _deferred.debate_ids = set()
+    _deferred.depth = getattr(_deferred, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _deferred.depth -= 1
+        if _deferred.depth == 0 and _deferred.debate_ids:
+            _update_team_round_metrics(_deferred.debate_ids)
+
+
+def update_team_round_metrics(debate_ids):
+    """Rebuilds the materialized metrics for the teams in the debates with IDs
+    in `debate_ids`, from each debate's confirmed ballot submission (if any).
+    Within `team_round_metrics_deferred()`, this is postponed to the end of
+    that block."""
+    if getattr(_deferred, 'depth', 0) > 0:
+        _deferred.debate_ids.update(debate_ids)
+    else:
+        _update_team_round_metrics(debate_ids)
+
+
+def _update_team_round_metrics(debate_ids):
+    teamscores = TeamScore.objects.filter(debate_team__debate_id__in=debate_ids, ballot_submission__confirmed=True)
+    with transaction.atomic():
+        TeamRoundMetrics.objects.filter(debate_team__debate_id__in=debate_ids).delete()
+        TeamRoundMetrics.objects.bulk_create(_metrics_from_teamscores(teamscores))
+
+    # The ballots' own signals bumped these before the metrics were updated
+    rounds = Round.objects.filter(debate__id__in=debate_ids).values_list('tournament_id', 'id').distinct()
+    for tournament_id, round_id in rounds:
+        bump_data_versions(tournament_id, round_id)
+
+
+def rebuild_team_round_metrics(tournament):
+    """Rebuilds the materialized metrics for all teams in `tournament` from
+    scratch. Returns the number of rows created."""
+    teamscores = TeamScore.objects.filter(debate_team__team__tournament=tournament,
+            ballot_submission__confirmed=True)
+    with transaction.atomic():
+        TeamRoundMetrics.objects.filter(debate_team__team__tournament=tournament).delete()
+        created = TeamRoundMetrics.objects.bulk_create(_metrics_from_teamscores(teamscores))
+    for round_id in tournament.round_set.values_list('id', flat=True):
+        bump_data_versions(tournament.id, round_id)
+    logger.info("Rebuilt %d team round metrics for %s", len(created), tournament.slug)
+    return len(created)
+
+
+def verify_team_round_metrics(tournament, round=None):
+    """Computes every team metric that can be materialized both from the
+    materialized table and from the live team score aggregations, and compares
+    them. Returns a list of `(team, metric, live, materialized)` tuples, one for
+    each discrepancy."""
+    metrics = [key for key, annotator in TeamStandingsGenerator.metric_annotator_classes.items()
+               if getattr(annotator, 'materializable', False)]
+    teams = tournament.team_set.all()
+
+    live = TeamStandingsGenerator(metrics, ()).generate(teams, round=round)
+    materialized = TeamStandingsGenerator(metrics, (), materialized=True).generate(teams, round=round)
+
+    discrepancies = []
+    for info in live.infoview():
+        other = materialized.get_standing(info.team)
+        for metric in metrics:
+            live_value, materialized_value = info.metrics[metric], other.metrics[metric]
+            if not isclose(live_value, materialized_value, rel_tol=1e-9, abs_tol=1e-6):
+                discrepancies.append((info.team, metric, live_value, materialized_value))
+
+    return discrepancies
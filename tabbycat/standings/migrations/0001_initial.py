@@ -0,0 +1,41 @@
+# Generated by Django 2.0.8 on 2019-02-20 10:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+import results.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('draw', '0003_remove_debate_ballot_in'),
+        ('participants', '0010_auto_20180409_1945'),
+        ('results', '0002_remove_ballotsubmission_copied_from'),
+        ('tournaments', '0002_remove_tournament_welcome_msg'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamRoundMetrics',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='points')),
+                ('win', models.NullBooleanField(verbose_name='win')),
+                ('margin', results.models.ScoreField(blank=True, null=True, verbose_name='margin')),
+                ('score', results.models.ScoreField(blank=True, null=True, verbose_name='score')),
+                ('votes_given', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='votes given')),
+                ('votes_possible', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='votes possible')),
+                ('forfeit', models.BooleanField(default=False, verbose_name='forfeit')),
+                ('ballot_submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='results.BallotSubmission', verbose_name='ballot submission')),
+                ('debate_team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='draw.DebateTeam', verbose_name='debate team')),
+                ('round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournaments.Round', verbose_name='round')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='participants.Team', verbose_name='team')),
+            ],
+            options={
+                'verbose_name': 'team round metrics',
+                'verbose_name_plural': 'team round metrics',
+            },
+        ),
+    ]
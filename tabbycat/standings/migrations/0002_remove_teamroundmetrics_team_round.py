@@ -0,0 +1,21 @@
+# Generated by Django 2.0.8 on 2019-02-24 14:31
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('standings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='teamroundmetrics',
+            name='round',
+        ),
+        migrations.RemoveField(
+            model_name='teamroundmetrics',
+            name='team',
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from results.models import ScoreField
+
+
+class TeamRoundMetrics(models.Model):
+    """Materialized copy of a confirmed TeamScore. This is all redundant
+    information — it mirrors the TeamScores of confirmed ballot submissions. It exists so that team standings can be
+    computed with a single aggregation over one table, rather than one
+    conditional aggregation per metric over the DebateTeam/TeamScore/
+    BallotSubmission join.
+
+    The team and round are deliberately not copied here, but joined through
+    `debate_team`, so that changing a debate's teams doesn't leave stale rows.
+
+    Rows are rebuilt for a debate whenever a ballot submission or team score
+    for that debate is saved or deleted (see `standings.signals`), and can be
+    rebuilt from scratch using the `rebuildteammetrics` management command."""
+
+    debate_team = models.ForeignKey('draw.DebateTeam', models.CASCADE,
+        verbose_name=_("debate team"))
+    ballot_submission = models.ForeignKey('results.BallotSubmission', models.CASCADE,
+        verbose_name=_("ballot submission"))
+
+    points = models.PositiveSmallIntegerField(null=True, blank=True,
+        verbose_name=_("points"))
+    win = models.NullBooleanField(null=True, blank=True,
+        verbose_name=_("win"))
+    margin = ScoreField(null=True, blank=True,
+        verbose_name=_("margin"))
+    score = ScoreField(null=True, blank=True,
+        verbose_name=_("score"))
+    votes_given = models.PositiveSmallIntegerField(null=True, blank=True,
+        verbose_name=_("votes given"))
+    votes_possible = models.PositiveSmallIntegerField(null=True, blank=True,
+        verbose_name=_("votes possible"))
+    forfeit = models.BooleanField(default=False,
+        verbose_name=_("forfeit"))
+
+    class Meta:
+        verbose_name = _("team round metrics")
+        verbose_name_plural = _("team round metrics")
+
+    def __str__(self):
+        return "[{0.ballot_submission_id}/{0.id}] {0.points}, {0.score} for debate team {0.debate_team_id}".format(self)
@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from draw.models import DebateTeam
+from results.models import BallotSubmission, TeamScore
+
+from .materialized import update_team_round_metrics
+
+# Changes to a DebateTeam's team don't need a receiver, because the materialized
+# metrics are joined to teams and rounds through the debate team.
+
+
+@receiver(post_delete, sender=BallotSubmission)
+@receiver(post_save, sender=BallotSubmission)
+def update_team_round_metrics_for_ballot(sender, instance, **kwargs):
+    # Saving is how ballots are both confirmed and unconfirmed
+    update_team_round_metrics([instance.debate_id])
+
+
+@receiver(post_delete, sender=TeamScore)
+@receiver(post_save, sender=TeamScore)
+def update_team_round_metrics_for_teamscore(sender, instance, **kwargs):
+    if TeamScore._meta.get_field('debate_team').is_cached(instance):
+        debate_id = instance.debate_team.debate_id
+    else:
+        debate_id = DebateTeam.objects.filter(id=instance.debate_team_id).values_list(
+                'debate_id', flat=True).first()
+    if debate_id is None:
+        return  # the debate team is being deleted too, and its metrics with it
+    update_team_round_metrics([debate_id])
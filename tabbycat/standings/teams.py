@@ -2,17 +2,17 @@
 
 import logging
 
-from django.db.models import Avg, Count, FloatField, Func, Prefetch, Q, StdDev, Sum
+from django.db.models import Avg, Count, FloatField, Func, Q, StdDev, Sum
 from django.db.models.functions import Cast
 from django.utils.translation import gettext_lazy as _
 
 from draw.models import DebateTeam
-from draw.prefetch import populate_opponents
 from participants.models import Team
 from tournaments.models import Round
 from results.models import TeamScore
 
 from .base import BaseStandingsGenerator
+from .models import TeamRoundMetrics
 from .metrics import BaseMetricAnnotator, metricgetter, QuerySetMetricAnnotator, RepeatedMetricAnnotator
 from .ranking import BasicRankAnnotator, DivisionRankAnnotator, RankFromInstitutionAnnotator, SubrankAnnotator
 
@@ -39,10 +39,20 @@ class TeamScoreQuerySetMetricAnnotator(QuerySetMetricAnnotator):
     exclude_forfeits = False
     where_value = None
 
+    # If True, TeamStandingsGenerator may compute this metric from the
+    # materialized TeamRoundMetrics table; see get_materialized_annotation().
+    materializable = True
+    materialized_values = None
+
     def get_field(self):
         """Subclasses with complicated fields override this method."""
         return 'debateteam__teamscore__' + self.field
 
+    def get_materialized_field(self):
+        """Returns the equivalent of `get_field()` on TeamRoundMetrics.
+        Subclasses with complicated fields override this method."""
+        return self.field
+
     def get_annotation(self, round=None):
         annotation_filter = Q(
             debateteam__teamscore__ballot_submission__confirmed=True,
@@ -57,6 +67,29 @@ class TeamScoreQuerySetMetricAnnotator(QuerySetMetricAnnotator):
 
         return self.function(self.get_field(), filter=annotation_filter)
 
+    def get_materialized_annotation(self):
+        """Returns the equivalent of `get_annotation()` for an aggregation over
+        TeamRoundMetrics rows. The round and confirmation conditions aren't
+        needed here; the former is applied to the TeamRoundMetrics queryset by
+        the standings generator, and the latter is implied by the table."""
+        conditions = {}
+        if self.exclude_forfeits:
+            conditions['forfeit'] = False
+        if self.where_value is not None:
+            conditions[self.get_materialized_field()] = self.where_value
+        annotation_filter = Q(**conditions) if conditions else None
+        return self.function(self.get_materialized_field(), filter=annotation_filter)
+
+    def annotate(self, queryset, standings, round=None):
+        if self.materialized_values is None:
+            return super().annotate(queryset, standings, round)
+
+        for info in standings.infoview():
+            metric = self.materialized_values.get(info.instance_id)
+            if metric is None:
+                metric = 0
+            info.add_metric(self.key, metric)
+
 
 class Points210MetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     """Metric annotator for team points using win = 2, loss = 1, loss by forfeit = 0."""
@@ -65,6 +98,7 @@ class Points210MetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     abbr = _("Pts")
 
     choice_name = _("Points (2/1/0)")
+    materializable = False  # byes aren't in TeamRoundMetrics
 
     class WinsIncludingForfeits(TeamScoreQuerySetMetricAnnotator):
         function = Count
@@ -170,6 +204,7 @@ class AverageIndividualScoreMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     key = "speaks_ind_avg"
     name = _("average individual speaker score")
     abbr = _("AISS")
+    materializable = False  # based on speaker scores, not team scores
 
     def get_annotation(self, round=None):
         annotation_filter = Q(
@@ -200,36 +235,53 @@ class AverageIndividualScoreMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
 
 
 class DrawStrengthMetricAnnotator(BaseMetricAnnotator):
-    """Metric annotator for draw strength."""
+    """Metric annotator for draw strength, the sum of the points of every
+    opponent a team has faced. In British Parliamentary, all three opponents
+    in each debate count."""
     key = "draw_strength"
     name = _("draw strength")
     abbr = _("DS")
 
-    def annotate(self, queryset, standings, round=None):
-        if not queryset.exists():
-            return
+    def get_debateteam_points(self, tournament, round=None):
+        """Returns a list of `(debate_id, team_id, points)` tuples, one for
+        every preliminary-round debate team in the tournament, where `points`
+        is the points from the confirmed ballot (or None). Uses one query."""
+        debateteams = DebateTeam.objects.filter(
+            debate__round__tournament=tournament,
+            debate__round__stage=Round.STAGE_PRELIMINARY,
+        )
+        if round is not None:
+            debateteams = debateteams.filter(debate__round__seq__lte=round.seq)
 
-        logger.info("Running points query for draw strength:")
+        return debateteams.annotate(points=Sum('teamscore__points',
+            filter=Q(teamscore__ballot_submission__confirmed=True))).values_list(
+            'debate_id', 'team_id', 'points').order_by()
 
-        prefetch_queryset = DebateTeam.objects.filter(debate__round__stage=Round.STAGE_PRELIMINARY)
+    def annotate(self, queryset, standings, round=None):
         if round is not None:
-            prefetch_queryset = prefetch_queryset.filter(debate__round__seq__lte=round.seq)
+            tournament = round.tournament
+        else:
+            first_team = queryset.first()
+            if first_team is None:
+                return
+            tournament = first_team.tournament
+
+        logger.info("Running points query for draw strength:")
 
-        points_queryset = PointsMetricAnnotator().get_annotated_queryset(
-                queryset[0].tournament.team_set.all(), 'points', round).prefetch_related(
-                Prefetch('debateteam_set',queryset=prefetch_queryset, to_attr='debateteams'))
-        points_queryset_teams = {team.id: team for team in points_queryset}
-        points_queryset_debateteams = {team.id: list(team.debateteams) for team in points_queryset}
+        team_points = {}
+        teams_by_debate = {}
+        for debate_id, team_id, points in self.get_debateteam_points(tournament, round):
+            team_points[team_id] = team_points.get(team_id, 0) + (points or 0)
+            teams_by_debate.setdefault(debate_id, []).append(team_id)
 
-        populate_opponents([dt for dts in points_queryset_debateteams.values() for dt in dts])
+        draw_strengths = {}
+        for teams in teams_by_debate.values():
+            for team_id in teams:
+                opponents_points = sum(team_points[other_id] for other_id in teams if other_id != team_id)
+                draw_strengths[team_id] = draw_strengths.get(team_id, 0) + opponents_points
 
-        for team in queryset:
-            draw_strength = 0
-            for dt in points_queryset_debateteams[team.id]:
-                points = points_queryset_teams[dt.opponent.team_id].points
-                if points is not None: # points is None when no debates have happened
-                    draw_strength += points
-            standings.add_metric(team, self.key, draw_strength)
+        for info in standings.infoview():
+            info.add_metric(self.key, draw_strengths.get(info.instance_id, 0))
 
 
 class NumberOfAdjudicatorsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
@@ -254,6 +306,11 @@ class NumberOfAdjudicatorsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
             NullIf('debateteam__teamscore__votes_possible', 0, output_field=FloatField()) *
             self.adjs_per_debate)
 
+    def get_materialized_field(self):
+        return (Cast('votes_given', FloatField()) /
+            NullIf('votes_possible', 0, output_field=FloatField()) *
+            self.adjs_per_debate)
+
     def annotate(self, queryset, standings, round=None):
         super().annotate(queryset, standings, round)
 
@@ -294,43 +351,70 @@ class WhoBeatWhomMetricAnnotator(RepeatedMetricAnnotator):
     name_prefix = _("Who-beat-whom")
     abbr_prefix = _("WBW")
     choice_name = _("who-beat-whom")
+    untied_value = "n/a"  # fail fast if attempt to compare with an int
 
     def __init__(self, index, keys):
         if len(keys) == 0:
             raise ValueError("keys must not be empty")
         super(WhoBeatWhomMetricAnnotator, self).__init__(index, keys)
 
-    def get_team_scores(self, key, equal_teams, tsi, round):
-        equal_teams.remove(tsi)
-        other = equal_teams[0]
+    def group_key(self, tsi, key):
+        """Returns the value on which teams must be tied to be compared.
+        Subclasses may extend this with further conditions."""
+        return key(tsi)
+
+    def get_tied_pairs(self, standings, key):
+        """Groups the standings by `group_key()` in a single pass, and returns
+        a dict mapping each StandingInfo that is tied with exactly one other to
+        that other StandingInfo."""
+        groups = {}
+        for tsi in standings.infoview():
+            groups.setdefault(self.group_key(tsi, key), []).append(tsi)
+
+        pairs = {}
+        for group in groups.values():
+            if len(group) == 2:
+                pairs[group[0]] = group[1]
+                pairs[group[1]] = group[0]
+        return pairs
+
+    def get_head_to_head_points(self, pairs, round):
+        """Returns a dict mapping `(team_id, other_id)` to the total points the
+        first team has earned in debates in which the second team also
+        participated, for all teams in `pairs`, using a single query."""
+        team_ids = [tsi.team.id for tsi in pairs.keys()]
+        if not team_ids:
+            return {}
+
         ts = TeamScore.objects.filter(
             ballot_submission__confirmed=True,
-            debate_team__team=tsi.team,
-            debate_team__debate__debateteam__team=other.team)
+            debate_team__team_id__in=team_ids,
+            debate_team__debate__debateteam__team_id__in=team_ids)
 
         if round is not None:
             ts = ts.filter(debate_team__debate__round__seq__lte=round.seq)
 
-        ts = ts.aggregate(Sum('points'))
-        logger.info("who beat whom, %s %s vs %s %s: %s",
-            tsi.team.short_name, key(tsi), other.team.short_name, key(other),
-            ts["points__sum"])
-        return ts
+        ts = ts.values('debate_team__team_id', 'debate_team__debate__debateteam__team_id').annotate(
+                points=Sum('points')).order_by()
+        return {(row['debate_team__team_id'], row['debate_team__debate__debateteam__team_id']): row['points']
+                for row in ts}
 
     def annotate(self, queryset, standings, round=None):
         key = metricgetter(*self.keys)
-
-        def who_beat_whom(tsi):
-            equal_teams = [x for x in standings.infoview() if key(x) == key(tsi)]
-            if len(equal_teams) != 2:
-                return "n/a"  # fail fast if attempt to compare with an int
-
-            ts = self.get_team_scores(key, equal_teams, tsi, round)
-            return ts["points__sum"] or 0
+        pairs = self.get_tied_pairs(standings, key)
+        points = self.get_head_to_head_points(pairs, round)
 
         for tsi in standings.infoview():
-            wbw = who_beat_whom(tsi)
-            tsi.add_metric(self.key, wbw)
+            try:
+                other = pairs[tsi]
+            except KeyError:
+                tsi.add_metric(self.key, self.untied_value)
+                continue
+
+            wbw = points.get((tsi.team.id, other.team.id))
+            logger.info("who beat whom, %s %s vs %s %s: %s",
+                tsi.team.short_name, key(tsi), other.team.short_name, key(other), wbw)
+            tsi.add_metric(self.key, wbw or 0)
 
 
 class DivisionsWhoBeatWhomMetricAnnotator(WhoBeatWhomMetricAnnotator):
@@ -341,21 +425,10 @@ class DivisionsWhoBeatWhomMetricAnnotator(WhoBeatWhomMetricAnnotator):
     name_prefix = _("Who-beat-whom (in division)")
     abbr_prefix = _("WBWD")
     choice_name = _("who-beat-whom (in divisions)")
+    untied_value = 0
 
-    def annotate(self, queryset, standings, round=None):
-        key = metricgetter(*self.keys)
-
-        def who_beat_whom_divisions(tsi):
-            equal_teams = [x for x in standings.infoview() if key(x) == key(tsi) and x.team.division == tsi.team.division]
-            if len(equal_teams) != 2:
-                return 0  # Fail fast if attempt to compare with an int
-
-            ts = self.get_team_scores(key, equal_teams, tsi, round)
-            return ts["points__sum"] or 0
-
-        for tsi in standings.infoview():
-            wbwd = who_beat_whom_divisions(tsi)
-            tsi.add_metric(self.key, wbwd)
+    def group_key(self, tsi, key):
+        return (key(tsi), tsi.team.division_id)
 
 
 # ==============================================================================
@@ -371,8 +444,16 @@ class TeamStandingsGenerator(BaseStandingsGenerator):
         standings = generator.generate(teams)
 
     The generate() method returns a TeamStandings object.
+
+    If the "materialized" option is True, metrics based on team scores are all
+    computed in a single query from the materialized TeamRoundMetrics table,
+    rather than with one aggregation over team scores per metric. Metrics that
+    can't be computed from that table are computed as usual.
     """
 
+    DEFAULT_OPTIONS = BaseStandingsGenerator.DEFAULT_OPTIONS.copy()
+    DEFAULT_OPTIONS["materialized"] = False
+
     TIEBREAK_FUNCTIONS = BaseStandingsGenerator.TIEBREAK_FUNCTIONS.copy()
     TIEBREAK_FUNCTIONS["shortname"] = lambda x: x.sort(key=lambda y: y.team.short_name)
     TIEBREAK_FUNCTIONS["institution"] = lambda x: x.sort(key=lambda y: y.team.institution.name)
@@ -401,3 +482,35 @@ class TeamStandingsGenerator(BaseStandingsGenerator):
         "division"    : DivisionRankAnnotator,
         "institution" : RankFromInstitutionAnnotator,
     }
+
+    def generate(self, queryset, round=None):
+        if self.options["materialized"]:
+            self._load_materialized_metrics(queryset, round)
+        return super().generate(queryset, round)
+
+    def _load_materialized_metrics(self, queryset, round=None):
+        """Computes every materializable metric from TeamRoundMetrics in one
+        grouped query, and hands the values to the respective annotators."""
+        annotators = [annotator for annotator in self.metric_annotators
+                      if getattr(annotator, 'materializable', False)]
+        if not annotators:
+            return
+
+        metrics = TeamRoundMetrics.objects.filter(
+            debate_team__team_id__in=queryset.values_list('id', flat=True),
+            debate_team__debate__round__stage=Round.STAGE_PRELIMINARY,
+        )
+        if round is not None:
+            metrics = metrics.filter(debate_team__debate__round__seq__lte=round.seq)
+
+        # Annotation names mustn't clash with TeamRoundMetrics fields (e.g. "points")
+        annotations = {"metric%d" % i: annotator.get_materialized_annotation()
+                       for i, annotator in enumerate(annotators)}
+        values = [dict() for annotator in annotators]
+        for row in metrics.order_by().values('debate_team__team_id').annotate(**annotations):
+            for i, team_values in enumerate(values):
+                team_values[row['debate_team__team_id']] = row["metric%d" % i]
+
+        logger.debug("Loaded %d materialized metrics for %d teams", len(annotators), len(values[0]))
+        for annotator, team_values in zip(annotators, values):
+            annotator.materialized_values = team_values
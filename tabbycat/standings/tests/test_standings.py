@@ -1,5 +1,7 @@
 from django.test import TestCase
 
+from ..materialized import rebuild_team_round_metrics, team_round_metrics_deferred
+from ..models import TeamRoundMetrics
 from ..teams import TeamStandingsGenerator
 
 from adjallocation.models import DebateAdjudicator
@@ -95,26 +97,114 @@ class TestBasicStandings(TestCase):
     def test_invalid_wbw(self):
         self.assertRaises(ValueError, TeamStandingsGenerator, ('wbw', 'points'), ('rank'))
 
+    def check_standings(self, testdata, tournament, teams, **options):
+        for metrics in testdata["rankings"].keys():
+            with self.subTest(metrics=metrics, **options):
+                generator = TeamStandingsGenerator(metrics, self.rankings, **options)
+                standings = generator.generate(tournament.team_set.all())
+
+                self.assertEqual(len(standings), len(testdata["standings"]))
+                self.assertEqual(standings.metric_keys, list(metrics))
+
+                for teamname, expected in testdata["standings"].items():
+                    team = teams[teamname]
+                    standing = standings.get_standing(team)
+                    for metric in metrics:
+                        self.assertEqual(standing.metrics[metric], expected[metric])
+
+                ranked_teams = [teams[x] for x in testdata["rankings"][metrics]]
+                self.assertEqual(ranked_teams, standings.get_instance_list())
+
     def test_standings(self):
         for index, testdata in self.testdata.items():
             tournament, teams = self.setup_testdata(testdata)
-            for metrics in testdata["rankings"].keys():
-                with self.subTest(index=index, metrics=metrics):
-                    generator = TeamStandingsGenerator(metrics, self.rankings)
-                    standings = generator.generate(tournament.team_set.all())
+            self.check_standings(testdata, tournament, teams)
 
-                    self.assertEqual(len(standings), len(testdata["standings"]))
-                    self.assertEqual(standings.metric_keys, list(metrics))
+    def test_materialized_standings(self):
+        for index, testdata in self.testdata.items():
+            tournament, teams = self.setup_testdata(testdata)
+            rebuild_team_round_metrics(tournament)
+            self.check_standings(testdata, tournament, teams, materialized=True)
 
-                    for teamname, expected in testdata["standings"].items():
-                        team = teams[teamname]
-                        standing = standings.get_standing(team)
-                        for metric in metrics:
-                            self.assertEqual(standing.metrics[metric], expected[metric])
+    def test_materialized_from_signals(self):
+        # Metrics are materialized as the ballots and team scores are created
+        for index, testdata in self.testdata.items():
+            tournament, teams = self.setup_testdata(testdata)
+            self.check_standings(testdata, tournament, teams, materialized=True)
+
+    def assertMaterializedMatchesLive(self, tournament, teams):
+        metrics = ('points', 'speaks_sum', 'margin_sum')
+        live = TeamStandingsGenerator(metrics, ()).generate(tournament.team_set.all())
+        materialized = TeamStandingsGenerator(metrics, (), materialized=True).generate(tournament.team_set.all())
+        for team in teams.values():
+            self.assertEqual(live.get_standing(team).metrics, materialized.get_standing(team).metrics)
 
-                    ranked_teams = [teams[x] for x in testdata["rankings"][metrics]]
-                    self.assertEqual(ranked_teams, standings.get_instance_list())
+    def test_materialized_unconfirmed(self):
+        for index, testdata in self.testdata.items():
+            tournament, teams = self.setup_testdata(testdata)
+            debate = Debate.objects.filter(round__tournament=tournament).first()
+            for ballotsub in BallotSubmission.objects.filter(debate=debate):
+                ballotsub.confirmed = False
+                ballotsub.save()
+            self.assertFalse(TeamRoundMetrics.objects.filter(debate_team__debate=debate).exists())
+            self.assertMaterializedMatchesLive(tournament, teams)
+
+    def test_materialized_deferred(self):
+        for index, testdata in self.testdata.items():
+            tournament, teams = self.setup_testdata(testdata)
+            debate = Debate.objects.filter(round__tournament=tournament).first()
+            with team_round_metrics_deferred():
+                BallotSubmission.objects.filter(debate=debate).first().delete()
+                self.assertTrue(TeamRoundMetrics.objects.filter(debate_team__debate=debate).exists())
+            self.assertFalse(TeamRoundMetrics.objects.filter(debate_team__debate=debate).exists())
+            self.assertMaterializedMatchesLive(tournament, teams)
+
+    def test_materialized_team_changed(self):
+        for index, testdata in self.testdata.items():
+            tournament, teams = self.setup_testdata(testdata)
+            debate = Debate.objects.filter(round__tournament=tournament).first()
+            aff, neg = DebateTeam.objects.filter(debate=debate).order_by('side')
+            aff.team, neg.team = neg.team, aff.team
+            aff.save()
+            neg.save()
+            self.assertMaterializedMatchesLive(tournament, teams)
 
     # TODO check that WBW is correct when not in first metrics
     # TODO check that it doesn't break when not all metrics present
     # TODO check that it works for different rounds
+
+
+class TestBritishParliamentaryDrawStrength(TestCase):
+
+    # Each debate lists teams in OG, OO, CG, CO order, with their points
+    debates = [[{'A': 3, 'B': 2, 'C': 1, 'D': 0}, {'E': 3, 'F': 2, 'G': 1, 'H': 0}],
+               [{'A': 0, 'E': 1, 'C': 3, 'G': 2}, {'B': 3, 'F': 0, 'D': 2, 'H': 1}]]
+
+    # Total points after both rounds are A 3, B 5, C 4, D 2, E 4, F 2, G 3, H 1,
+    # so e.g. A's draw strength is (B + C + D) + (E + C + G) = 11 + 11
+    expected = {'A': 22, 'B': 14, 'C': 20, 'D': 20, 'E': 16, 'F': 16, 'G': 18, 'H': 18}
+
+    def setUp(self):
+        self.tournament = Tournament.objects.create(slug="bpstandingstest", name="BP standings test")
+        self.tournament.preferences['debate_rules__teams_in_debate'] = 'bp'
+        inst = Institution.objects.create(code="BP", name="British Parliamentary")
+        self.teams = {name: Team.objects.create(tournament=self.tournament, institution=inst, reference=name,
+                use_institution_prefix=False) for name in "ABCDEFGH"}
+        sides = [DebateTeam.SIDE_OG, DebateTeam.SIDE_OO, DebateTeam.SIDE_CG, DebateTeam.SIDE_CO]
+
+        for seq, debates in enumerate(self.debates, start=1):
+            rd = Round.objects.create(tournament=self.tournament, seq=seq, abbreviation="R{:d}".format(seq))
+            for points in debates:
+                debate = Debate.objects.create(round=rd)
+                ballotsub = BallotSubmission.objects.create(debate=debate, confirmed=True)
+                for (name, team_points), side in zip(points.items(), sides):
+                    dt = DebateTeam.objects.create(debate=debate, team=self.teams[name], side=side)
+                    TeamScore.objects.create(debate_team=dt, ballot_submission=ballotsub, points=team_points)
+
+    def test_draw_strength(self):
+        for materialized in [False, True]:
+            with self.subTest(materialized=materialized):
+                generator = TeamStandingsGenerator(('points', 'draw_strength'), (), materialized=materialized)
+                standings = generator.generate(self.tournament.team_set.all())
+                for name, draw_strength in self.expected.items():
+                    self.assertEqual(standings.get_standing(self.teams[name]).metrics['draw_strength'], draw_strength)
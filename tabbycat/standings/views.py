@@ -18,7 +18,7 @@ from results.models import SpeakerScore, TeamScore
 from tournaments.mixins import PublicTournamentPageMixin, RoundMixin, SingleObjectFromTournamentMixin, TournamentMixin
 from tournaments.models import Round
 from utils.misc import reverse_tournament
-from utils.mixins import AdministratorMixin
+from utils.mixins import AdministratorMixin, ConditionalGetMixin
 from utils.views import VueTableTemplateView
 from utils.tables import TabbycatTableBuilder
 
@@ -130,7 +130,7 @@ class BaseStandingsView(RoundMixin, VueTableTemplateView):
         return mark_safe(message + instructions)
 
 
-class PublicTabMixin(PublicTournamentPageMixin):
+class PublicTabMixin(ConditionalGetMixin, PublicTournamentPageMixin):
     """Mixin for views that should only be allowed when the tab is released publicly."""
     cache_timeout = settings.TAB_PAGES_CACHE_TIMEOUT
 
@@ -437,7 +437,8 @@ class BaseTeamStandingsView(BaseStandingsView):
                 to_attr='break_categories_nongeneral'))
         metrics = self.tournament.pref('team_standings_precedence')
         extra_metrics = self.tournament.pref('team_standings_extra_metrics')
-        generator = TeamStandingsGenerator(metrics, self.rankings, extra_metrics)
+        generator = TeamStandingsGenerator(metrics, self.rankings, extra_metrics,
+                materialized=self.tournament.pref('team_standings_materialized'))
         standings = generator.generate(teams, round=self.round)
         self.limit_rank_display(standings)
 
@@ -559,7 +560,7 @@ class PublicBreakCategoryTabView(PublicTabMixin, BaseBreakCategoryStandingsView)
 # Current team standings (win-loss records only)
 # ==============================================================================
 
-class PublicCurrentTeamStandingsView(PublicTournamentPageMixin, VueTableTemplateView):
+class PublicCurrentTeamStandingsView(ConditionalGetMixin, PublicTournamentPageMixin, VueTableTemplateView):
 
     public_page_preference = 'public_team_standings'
     page_title = gettext_lazy("Current Team Standings")
@@ -3,7 +3,6 @@ import logging
 import warnings
 from urllib.parse import urlparse, urlunparse
 
-from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from django.urls import NoReverseMatch
 from django.contrib import messages
@@ -17,13 +16,14 @@ from django.views.generic.base import ContextMixin
 from django.views.generic.detail import SingleObjectMixin
 
 from adjallocation.models import DebateAdjudicator
-from breakqual.utils import calculate_live_thresholds, determine_liveness
+from breakqual.utils import determine_liveness, get_break_probabilities, get_live_thresholds
 from draw.models import DebateTeam, MultipleDebateTeamsError, NoDebateTeamFoundError
 from participants.models import Region, Speaker
 from participants.prefetch import populate_feedback_scores, populate_win_counts
 
 from utils.misc import redirect_tournament, reverse_round, reverse_tournament
 from utils.mixins import AssistantMixin, CacheMixin, TabbycatPageTitlesMixin
+from utils.objectcache import get_cached_object, tournament_version_key
 
 
 from .models import Round, Tournament
@@ -61,17 +61,11 @@ class TournamentMixin(TabbycatPageTitlesMixin):
         if hasattr(self, "_tournament_from_url"):
             return self._tournament_from_url
 
-        # then look in cache,
+        # then look in cache, and if it's not there, retrieve the object
         slug = self.kwargs[self.tournament_slug_url_kwarg]
         key = self.tournament_cache_key.format(slug=slug)
-        cached_tournament = cache.get(key)
-        if cached_tournament:
-            self._tournament_from_url = cached_tournament
-            return cached_tournament
-
-        # and if it was in neither place, retrieve the object
-        tournament = get_object_or_404(Tournament, slug=slug)
-        cache.set(key, tournament, None)
+        tournament = get_cached_object(key, tournament_version_key(slug),
+                lambda: get_object_or_404(Tournament, slug=slug))
         self._tournament_from_url = tournament
         return tournament
 
@@ -153,18 +147,12 @@ class RoundMixin(TournamentMixin):
         if hasattr(self, "_round_from_url"):
             return self._round_from_url
 
-        # then look in cache,
+        # then look in cache, and if it's not there, retrieve the object
         tournament = self.tournament
         seq = self.kwargs[self.round_seq_url_kwarg]
         key = self.round_cache_key.format(slug=tournament.slug, seq=seq)
-        cached_round = cache.get(key)
-        if cached_round:
-            self._round_from_url = cached_round
-            return cached_round
-
-        # and if it was in neither place, retrieve the object
-        round = get_object_or_404(Round, tournament=tournament, seq=seq)
-        cache.set(key, round, None)
+        round = get_cached_object(key, tournament_version_key(tournament.slug),
+                lambda: get_object_or_404(Round, tournament=tournament, seq=seq))
         self._round_from_url = round
         return round
 
@@ -350,6 +338,7 @@ class DrawForDragAndDropMixin(RoundMixin):
                 bc['class'] = breaks_seq[bc['id']]
                 points = serialised_team['points']
                 bc['will_break'] = determine_liveness(thresholds[bc['id']], points)
+                bc['break_probability'] = self.break_probabilities.get(bc['id'], {}).get(serialised_team['id'], 0)
 
         return serialised_team
 
@@ -372,9 +361,11 @@ class DrawForDragAndDropMixin(RoundMixin):
 
     @cached_property
     def break_thresholds(self):
-        t = self.tournament
-        r = self.round
-        return {bc.id: calculate_live_thresholds(bc, t, r) for bc in self.break_categories}
+        return get_live_thresholds(self.tournament, self.round)
+
+    @cached_property
+    def break_probabilities(self):
+        return get_break_probabilities(self.tournament, self.round)
 
     @cached_property
     def regions(self):
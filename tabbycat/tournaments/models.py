@@ -1,6 +1,5 @@
 from django.db import models
 from django.db.models import Count, Prefetch, Q
-from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.urls import reverse
 from django.utils.functional import cached_property
@@ -9,6 +8,7 @@ from django.utils.translation import gettext_lazy as _
 from participants.models import Person
 from utils.managers import LookupByNameFieldsMixin
 from utils.misc import reverse_round
+from utils.objectcache import get_cached_object, preferences_version_key, tournament_version_key
 
 import logging
 logger = logging.getLogger(__name__)
@@ -70,12 +70,30 @@ class Tournament(models.Model):
         """Keep a record in this instance, to avoid hitting the cache
         unnecessarily. Note that this means that, if a tournament preference is
         changed, an instance of the Tournament (Python) object that has already
-        queries that preference value won't pick up on the change."""
+        queries that preference value won't pick up on the change.
+
+        The first call loads all preferences at once, from the snapshot
+        returned by `preferences_snapshot()`."""
         try:
             return self._prefs[name]
         except KeyError:
-            self._prefs[name] = self.preferences.get_by_name(name)
-            return self._prefs[name]
+            pass
+
+        if not self._prefs:
+            self._prefs = self.preferences_snapshot()
+            if name in self._prefs:
+                return self._prefs[name]
+
+        self._prefs[name] = self.preferences.get_by_name(name)
+        return self._prefs[name]
+
+    def preferences_snapshot(self):
+        """Returns a dict mapping the names of all of this tournament's
+        preferences to their values. The dict is loaded in one go and cached,
+        and is shared by all instances of this tournament, until any of its
+        preferences is changed (see options/signals.py)."""
+        cached_key = "%d_%s" % (self.id, 'preferences_snapshot')
+        return get_cached_object(cached_key, preferences_version_key(self.id), self.preferences.by_name)
 
     @property
     def sides(self):
@@ -206,12 +224,10 @@ class Tournament(models.Model):
 
     @cached_property
     def get_current_round_cached(self):
-        cached_key = "%s_current_round_object" % self.slug
-        if self.current_round:
-            cache.get_or_set(cached_key, self.current_round, None)
-            return cache.get(cached_key)
-        else:
+        if self.current_round_id is None:
             return None
+        cached_key = "%s_current_round_object" % self.slug
+        return get_cached_object(cached_key, tournament_version_key(self.slug), lambda: self.current_round)
 
     @cached_property
     def billable_teams(self):
@@ -1,8 +1,20 @@
-from django.core.cache import cache
-from django.db.models.signals import post_delete, post_save
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
+from adjallocation.models import DebateAdjudicator
+from adjfeedback.models import AdjudicatorFeedback
+from breakqual.models import BreakCategory, BreakingTeam
+from draw.models import Debate, DebateTeam
+from motions.models import Motion
+from participants.models import Adjudicator, Speaker, Team
+from results.models import BallotSubmission
 from tournaments.models import Round, Tournament
+from venues.models import Venue, VenueCategory
+from utils.objectcache import bump_version, tournament_version_key
+from utils.publiccache import bump_data_versions, data_version_bumps_deferred
+
+from .utils import get_debate_round_ids, get_round_tournament_id
 
 import logging
 logger = logging.getLogger(__name__)
@@ -10,23 +22,104 @@ logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=Tournament)
 def update_tournament_cache(sender, instance, **kwargs):
-    cached_key = "%s_%s" % (instance.slug, 'object')
-    cache.delete(cached_key)
-    cached_key = "%s_%s" % (instance.slug, 'current_round_object')
-    cache.delete(cached_key)
+    # This also invalidates the cached rounds and current round
+    bump_version(tournament_version_key(instance.slug))
+    bump_data_versions(instance.id)
 
 
 @receiver(post_delete, sender=Round)
 @receiver(post_save, sender=Round)
 def update_round_cache(sender, instance, **kwargs):
-    cached_key = "%s_%s_%s" % (instance.tournament.slug, instance.seq, 'object')
-    cache.delete(cached_key)
-    logger.debug("Cleared cache %s for %s" % (cached_key, instance))
-
-    # Update the tournament cache as well if either this is the current round,
-    # or the current round is None (this might mean the current round was deleted).
-    current_round_id = instance.tournament.current_round_id
-    if current_round_id == instance.id or current_round_id is None:
-        logger.debug("Cleared %s tournament cache because the current round is %s" %
-                (instance.tournament.slug, instance if current_round_id == instance.id else current_round_id))
-        update_tournament_cache(sender, instance.tournament, **kwargs)
+    update_tournament_cache(sender, instance.tournament, **kwargs)
+    bump_data_versions(instance.tournament_id, instance.id)
+    logger.debug("Cleared object cache for %s because %s changed" % (instance.tournament.slug, instance))
+
+
+# ==============================================================================
+# Data versions of public pages (see utils/publiccache.py)
+# ==============================================================================
+
+@receiver(post_delete, sender=Debate)
+@receiver(post_save, sender=Debate)
+@receiver(post_delete, sender=Motion)
+@receiver(post_save, sender=Motion)
+def update_round_data_version(sender, instance, **kwargs):
+    if data_version_bumps_deferred():
+        return  # the caller will bump the round's versions itself
+    tournament_id = get_round_tournament_id(instance)
+    if tournament_id is None:
+        return  # the round is being deleted too, which bumps its version itself
+    bump_data_versions(tournament_id, instance.round_id)
+
+
+@receiver(post_delete, sender=DebateTeam)
+@receiver(post_save, sender=DebateTeam)
+@receiver(post_delete, sender=DebateAdjudicator)
+@receiver(post_save, sender=DebateAdjudicator)
+@receiver(post_delete, sender=BallotSubmission)
+@receiver(post_save, sender=BallotSubmission)
+def update_debate_data_version(sender, instance, **kwargs):
+    if data_version_bumps_deferred():
+        return  # the caller will bump the round's versions itself
+    ids = get_debate_round_ids(instance)
+    if ids is None:
+        return  # the debate is being deleted too
+    bump_data_versions(*ids)
+
+
+@receiver(post_delete, sender=Team)
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Adjudicator)
+@receiver(post_save, sender=Adjudicator)
+@receiver(post_delete, sender=BreakCategory)
+@receiver(post_save, sender=BreakCategory)
+@receiver(post_delete, sender=Venue)
+@receiver(post_save, sender=Venue)
+def update_tournament_data_version(sender, instance, **kwargs):
+    if instance.tournament_id is not None:  # shared adjudicators and venues have no tournament
+        bump_data_versions(instance.tournament_id)
+
+
+@receiver(post_delete, sender=Speaker)
+@receiver(post_save, sender=Speaker)
+def update_tournament_data_version_for_speaker(sender, instance, **kwargs):
+    try:
+        bump_data_versions(instance.team.tournament_id)
+    except ObjectDoesNotExist:
+        return  # the team is being deleted too
+
+
+@receiver(post_delete, sender=BreakingTeam)
+@receiver(post_save, sender=BreakingTeam)
+def update_tournament_data_version_for_break(sender, instance, **kwargs):
+    try:
+        bump_data_versions(instance.break_category.tournament_id)
+    except ObjectDoesNotExist:
+        return  # the category is being deleted too
+
+
+@receiver(post_delete, sender=AdjudicatorFeedback)
+@receiver(post_save, sender=AdjudicatorFeedback)
+def update_tournament_data_version_for_feedback(sender, instance, **kwargs):
+    try:
+        tournament_id = instance.adjudicator.tournament_id
+    except ObjectDoesNotExist:
+        return  # the adjudicator is being deleted too
+    if tournament_id is not None:
+        bump_data_versions(tournament_id)
+
+
+@receiver(m2m_changed, sender=Team.break_categories.through)
+def update_tournament_data_version_for_eligibility(sender, instance, action, **kwargs):
+    # `instance` is a team or a break category, depending on which side changed
+    if action.startswith('post_'):
+        bump_data_versions(instance.tournament_id)
+
+
+@receiver(m2m_changed, sender=VenueCategory.venues.through)
+def update_tournament_data_version_for_venue_categories(sender, instance, action, **kwargs):
+    # Venue categories aren't tied to a tournament, so changes to a category
+    # itself (e.g. its name) aren't covered; only changes made from the venue
+    # side of the relation are.
+    if action.startswith('post_') and isinstance(instance, Venue) and instance.tournament_id is not None:
+        bump_data_versions(instance.tournament_id)
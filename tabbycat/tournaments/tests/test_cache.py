@@ -0,0 +1,232 @@
+import hashlib
+from unittest.mock import call, Mock, patch
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.views.generic import View
+
+from draw.models import Debate
+from participants.models import Institution, Team
+from tournaments.mixins import RoundMixin
+from tournaments.models import Round, Tournament
+from tournaments.views import TournamentPublicHomeView
+from utils.mixins import ConditionalGetMixin
+from utils.objectcache import get_cached_object, local_cache, team_version_key, tournament_version_key
+from utils.publiccache import (bump_data_versions, bump_data_versions_once, get_counts, invalidate_public_pages,
+                               prewarmer, serve_cached_page)
+
+# The test settings use DummyCache, which doesn't store anything
+cache = LocMemCache('objectcache-test', {})
+
+
+@patch('utils.objectcache.cache', cache)
+class TestObjectCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.t = Tournament.objects.create(slug="objectcache", name="Object Cache")
+        self.key = "%s_%s" % (self.t.slug, 'object')
+        self.version_key = tournament_version_key(self.t.slug)
+
+    def get_tournament(self):
+        return get_cached_object(self.key, self.version_key, lambda: Tournament.objects.get(slug=self.t.slug))
+
+    def test_served_from_local_cache(self):
+        self.get_tournament()
+        cache.delete("%s_%d" % (self.key, cache.get(self.version_key)))  # local copy should still be used
+        with self.assertNumQueries(0):
+            tournament = self.get_tournament()
+        self.assertEqual(tournament, self.t)
+
+    def test_copies_returned(self):
+        first = self.get_tournament()
+        first.name = "Changed"
+        self.assertEqual(self.get_tournament().name, "Object Cache")
+
+    def test_invalidated_on_save(self):
+        self.get_tournament()
+        self.t.name = "Renamed"
+        self.t.save()
+        self.assertEqual(self.get_tournament().name, "Renamed")
+
+    def test_invalidated_on_round_save(self):
+        round = Round.objects.create(tournament=self.t, seq=1, name="Round 1", abbreviation="R1")
+        key = "%s_%d_%s" % (self.t.slug, 1, 'object')
+        get_cached_object(key, self.version_key, lambda: Round.objects.get(pk=round.pk))
+        round.name = "First Round"
+        round.save()
+        cached_round = get_cached_object(key, self.version_key, lambda: Round.objects.get(pk=round.pk))
+        self.assertEqual(cached_round.name, "First Round")
+
+    def test_team_institutions_not_kept_locally(self):
+        institution = Institution.objects.create(name="Object Cache University", code="OCU")
+        team = Team.objects.create(tournament=self.t, institution=institution, reference="1")
+        self.assertEqual(Team.objects.get(pk=team.pk).get_cached_institution(), institution)
+        self.assertEqual(local_cache.entries, {})
+
+    def test_team_institution_in_one_call(self):
+        institution = Institution.objects.create(name="Object Cache University", code="OCU")
+        team = Team.objects.create(tournament=self.t, institution=institution, reference="1")
+        Team.objects.get(pk=team.pk).get_cached_institution()
+
+        team = Team.objects.get(pk=team.pk)
+        with patch('utils.objectcache.cache', Mock(wraps=cache)) as shared_cache, self.assertNumQueries(0):
+            self.assertEqual(team.get_cached_institution(), institution)
+        self.assertEqual(shared_cache.method_calls, [call.get_many([team_version_key(team.id),
+                "teamid_%d__institution__object" % team.id])])
+
+        institution.name = "Renamed University"
+        institution.save()  # saves its teams, which bumps their versions
+        self.assertEqual(Team.objects.get(pk=team.pk).get_cached_institution().name, "Renamed University")
+
+    def test_preferences_snapshot(self):
+        self.t.preferences_snapshot()
+        tournament = Tournament.objects.get(pk=self.t.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(tournament.pref('teams_in_debate'), 'two')
+            self.assertEqual(tournament.pref('teams_in_debate'), 'two')
+
+        self.t.preferences['debate_rules__teams_in_debate'] = 'bp'
+        tournament = Tournament.objects.get(pk=self.t.pk)
+        self.assertEqual(tournament.pref('teams_in_debate'), 'bp')
+
+    def test_public_cache_key_includes_content_version(self):
+        view = TournamentPublicHomeView()
+        view.kwargs = {'tournament_slug': self.t.slug}
+        prefix = view.get_cache_key_prefix()
+        self.assertEqual(view.get_cache_key_prefix(), prefix)
+
+        # TestCase never commits, so run on-commit callbacks straight away
+        with patch('utils.publiccache.transaction.on_commit', side_effect=lambda func: func()):
+            invalidate_public_pages(self.t)
+        self.assertNotEqual(view.get_cache_key_prefix(), prefix)
+
+    def test_prewarm_paths(self):
+        paths = list(prewarmer.get_paths(self.t.slug, {None, 2}))
+        self.assertIn("/%s/draw/" % self.t.slug, paths)
+        self.assertIn("/%s/results/round/2/" % self.t.slug, paths)
+        self.assertEqual(len(paths), len(set(paths)))
+
+
+@patch('utils.publiccache.cache', cache)
+class TestSingleFlightPageCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().get('/tournament/draw/')
+
+    def serve(self, dispatch, key_prefix="tournament_1"):
+        return serve_cached_page(self.request, dispatch, 60, key_prefix, "tournament_stale")
+
+    def test_recompute_then_hit(self):
+        dispatch = Mock(return_value=HttpResponse("draw"))
+        self.serve(dispatch)
+        response = self.serve(dispatch)
+        self.assertEqual(dispatch.call_count, 1)
+        self.assertEqual(response.content, b"draw")
+        self.assertEqual(get_counts(), {'hits': 1, 'stale': 0, 'recomputes': 1, 'not_modified': 0})
+
+    def test_stale_served_while_locked(self):
+        self.serve(Mock(return_value=HttpResponse("old draw")))
+
+        # Another worker is recomputing the page under a new content version
+        uri_hash = hashlib.md5(self.request.build_absolute_uri().encode()).hexdigest()
+        cache.add("tournament_stale_recompute_lock_%s" % uri_hash, 1)
+        dispatch = Mock(return_value=HttpResponse("new draw"))
+        response = self.serve(dispatch, key_prefix="tournament_2")
+        self.assertFalse(dispatch.called)
+        self.assertEqual(response.content, b"old draw")
+        self.assertEqual(get_counts(), {'hits': 0, 'stale': 1, 'recomputes': 1, 'not_modified': 0})
+
+    def test_errors_not_cached(self):
+        dispatch = Mock(return_value=HttpResponse("error", status=500))
+        self.serve(dispatch)
+        self.serve(dispatch)
+        self.assertEqual(dispatch.call_count, 2)
+
+
+class ConditionalRoundView(ConditionalGetMixin, RoundMixin, View):
+    round_data_versions = True
+
+    def get(self, request, *args, **kwargs):
+        return self.render_to_response({})
+
+    def render_to_response(self, context):
+        return HttpResponse("page")
+
+
+# TestCase never commits, so run on-commit callbacks straight away
+@patch('utils.objectcache.cache', cache)
+@patch('utils.publiccache.cache', cache)
+@patch('utils.publiccache.transaction.on_commit', lambda func: func())
+class TestConditionalGet(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.t = Tournament.objects.create(slug="conditional", name="Conditional")
+        self.rounds = [Round.objects.create(tournament=self.t, seq=seq, name="Round %d" % seq,
+                abbreviation="R%d" % seq) for seq in [1, 2]]
+        self.view = ConditionalRoundView.as_view()
+
+    def get(self, **headers):
+        request = RequestFactory().get('/conditional/round/1/', **headers)
+        return self.view(request, tournament_slug=self.t.slug, round_seq=1)
+
+    def test_not_modified(self):
+        etag = self.get()['ETag']
+        with self.assertNumQueries(0):
+            response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(get_counts()['not_modified'], 1)
+
+    def test_modified_by_own_round_only(self):
+        etag = self.get()['ETag']
+        Debate.objects.create(round=self.rounds[1])
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Debate.objects.create(round=self.rounds[0])
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_bumped_on_commit(self):
+        etag = self.get()['ETag']
+        with patch('utils.publiccache.transaction.on_commit') as on_commit:
+            Debate.objects.create(round=self.rounds[0])
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        for args, kwargs in on_commit.call_args_list:
+            args[0]()
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_modified_by_tournament_data(self):
+        etag = self.get()['ETag']
+        Team.objects.create(tournament=self.t, reference="Conditional")
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_last_modified(self):
+        last_modified = self.get()['Last-Modified']
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+
+@patch('utils.objectcache.cache', cache)
+class TestDataVersionBumps(TestCase):
+
+    def setUp(self):
+        self.t = Tournament.objects.create(slug="bumps", name="Bumps")
+        self.round = Round.objects.create(tournament=self.t, seq=1, name="Round 1", abbreviation="R1")
+
+    def test_bumped_once_per_transaction(self):
+        # TestCase runs each test in a transaction, so these are all pending
+        pending = len(connection.run_on_commit)
+        bump_data_versions(self.t.id, self.round.id)
+        bump_data_versions(self.t.id, self.round.id)
+        bump_data_versions(self.t.id)
+        self.assertEqual(len(connection.run_on_commit), pending + 2)
+
+    def test_bumped_once_per_block(self):
+        with patch('utils.publiccache.transaction.on_commit') as on_commit:
+            with bump_data_versions_once(self.t.id, self.round.id):
+                for i in range(3):
+                    Debate.objects.create(round=self.round)
+        self.assertEqual(on_commit.call_count, 1)
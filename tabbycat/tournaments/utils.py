@@ -221,3 +221,22 @@ def send_standings_emails(tournament, teams, request, round):
         raise
     else:
         SentMessageRecord.objects.bulk_create([message.as_sent_record() for message in messages])
+
+
+def get_round_tournament_id(instance):
+    """Returns the tournament ID of the round of `instance`, using the round if
+    it's already cached, and otherwise a single query."""
+    if instance._meta.get_field('round').is_cached(instance):
+        return instance.round.tournament_id
+    return Round.objects.filter(id=instance.round_id).values_list('tournament_id', flat=True).first()
+
+
+def get_debate_round_ids(instance):
+    """Returns the tournament and round IDs of the debate of `instance`, using
+    the debate and round if they're already cached, and otherwise a single
+    query. Returns None if the debate no longer exists."""
+    if instance._meta.get_field('debate').is_cached(instance):
+        debate = instance.debate
+        tournament_id = get_round_tournament_id(debate)
+        return None if tournament_id is None else (tournament_id, debate.round_id)
+    return Round.objects.filter(debate__id=instance.debate_id).values_list('tournament_id', 'id').first()
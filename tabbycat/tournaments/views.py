@@ -18,6 +18,7 @@ from django.views.generic.edit import CreateView, FormView, UpdateView
 
 from actionlog.mixins import LogActionMixin
 from actionlog.models import ActionLogEntry
+from adjallocation.utils import invalidate_histories_cache_once
 from draw.models import Debate
 from notifications.models import SentMessageRecord
 from participants.models import Team
@@ -27,6 +28,7 @@ from tournaments.models import Round
 from utils.forms import SuperuserCreationForm
 from utils.misc import redirect_round, redirect_tournament, reverse_tournament
 from utils.mixins import AdministratorMixin, AssistantMixin, CacheMixin, TabbycatPageTitlesMixin, WarnAboutDatabaseUseMixin
+from utils.publiccache import bump_data_versions_once
 from utils.views import BadJsonRequestError, JsonDataResponsePostView, PostOnlyRedirectView
 
 from .forms import SetCurrentRoundForm, TournamentConfigureForm, TournamentStartForm
@@ -378,6 +380,8 @@ class BaseSaveDragAndDropDebateJsonView(AdministratorMixin, RoundMixin, LogActio
             raise BadJsonRequestError("Malformed JSON provided")
 
         debate = self.get_debate(posted_debate['id'])
-        debate = self.modify_debate(debate, posted_debate)
+        with invalidate_histories_cache_once(self.tournament.id), \
+                bump_data_versions_once(self.tournament.id, self.round.id):
+            debate = self.modify_debate(debate, posted_debate)
         self.log_action(content_object=debate)
         return json.dumps(debate.serialize())
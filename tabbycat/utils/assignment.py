@@ -0,0 +1,111 @@
+"""Solvers for the assignment problem, used by the BP Hungarian draw generator,
+the Hungarian adjudicator allocators and the venue allocator.
+
+Two backends are available:
+ - "munkres", the pure-Python implementation in the munkres package, which is
+   always installed; and
+ - "scipy", which uses `scipy.optimize.linear_sum_assignment()` and is much
+   faster on large matrices. SciPy is optional; if it isn't installed, the
+   munkres backend is used instead.
+
+Both accept either a list of lists or a NumPy array of costs, which may be
+rectangular, and return a list of `(row, column)` tuples sorted by row. Cells
+that must not be used are marked with `DISALLOWED`, as in munkres.
+"""
+
+import logging
+import time
+
+import numpy as np
+from munkres import DISALLOWED, Munkres, UnsolvableMatrix
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+logger = logging.getLogger(__name__)
+
+
+class BaseAssignmentSolver:
+
+    name = None  # must be set by subclasses
+
+    def compute(self, costs):
+        raise NotImplementedError
+
+    def solve(self, costs):
+        """Solves the assignment problem presented by the cost matrix `costs`,
+        logging how long it took. Returns a list of indices (row, col)
+        describing the optimal assignment."""
+        start = time.perf_counter()
+        logger.info("Running %s assignment solver for %d rows...", self.name, len(costs))
+        indices = self.compute(costs)
+        total_cost = sum(costs[i][j] for i, j in indices)
+        elapsed = time.perf_counter() - start
+        logger.info("Assignment took %.2f seconds, total cost: %f", elapsed, total_cost)
+        return indices
+
+
+class MunkresAssignmentSolver(BaseAssignmentSolver):
+
+    name = "munkres"
+
+    def __init__(self):
+        self.munkres = Munkres()
+
+    def compute(self, costs):
+        if isinstance(costs, np.ndarray):
+            costs = costs.tolist()
+        return self.munkres.compute(costs)
+
+
+class ScipyAssignmentSolver(BaseAssignmentSolver):
+
+    name = "scipy"
+
+    @staticmethod
+    def _to_array(costs):
+        """Returns a tuple `(matrix, disallowed)`, where `matrix` is a float
+        array of costs, and `disallowed` is a boolean array marking DISALLOWED
+        cells (or None if there are none). Disallowed cells are given a finite
+        cost greater than that of any assignment using only allowed cells."""
+        if isinstance(costs, np.ndarray):
+            return costs.astype(float), None
+
+        disallowed = np.array([[cost is DISALLOWED for cost in row] for row in costs], dtype=bool)
+        matrix = np.array([[0 if cost is DISALLOWED else cost for cost in row] for row in costs], dtype=float)
+        if not disallowed.any():
+            return matrix, None
+
+        allowed_costs = np.abs(matrix[~disallowed])
+        largest = allowed_costs.max() if allowed_costs.size else 0.0
+        matrix[disallowed] = (largest + 1) * (min(matrix.shape) + 1)
+        return matrix, disallowed
+
+    def compute(self, costs):
+        matrix, disallowed = self._to_array(costs)
+        if matrix.size == 0:
+            return []
+        rows, cols = linear_sum_assignment(matrix)
+        if disallowed is not None and disallowed[rows, cols].any():
+            raise UnsolvableMatrix("This matrix cannot be solved without using disallowed cells")
+        return [(int(i), int(j)) for i, j in zip(rows, cols)]
+
+
+ASSIGNMENT_SOLVERS = {
+    "munkres": MunkresAssignmentSolver,
+    "scipy": ScipyAssignmentSolver,
+}
+
+
+def get_assignment_solver(name):
+    """Returns an assignment solver using the backend `name`, falling back to
+    munkres if SciPy is requested but not installed."""
+    if name == "scipy" and linear_sum_assignment is None:
+        logger.warning("SciPy isn't installed, so using munkres to solve assignment problems")
+        name = "munkres"
+    try:
+        return ASSIGNMENT_SOLVERS[name]()
+    except KeyError:
+        raise ValueError("Unrecognised assignment solver: {0}".format(name))
@@ -0,0 +1,87 @@
+"""Coalesced broadcasting of websocket messages.
+
+Views that notify websocket groups (e.g. of ballot statuses or action log
+entries) can do so many times a second when several people are entering data
+at once. Rather than sending each message to the group as it happens, messages
+passed to `broadcast()` are held for `WEBSOCKET_BROADCAST_WINDOW` seconds, then
+all messages for the same group are sent together as a single list. Consumers
+handle these with their `broadcast_batch()` method.
+
+Messages are only coalesced within a single process. If the window is zero,
+each message is sent immediately (still as a list of one). Pending messages are
+sent when the process exits (see `flush_all()`), so that they aren't lost when a
+worker is restarted."""
+
+import atexit
+import logging
+import threading
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CoalescingBroadcaster:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+
+    @property
+    def window(self):
+        return getattr(settings, 'WEBSOCKET_BROADCAST_WINDOW', 0)
+
+    def broadcast(self, group_name, data):
+        if self.window <= 0:
+            self.send(group_name, [data])
+            return
+
+        with self.lock:
+            if group_name in self.pending:
+                self.pending[group_name].append(data)
+                return
+            self.pending[group_name] = [data]
+
+        timer = threading.Timer(self.window, self.flush, args=(group_name,))
+        timer.daemon = True
+        timer.start()
+
+    def flush(self, group_name):
+        with self.lock:
+            batch = self.pending.pop(group_name, [])
+        if batch:
+            self.send(group_name, batch)
+
+    def flush_all(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for group_name, batch in pending.items():
+            self.send(group_name, batch)
+
+    def send(self, group_name, batch):
+        logger.debug("Broadcasting %d messages to %s", len(batch), group_name)
+        async_to_sync(get_channel_layer().group_send)(group_name, {
+            "type": "broadcast_batch",
+            "data": batch,
+        })
+
+
+broadcaster = CoalescingBroadcaster()
+
+
+def broadcast(group_name, data):
+    """Sends `data` to the websocket group `group_name`, batched with any other
+    messages to the same group in the current window."""
+    broadcaster.broadcast(group_name, data)
+
+
+def flush_all():
+    """Sends all pending messages now, without waiting for their windows to
+    close. This is called when the process exits, including from gunicorn's
+    `worker_exit` hook."""
+    broadcaster.flush_all()
+
+
+atexit.register(flush_all)
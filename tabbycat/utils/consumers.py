@@ -1,11 +1,14 @@
 from asgiref.sync import async_to_sync
-from django.core.cache import cache
 from django.shortcuts import get_object_or_404
 
-from channels.generic.websocket import JsonWebsocketConsumer
+from channels.auth import get_user
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer, JsonWebsocketConsumer
 
 from tournaments.models import Tournament
 
+from .objectcache import get_cached_object, tournament_version_key
+
 
 class WSLoginRequiredMixin():
 
@@ -41,17 +44,11 @@ class TournamentConsumer(JsonWebsocketConsumer):
         if hasattr(self, "_tournament_from_url"):
             return self._tournament_from_url
 
-        # Then look in cache
+        # Then look in cache, and if it's not there, retrieve the object
         slug = self.scope["url_route"]["kwargs"][self.tournament_slug_url_kwarg]
         key = self.tournament_cache_key.format(slug=slug)
-        cached_tournament = cache.get(key)
-        if cached_tournament:
-            self._tournament_from_url = cached_tournament
-            return cached_tournament
-
-        # If it was in neither place, retrieve the object
-        tournament = get_object_or_404(Tournament, slug=slug)
-        cache.set(key, tournament, None)
+        tournament = get_cached_object(key, tournament_version_key(slug),
+                lambda: get_object_or_404(Tournament, slug=slug))
         self._tournament_from_url = tournament
         return tournament
 
@@ -68,6 +65,10 @@ class TournamentConsumer(JsonWebsocketConsumer):
         })
         return super()
 
+    def broadcast_batch(self, event):
+        # Messages coalesced by utils.broadcast; sent to the client as a list
+        self.send_json({'data': event['data']})
+
     def connect(self):
         if self.authentication_needed():
             async_to_sync(self.channel_layer.group_add)(
@@ -82,3 +83,61 @@ class TournamentConsumer(JsonWebsocketConsumer):
             self.group_name(), self.channel_name
         )
         super().disconnect(message)
+
+
+class AsyncTournamentConsumer(AsyncJsonWebsocketConsumer):
+    """Asynchronous version of TournamentConsumer. Connections don't occupy a
+    thread each. Anything that blocks, which includes the shared cache as well
+    as the database, is done in a worker thread via `database_sync_to_async`:
+    the user is resolved once on connecting, and the tournament is looked up
+    once per connection. Subclasses that need the database or cache in
+    handlers should do likewise."""
+
+    group_prefix = None
+
+    tournament_slug_url_kwarg = "tournament_slug"
+    tournament_cache_key = "{slug}_object"
+
+    async def tournament(self):
+        # First look in self
+        if hasattr(self, "_tournament_from_url"):
+            return self._tournament_from_url
+
+        # Then look in cache, and if it's not there, retrieve the object
+        slug = self.scope["url_route"]["kwargs"][self.tournament_slug_url_kwarg]
+        key = self.tournament_cache_key.format(slug=slug)
+        tournament = await database_sync_to_async(get_cached_object)(key, tournament_version_key(slug),
+                lambda: get_object_or_404(Tournament, slug=slug))
+        self._tournament_from_url = tournament
+        return tournament
+
+    async def resolve_user(self):
+        # The user from AuthMiddlewareStack is a lazy object that would query
+        # the database (synchronously) on first use, so resolve it up front
+        self.scope["user"] = await get_user(self.scope)
+
+    async def group_name(self):
+        return self.group_prefix + '_' + (await self.tournament()).slug
+
+    async def send_error(self, error, message, original_content):
+        # Need to forcibly decode the string (for translations)
+        await self.send_json({
+            'error': str(error),
+            'message': str(message),
+            'original_content': original_content,
+            'component_id': original_content['component_id']
+        })
+
+    async def broadcast_batch(self, event):
+        # Messages coalesced by utils.broadcast; sent to the client as a list
+        await self.send_json({'data': event['data']})
+
+    async def connect(self):
+        await self.resolve_user()
+        if self.authentication_needed():
+            await self.channel_layer.group_add(await self.group_name(), self.channel_name)
+            await self.accept()
+
+    async def disconnect(self, message):
+        await self.channel_layer.group_discard(await self.group_name(), self.channel_name)
+        await super().disconnect(message)
@@ -22,7 +22,7 @@ def debate_context(request):
 
         context.update({
             'tournament': request.tournament,
-            'pref': request.tournament.preferences.by_name(),
+            'pref': request.tournament.preferences_snapshot(),
             'current_round': current_round,
         })
         if hasattr(request, 'round'):
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from utils.publiccache import get_counts, reset_counts
+
+
+class Command(BaseCommand):
+
+    help = "Shows how often cached public pages were served fresh, served stale, recomputed or not modified"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Reset the counts after showing them")
+
+    def handle(self, *args, **options):
+        counts = get_counts()
+        total = sum(counts.values())
+        for name, label in [('hits', "Cache hits"), ('stale', "Stale serves"), ('recomputes', "Recomputations"),
+                            ('not_modified', "Not modified")]:
+            self.stdout.write("{:<16s} {:8d} ({:.1%})".format(label + ":", counts[name],
+                    counts[name] / total if total else 0))
+        if options["reset"]:
+            reset_counts()
+            self.stdout.write("Counts have been reset")
@@ -0,0 +1,98 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.conf.urls import url
+from django.test.utils import override_settings
+
+from actionlog.consumers import ActionLogEntryConsumer, AsyncActionLogEntryConsumer
+from results.consumers import (AsyncBallotResultConsumer, AsyncBallotStatusConsumer,
+                               BallotResultConsumer, BallotStatusConsumer)
+from utils.management.base import TournamentCommand
+
+STREAMS = {
+    'action_logs': (ActionLogEntryConsumer, AsyncActionLogEntryConsumer),
+    'ballot_results': (BallotResultConsumer, AsyncBallotResultConsumer),
+    'ballot_statuses': (BallotStatusConsumer, AsyncBallotStatusConsumer),
+}
+
+IN_MEMORY_CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels.layers.InMemoryChannelLayer",
+        "CONFIG": {"capacity": 10000},
+    },
+}
+
+
+def with_user(inner, user):
+    """Stands in for AuthMiddlewareStack, giving every connection `user`."""
+    def application(scope):
+        return inner(dict(scope, user=user))
+    return application
+
+
+class Command(TournamentCommand):
+
+    help = "Opens many local websocket clients to one of the tournament's streams and times " \
+           "how long it takes to connect them and to broadcast messages to all of them. " \
+           "This runs in-process, using an in-memory channel layer; it doesn't need a " \
+           "server and doesn't modify the database."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("-n", "--clients", type=int, default=200,
+            help="Number of websocket clients to open (default 200)")
+        parser.add_argument("-m", "--messages", type=int, default=20,
+            help="Number of messages to broadcast to the group (default 20)")
+        parser.add_argument("-s", "--stream", choices=STREAMS.keys(), default='ballot_statuses',
+            help="Stream to connect to (default ballot_statuses)")
+        parser.add_argument("--sync", action="store_true",
+            help="Use the synchronous consumers instead of the asynchronous ones, for comparison")
+
+    def handle_tournament(self, tournament, **options):
+        sync_consumer, async_consumer = STREAMS[options["stream"]]
+        consumer = sync_consumer if options["sync"] else async_consumer
+        self.stdout.write("Load testing {:s} with {:d} clients on \"{:s}\"".format(
+                consumer.__name__, options["clients"], tournament.name))
+
+        with override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS):
+            loop = asyncio.get_event_loop()
+            loop.run_until_complete(self.run_clients(tournament, consumer, **options))
+
+    async def run_clients(self, tournament, consumer, **options):
+        user = SimpleNamespace(is_authenticated=True, is_superuser=True)
+        application = with_user(URLRouter([
+            url(r'^ws/(?P<tournament_slug>[-\w_]+)/%s/$' % options["stream"], consumer),
+        ]), user)
+        path = "/ws/%s/%s/" % (tournament.slug, options["stream"])
+
+        start = time.perf_counter()
+        communicators = [WebsocketCommunicator(application, path) for i in range(options["clients"])]
+        results = await asyncio.gather(*[c.connect(timeout=30) for c in communicators])
+        elapsed = time.perf_counter() - start
+        nconnected = sum(connected for connected, subprotocol in results)
+        self.stdout.write("  Connected {:d} of {:d} clients in {:.2f} s".format(
+                nconnected, len(communicators), elapsed))
+
+        group_name = consumer.group_prefix + "_" + tournament.slug
+        channel_layer = get_channel_layer()
+
+        start = time.perf_counter()
+        for i in range(options["messages"]):
+            await channel_layer.group_send(group_name, {
+                "type": "broadcast_batch",
+                "data": [{"sequence": i}],
+            })
+        nreceived = 0
+        for communicator in communicators:
+            for i in range(options["messages"]):
+                await communicator.receive_json_from(timeout=30)
+                nreceived += 1
+        elapsed = time.perf_counter() - start
+        self.stdout.write("  Delivered {:d} messages in {:.2f} s ({:.0f} messages/s)".format(
+                nreceived, elapsed, nreceived / elapsed if elapsed else 0))
+
+        await asyncio.gather(*[c.disconnect() for c in communicators])
@@ -1,8 +1,9 @@
-from django.core.cache import cache
 from django.shortcuts import get_object_or_404
 
 from tournaments.models import Round, Tournament
 
+from .objectcache import get_cached_object, tournament_version_key
+
 
 class DebateMiddleware(object):
 
@@ -15,28 +16,14 @@ class DebateMiddleware(object):
 
     def process_view(self, request, view_func, view_args, view_kwargs):
         if 'tournament_slug' in view_kwargs:
-            cached_key = "%s_%s" % (view_kwargs['tournament_slug'], 'object')
-            cached_tournament_object = cache.get(cached_key)
-
-            if cached_tournament_object:
-                request.tournament = cached_tournament_object
-            else:
-                request.tournament = get_object_or_404(
-                    Tournament,
-                    slug=view_kwargs['tournament_slug'])
-                cache.set(cached_key, request.tournament, None)
+            slug = view_kwargs['tournament_slug']
+            version_key = tournament_version_key(slug)
+            request.tournament = get_cached_object("%s_%s" % (slug, 'object'), version_key,
+                    lambda: get_object_or_404(Tournament, slug=slug))
 
             if 'round_seq' in view_kwargs:
-                cached_key = "%s_%s_%s" % (view_kwargs['tournament_slug'],
-                                           view_kwargs['round_seq'], 'object')
-                cached_round_object = cache.get(cached_key)
-                if cached_round_object:
-                    request.round = cached_round_object
-                else:
-                    request.round = get_object_or_404(
-                        Round,
-                        tournament=request.tournament,
-                        seq=view_kwargs['round_seq'])
-                    cache.set(cached_key, request.round, None)
+                seq = view_kwargs['round_seq']
+                request.round = get_cached_object("%s_%s_%s" % (slug, seq, 'object'), version_key,
+                        lambda: get_object_or_404(Round, tournament=request.tournament, seq=seq))
 
         return None
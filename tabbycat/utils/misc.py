@@ -1,5 +1,6 @@
 import logging
 
+from django.db import IntegrityError, transaction
 from django.urls import reverse
 from django.utils import formats, timezone, translation
 from django.shortcuts import redirect
@@ -50,3 +51,49 @@ def badge_datetime_format(timestamp):
 
     localized_time = timezone.localtime(timestamp)
     return formats.date_format(localized_time, format=fmt)
+
+
+def assign_unique_keys(instances, generate_key, find_existing, save, num_attempts=10):
+    """Assigns a unique key to every instance in `instances`, in bulk.
+
+    On each attempt, a candidate key is generated in memory for each remaining
+    instance by calling `generate_key()`. `find_existing(keys)` should return
+    the set of `keys` already in the database, using a single query, and
+    `save(assignments)` should write the list of `(instance, key)` pairs that
+    didn't collide, also in bulk. Only instances whose keys collided (with the
+    database or with each other) are tried again.
+
+    Returns a list of the instances that still had no unique key after
+    `num_attempts` attempts."""
+
+    remaining = list(instances)
+
+    for i in range(1, num_attempts + 1):
+        if not remaining:
+            break
+
+        candidates = {}
+        collided = []
+        for instance in remaining:
+            key = generate_key()
+            if key in candidates:
+                collided.append(instance)
+            else:
+                candidates[key] = instance
+
+        existing = find_existing(list(candidates.keys()))
+        assignments = [(instance, key) for key, instance in candidates.items() if key not in existing]
+        collided.extend(instance for key, instance in candidates.items() if key in existing)
+
+        try:
+            with transaction.atomic():
+                save(assignments)
+        except IntegrityError:
+            # A key was taken between checking and saving, so try the whole batch again
+            collided.extend(instance for instance, key in assignments)
+
+        remaining = collided
+        if remaining and i < num_attempts:
+            logger.warning("%d keys were not unique, trying again (%d of %d)", len(remaining), i, num_attempts)
+
+    return remaining
@@ -1,13 +1,19 @@
+import hashlib
 import os
 import logging
 
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.db import connection
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.utils.translation import get_language
 from django.views.generic.base import ContextMixin
 
+from .objectcache import (content_version_key, get_version, get_versions, preferences_version_key,
+                          round_data_version_key, rounds_data_version_key, tournament_data_version_key)
+from .publiccache import count, serve_cached_page
+
 logger = logging.getLogger(__name__)
 
 
@@ -88,10 +94,82 @@ class WarnAboutDatabaseUseMixin(ContextMixin):
 
 
 class CacheMixin:
-    """Mixin for views that cache the page and need to update quickly."""
+    """Mixin for views that cache the page and need to update quickly.
+
+    On tournament pages, the cache key includes the tournament's content
+    version, so that cached pages are superseded as soon as their content
+    changes. Only one worker recomputes a page at a time, while others serve
+    a stale copy; see utils/publiccache.py."""
 
     cache_timeout = settings.PUBLIC_FAST_CACHE_TIMEOUT
 
-    @method_decorator(cache_page(cache_timeout))
-    def dispatch(self, *args, **kwargs):
-        return super().dispatch(*args, **kwargs)
+    def get_cache_key_prefix(self):
+        slug = self.kwargs.get('tournament_slug')
+        if slug is None:
+            return settings.CACHE_MIDDLEWARE_KEY_PREFIX
+        return "%s_%d" % (slug, get_version(content_version_key(slug)))
+
+    def get_stale_cache_key_prefix(self):
+        slug = self.kwargs.get('tournament_slug')
+        return "%s_stale" % (slug or settings.CACHE_MIDDLEWARE_KEY_PREFIX)
+
+    def dispatch(self, request, *args, **kwargs):
+        dispatch = super().dispatch
+        if request.method not in ('GET', 'HEAD'):
+            return dispatch(request, *args, **kwargs)
+        return serve_cached_page(request, lambda: dispatch(request, *args, **kwargs), self.cache_timeout,
+                self.get_cache_key_prefix(), self.get_stale_cache_key_prefix())
+
+
+class ConditionalGetMixin:
+    """Mixin for cached public tournament pages that answers conditional GET
+    requests without rendering the page, or even fetching it from the cache.
+    Must come before `CacheMixin` (and any access checks) in the bases.
+
+    The ETag and Last-Modified date of the page are derived from data versions;
+    see utils/publiccache.py. Pages that show a single round, `self.round`,
+    should set `round_data_versions` to True, so that changes to other rounds
+    don't affect them."""
+
+    round_data_versions = False
+
+    def get_data_version_keys(self):
+        tournament = self.tournament
+        keys = [content_version_key(tournament.slug), preferences_version_key(tournament.id),
+                tournament_data_version_key(tournament.id)]
+        round = self.round if self.round_data_versions else None
+        if round is not None:
+            keys.append(round_data_version_key(round.id))
+        else:
+            keys.append(rounds_data_version_key(tournament.id))
+        return keys
+
+    def get_cache_key_prefix(self):
+        # So that cached copies are never older than the ETag they're sent with
+        return "%s_%s" % (super().get_cache_key_prefix(), self.versions_digest)
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+
+        versions = get_versions(self.get_data_version_keys())
+        self.versions_digest = hashlib.md5(repr(versions).encode()).hexdigest()
+
+        # Pages also depend on the language and the session (e.g., who's logged in)
+        session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME, '')
+        etag_source = "|".join([self.versions_digest, request.get_full_path(), get_language() or '', session_key])
+        self.etag = quote_etag(hashlib.md5(etag_source.encode()).hexdigest())
+        self.last_modified = max(versions) // 1000000  # versions are in microseconds
+
+        response = get_conditional_response(request, etag=self.etag, last_modified=self.last_modified)
+        if response is not None:
+            if response.status_code == 304:
+                count('not_modified')
+            return response
+        return super().dispatch(request, *args, **kwargs)
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        response['ETag'] = self.etag
+        response['Last-Modified'] = http_date(self.last_modified)
+        return response
@@ -0,0 +1,185 @@
+"""Two-tier caching of frequently used model instances.
+
+Tournaments, rounds and the like are looked up on almost every request. Rather
+than fetching and unpickling them from the shared cache (Redis) every time,
+`get_cached_object()` keeps recently used objects in a small least-recently-used
+cache in each process, in front of the shared cache.
+
+Each object is filed under a version key, which is stored in the shared cache
+and bumped by `bump_version()` (typically from signal handlers) when the object
+changes. A lookup fetches just the current version from the shared cache; if
+the local copy has the same version, it's used, otherwise the object is taken
+from the shared cache (under a key that includes the version) or, failing that,
+from the database. This way, changes invalidate local copies in every process,
+without relying on timeouts.
+
+Objects are kept pickled in the local cache, so that each caller gets its own
+copy, since views often annotate and cache things on the instances they use.
+Objects that are numerous but individually seldom used, like the institutions
+of teams, should be kept out of the local cache (`local=False`), so that they
+don't push out the tournaments and rounds it's meant for. These are stored in
+the shared cache along with their version, under a key that doesn't include
+it, so that the version and object are fetched in a single call.
+
+Bumping a version doesn't delete the copies filed under the old one; instead,
+versioned copies in the shared cache expire after `OBJECT_CACHE_TIMEOUT`
+seconds, so that they don't accumulate."""
+
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+def new_version():
+    # Versions start from the current time, so that if the shared cache is
+    # cleared, old versions in local caches won't be mistaken for new ones.
+    return int(time.time() * 1000000)
+
+
+class LocalObjectCache:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    @property
+    def maxsize(self):
+        return getattr(settings, 'OBJECT_CACHE_SIZE', 256)
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'OBJECT_CACHE_TIMEOUT', 60 * 60 * 24)
+
+    def get(self, key, version):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self.entries.move_to_end(key)
+        return pickle.loads(entry[1])
+
+    def set(self, key, version, value):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (version, data)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_cache = LocalObjectCache()
+
+
+def get_version(version_key):
+    version = cache.get(version_key)
+    if version is None:
+        version = new_version()
+        if not cache.add(version_key, version, None):
+            version = cache.get(version_key, version)
+    return version
+
+
+def get_versions(version_keys):
+    """Like `get_version()`, but fetches a list of versions in one call."""
+    versions = cache.get_many(version_keys)
+    return [versions[key] if key in versions else get_version(key) for key in version_keys]
+
+
+def bump_version(version_key):
+    """Invalidates all objects cached under `version_key`, in every process.
+    Since the new version is the current time, versions also say (roughly) when
+    what they cover last changed."""
+    cache.set(version_key, new_version(), None)
+
+
+def get_cached_object(key, version_key, fetch, local=True):
+    """Returns the object cached under `key`, if it's current with respect to
+    `version_key`. Otherwise, calls `fetch()` to retrieve the object, and
+    caches it before returning it. Any exception raised by `fetch()` (e.g.
+    `Http404`) is propagated, and nothing is cached. If `fetch()` returns
+    None, so does this function. If `local` is False, the object is only kept
+    in the shared cache."""
+    if not local:
+        return _get_shared_object(key, version_key, fetch)
+
+    version = get_version(version_key)
+    value = local_cache.get(key, version)
+    if value is not None:
+        return value
+
+    versioned_key = "%s_%d" % (key, version)
+    value = cache.get(versioned_key)
+    if value is None:
+        logger.debug("Object cache miss for %s", versioned_key)
+        value = fetch()
+        if value is None:
+            return None
+        cache.set(versioned_key, value, local_cache.timeout)
+    local_cache.set(key, version, value)
+    return value
+
+
+def _get_shared_object(key, version_key, fetch):
+    values = cache.get_many([version_key, key])
+    version = values[version_key] if version_key in values else get_version(version_key)
+    entry = values.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    logger.debug("Object cache miss for %s", key)
+    value = fetch()
+    if value is None:
+        return None
+    cache.set(key, (version, value), local_cache.timeout)
+    return value
+
+
+# ------------------------------------------------------------------------------
+# Keys for commonly cached objects
+# ------------------------------------------------------------------------------
+
+def tournament_version_key(slug):
+    """Covers the tournament, its rounds and its current round."""
+    return "%s_objects_version" % slug
+
+
+def team_version_key(team_id):
+    return "teamid_%d_objects_version" % team_id
+
+
+def preferences_version_key(tournament_id):
+    return "%d_preferences_version" % tournament_id
+
+
+def content_version_key(slug):
+    """Covers cached public pages; see utils/publiccache.py."""
+    return "%s_content_version" % slug
+
+
+def tournament_data_version_key(tournament_id):
+    """Covers data shown on public pages that isn't specific to a round, like
+    participants and the break."""
+    return "%d_tournament_data_version" % tournament_id
+
+
+def round_data_version_key(round_id):
+    """Covers data of a round shown on public pages: its draw, results and
+    motions."""
+    return "roundid_%d_data_version" % round_id
+
+
+def rounds_data_version_key(tournament_id):
+    """Covers data of all rounds of a tournament; bumped whenever any of their
+    round data versions is."""
+    return "%d_rounds_data_version" % tournament_id
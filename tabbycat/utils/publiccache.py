@@ -0,0 +1,299 @@
+"""Event-driven invalidation and pre-warming of cached public pages.
+
+Public pages are cached by `CacheMixin`, under a key prefix that includes a
+per-tournament content version. When something that public pages show changes
+(a draw or motion is released, a ballot is confirmed, a break is generated),
+`invalidate_public_pages()` bumps the version, so every cached public page of
+that tournament is superseded at once, rather than living on until it times
+out.
+
+It then pre-warms the most visited public pages: after a short window (so that
+a burst of changes, like ballots being confirmed, only causes one pre-warm),
+a background thread renders each page through the usual middleware, which
+stores it in the cache. This way, the first visitors after a draw release
+don't all miss the cache and hit the database at once. The pages are rendered
+as for a visitor without cookies, using the host, scheme and language of the
+request that caused the change, since these form part of the cache key.
+Pages that aren't enabled are rendered as errors, which aren't cached.
+
+Pre-warming is skipped if the cache is a dummy cache, or if the
+`PUBLIC_CACHE_PREWARM` setting is False. As with broadcasts, pending pages are
+only coalesced within a single process.
+
+When a cached page has expired (or been superseded), `serve_cached_page()`
+makes sure that only one worker recomputes it at a time. Each page is also
+stored as a "stale" copy, which lasts for `PUBLIC_STALE_CACHE_TIMEOUT` seconds
+and doesn't depend on the content version; while one worker recomputes a page,
+other requests for it are served the stale copy, if there is one. Counts of
+cache hits, stale serves and recomputations are kept in the shared cache, and
+can be shown with the `publiccachestats` command.
+
+Public pages using `ConditionalGetMixin` also answer conditional GET requests,
+which clients polling the draw or results send. Their ETag and Last-Modified
+date are derived from data versions, which signal handlers bump through
+`bump_data_versions()` when the data public pages show changes. Checking
+these costs a single call to the shared cache, so a client whose copy is
+current gets a 304 without the page being rendered, or even fetched from the
+cache. Within a transaction, each version is bumped at most once, and code that
+saves many things in one round can use `bump_data_versions_once()` so that
+signal handlers don't look up the round of each one."""
+
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.base import BaseHandler
+from django.db import connection, transaction
+from django.http import HttpRequest
+from django.urls import NoReverseMatch, reverse
+from django.utils.cache import get_cache_key, has_vary_header, learn_cache_key, patch_response_headers
+
+from .objectcache import (bump_version, content_version_key, round_data_version_key, rounds_data_version_key,
+                          tournament_data_version_key)
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ['hits', 'stale', 'recomputes', 'not_modified']
+
+# Names of URLs to pre-warm, and whether each needs a round sequence number
+PREWARM_PAGES = [
+    ('tournament-public-index', False),
+    ('draw-public-current-round', False),
+    ('motions-public', False),
+    ('results-public-round', True),
+    ('standings-public-tab-team', False),
+    ('standings-public-tab-speaker', False),
+    ('breakqual-public-index', False),
+]
+
+# Request headers that affect the cache key of a public page
+PREWARM_META_KEYS = ['HTTP_HOST', 'SERVER_NAME', 'SERVER_PORT', 'HTTP_X_FORWARDED_PROTO',
+                     'HTTP_ACCEPT_LANGUAGE', 'wsgi.url_scheme']
+
+
+class PublicPagePrewarmer:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self._handler = None
+
+    @property
+    def window(self):
+        return getattr(settings, 'PUBLIC_CACHE_PREWARM_DELAY', 2)
+
+    @property
+    def enabled(self):
+        backend = settings.CACHES['default']['BACKEND']
+        return getattr(settings, 'PUBLIC_CACHE_PREWARM', True) and not backend.endswith('DummyCache')
+
+    @property
+    def handler(self):
+        with self.lock:
+            if self._handler is None:
+                self._handler = BaseHandler()
+                self._handler.load_middleware()
+        return self._handler
+
+    def schedule(self, slug, meta, round_seq=None):
+        with self.lock:
+            if slug in self.pending:
+                self.pending[slug][1].add(round_seq)
+                return
+            self.pending[slug] = (meta, {round_seq})
+
+        timer = threading.Timer(self.window, self.prewarm, args=(slug,))
+        timer.daemon = True
+        timer.start()
+
+    def get_paths(self, slug, round_seqs):
+        for name, needs_round in PREWARM_PAGES:
+            kwargs_list = [{'round_seq': seq} for seq in round_seqs if seq is not None] if needs_round else [{}]
+            for kwargs in kwargs_list:
+                try:
+                    yield reverse(name, kwargs=dict(kwargs, tournament_slug=slug))
+                except NoReverseMatch:
+                    logger.warning("Can't pre-warm %s, no matching URL", name)
+
+    def prewarm(self, slug):
+        with self.lock:
+            meta, round_seqs = self.pending.pop(slug)
+        try:
+            for path in self.get_paths(slug, round_seqs):
+                self.render(path, meta)
+        except Exception:
+            logger.exception("Error pre-warming public pages for %s", slug)
+        finally:
+            connection.close()  # this thread's connection won't be closed otherwise
+
+    def render(self, path, meta):
+        request = HttpRequest()
+        request.method = 'GET'
+        request.path = request.path_info = path
+        request.META = dict(meta, REQUEST_METHOD='GET', PATH_INFO=path)
+        response = self.handler.get_response(request)
+        logger.debug("Pre-warmed %s: %d", path, response.status_code)
+
+
+prewarmer = PublicPagePrewarmer()
+
+
+def invalidate_public_pages(tournament, request=None, round=None):
+    """Supersedes all cached public pages of `tournament`, once the current
+    transaction (if any) is committed. If `request` is given, the main public
+    pages, including the results of `round`, are then pre-warmed."""
+
+    def on_commit():
+        bump_version(content_version_key(tournament.slug))
+        if request is not None and prewarmer.enabled:
+            meta = {key: request.META[key] for key in PREWARM_META_KEYS if key in request.META}
+            prewarmer.schedule(tournament.slug, meta, round.seq if round is not None else None)
+
+    transaction.on_commit(on_commit)
+
+
+_pending_bumps = threading.local()
+_deferred_bumps = threading.local()
+
+
+def bump_data_versions(tournament_id, round_id=None):
+    """Marks data shown on public pages of the tournament as changed, once the
+    current transaction (if any) is committed. If `round_id` is given, the data
+    belongs to that round; otherwise, it isn't specific to any round.
+
+    Bumping before the commit would let a request in between render the old
+    data and cache it, with its ETag, under the new versions. For the same
+    reason, callers that update derived data (like the materialized team
+    metrics) after saving should bump again once they're done."""
+
+    key = (tournament_id, round_id)
+    try:
+        pending = _pending_bumps.callbacks
+    except AttributeError:
+        pending = _pending_bumps.callbacks = {}
+
+    # Skip if the same bump is already waiting for this transaction. If the
+    # (inner) transaction it was waiting for was rolled back, Django has
+    # discarded it, so it's no longer in `run_on_commit`.
+    if connection.in_atomic_block and key in pending:
+        if any(func is pending[key] for sids, func in connection.run_on_commit):
+            return
+
+    def on_commit():
+        if pending.get(key) is on_commit:
+            del pending[key]
+        if round_id is None:
+            bump_version(tournament_data_version_key(tournament_id))
+        else:
+            bump_version(round_data_version_key(round_id))
+            bump_version(rounds_data_version_key(tournament_id))
+
+    pending[key] = on_commit
+    transaction.on_commit(on_commit)
+
+
+def data_version_bumps_deferred():
+    return getattr(_deferred_bumps, 'depth', 0) > 0
+
+
+@contextmanager
+def bump_data_versions_once(tournament_id, round_id):
+    """Within this block, signal handlers don't bump data versions for debates
+    and their teams, adjudicators, ballots and motions; instead, the versions of
+    the round are bumped once at the end. Use this around operations that save
+    many of them, all in the given round."""
+    _deferred_bumps.depth = getattr(_deferred_bumps, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _deferred_bumps.depth -= 1
+        bump_data_versions(tournament_id, round_id)
+
+
+# ------------------------------------------------------------------------------
+# Single-flight page caching
+# ------------------------------------------------------------------------------
+
+def counter_key(name):
+    return "public_cache_%s_count" % name
+
+
+def count(name):
+    try:
+        cache.incr(counter_key(name))
+    except ValueError:
+        if not cache.add(counter_key(name), 1, None):
+            cache.incr(counter_key(name))
+
+
+def get_counts():
+    """Returns a dict of the number of cache hits, stale serves and
+    recomputations of public pages since the counts were last reset."""
+    counts = cache.get_many([counter_key(name) for name in COUNTERS])
+    return {name: counts.get(counter_key(name), 0) for name in COUNTERS}
+
+
+def reset_counts():
+    cache.delete_many([counter_key(name) for name in COUNTERS])
+
+
+def should_cache(request, response):
+    # These are the same conditions as Django's UpdateCacheMiddleware uses
+    if response.streaming or response.status_code != 200:
+        return False
+    if not request.COOKIES and response.cookies and has_vary_header(response, 'Cookie'):
+        return False
+    if 'private' in response.get('Cache-Control', ()):
+        return False
+    return True
+
+
+def serve_cached_page(request, dispatch, timeout, key_prefix, stale_key_prefix):
+    """Returns the cached response to `request` if there is one. Otherwise,
+    calls `dispatch()` to compute it and caches it, unless another worker is
+    already computing it, in which case the stale copy is returned if there is
+    one. The response is cached under `key_prefix` for `timeout` seconds, and
+    under `stale_key_prefix` for `PUBLIC_STALE_CACHE_TIMEOUT` seconds."""
+
+    key = get_cache_key(request, key_prefix, 'GET', cache=cache)
+    if key is not None:
+        response = cache.get(key)
+        if response is not None:
+            count('hits')
+            return response
+
+    uri_hash = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    lock_key = "%s_recompute_lock_%s" % (stale_key_prefix, uri_hash)
+    locked = cache.add(lock_key, 1, getattr(settings, 'PUBLIC_CACHE_LOCK_TIMEOUT', 30))
+
+    if not locked:
+        stale_key = get_cache_key(request, stale_key_prefix, 'GET', cache=cache)
+        response = cache.get(stale_key) if stale_key is not None else None
+        if response is not None:
+            count('stale')
+            return response
+        # If there's no stale copy, there's nothing for it but to compute the
+        # page here too.
+
+    count('recomputes')
+    try:
+        response = dispatch()
+        if request.method != 'GET' or not should_cache(request, response):
+            return response
+
+        # Render now, so that the page is cached before the lock is released
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+
+        patch_response_headers(response, timeout)
+        stale_timeout = getattr(settings, 'PUBLIC_STALE_CACHE_TIMEOUT', 60 * 60)
+        cache.set(learn_cache_key(request, response, timeout, key_prefix, cache=cache), response, timeout)
+        cache.set(learn_cache_key(request, response, stale_timeout, stale_key_prefix, cache=cache),
+                  response, stale_timeout)
+        return response
+    finally:
+        if locked:
+            cache.delete(lock_key)
@@ -2,7 +2,14 @@ import itertools
 import logging
 import random
 
-from .models import VenueConstraint
+import numpy as np
+from django.db.models import Case, Value, When
+
+from draw.models import Debate
+from utils.assignment import get_assignment_solver
+from utils.publiccache import bump_data_versions
+
+from .models import VenueCategory, VenueConstraint
 
 logger = logging.getLogger(__name__)
 
@@ -16,37 +23,49 @@ class VenueAllocator:
     """Allocates venues in a draw to satisfy, as best it can, applicable venue
     constraints.
 
-    The algorithm naïvely allocates from the debate with the highest-priority
-    constraint to the debate with the lowest-priority constraint, choosing at
-    random if more than one is available. This isn't guaranteed to be optimal,
-    since a flexible high-priority debate might randomly choose a room demanded
-    by a picky low-priority room.
+    The allocation is solved globally, as an assignment problem over debates
+    and venues. For each subject (team, adjudicator, institution or division)
+    with constraints in a debate, a venue costs the difference between the
+    priorities of the subject's highest-priority constraint and the best
+    constraint the venue satisfies, or more if it satisfies none. Constraint
+    costs always outweigh the cost of not using the highest-priority venues,
+    which is only used to decide between venues that are otherwise as good.
+    Ties are broken randomly.
     """
 
     def allocate(self, round, debates=None):
         if debates is None:
             debates = round.debate_set_with_prefetches(speakers=False, institutions=True)
-        self._all_venues = list(round.active_venues.order_by('-priority'))
-        self._preferred_venues = self._all_venues[:len(debates)]
+        debates = list(debates)
+        venues = list(round.active_venues.order_by('-priority'))
 
         # take note of how many venues we expect to be short by (for error checking)
-        self._venue_shortage = max(0, len(debates) - len(self._all_venues))
-
-        debate_constraints = self.collect_constraints(debates)
-        debate_venues = self.allocate_constrained_venues(debate_constraints)
+        venue_shortage = max(0, len(debates) - len(venues))
 
-        unconstrained_debates = [d for d in debates if d not in debate_venues]
-        unconstrained_venues = self.allocate_unconstrained_venues(unconstrained_debates)
-        debate_venues.update(unconstrained_venues)
+        debate_constraints = dict(self.collect_constraints(debates))
+        category_venues = self.collect_category_venues(debate_constraints)
 
-        # this set is only non-empty if there were too few venues overall
-        debates_without_venues = [d for d in debates if d not in debate_venues]
-        if len(debates_without_venues) != self._venue_shortage:
+        # the top venues by priority are preferred; shuffle after noting them to break ties randomly
+        preferred_venues = set(venues[:len(debates)])
+        random.shuffle(debates)
+        random.shuffle(venues)
+
+        debate_venues = {debate: None for debate in debates}
+        if debates and venues:
+            costs = self.make_cost_matrix(debates, venues, preferred_venues, debate_constraints, category_venues)
+            solver = get_assignment_solver(round.tournament.pref('assignment_solver'))
+            for i, j in solver.solve(costs):
+                debate_venues[debates[i]] = venues[j]
+
+        # this is only non-zero if there were too few venues overall
+        ndebates_without_venues = sum(1 for venue in debate_venues.values() if venue is None)
+        if ndebates_without_venues != venue_shortage:
             logger.error("Expected venue shortage %d, but %d debates without venues",
-                self._venue_shortage, len(debates_without_venues))
-        debate_venues.update({debate: None for debate in debates_without_venues})
+                venue_shortage, ndebates_without_venues)
 
         self.save_venues(debate_venues)
+        # save_venues() updates the debates without saving them, so no signals are sent
+        bump_data_versions(round.tournament_id, round.id)
 
     def collect_constraints(self, debates):
         """Returns a list of tuples `(debate, constraints)`, where `constraints`
@@ -83,93 +102,64 @@ class VenueAllocator:
 
         return debate_constraints
 
-    def allocate_constrained_venues(self, debate_constraints):
-        """Allocates venues for debates that have one or more constraints on
-        them. `debate_constraints` should be
-
-        For each debate, it finds the set of venues that meet all its
-        constraints, or if that set is empty, then it satisfies as many
-        constraints as it can, with higher-priority constraints taking absolute
-        precedence over lower-priority constraints. It then chooses a random
-        venue from the preferred venues in that set, or if there are no
-        preferred venues, then from all venues in that set.
-
-        It runs through debates in descending order of priority, where the
-        priority of a debate is the priority of its highest-priority constraint.
-        """
-
-        debate_venues = dict()
-
-        while len(debate_constraints) > 0:
-            debate, constraints = debate_constraints.pop(0)
-
-            highest_constraint = constraints.pop(0)
-            eligible_venues = set(highest_constraint.category.venues.all()) & set(self._all_venues)
-
-            # If we can't fulfil the highest constraint, bump it down the list.
-            if len(eligible_venues) == 0:
-                logger.debug("Unfulfilled (highest): %s", highest_constraint)
-                if len(constraints) == 0:
-                    logger.debug("%s is now unconstrained", debate)
-                    continue  # Failed all constraints, debate is now unconstrained
-                new_priority = constraints[0].priority
-                for i, dc in enumerate(debate_constraints):
-                    if new_priority >= dc[1][0].priority:
-                        break
-                else:
-                    i = 0
-                debate_constraints.insert(i, (debate, constraints))
-                continue
-
-            # If we get this far, we have at least one eligible venue.
-
-            # Find the set of eligible venues satisfying the best set of constraints.
-            satisified_constraints = []
-            for constraint in constraints:
-                if any(sc.subject == constraint.subject for sc in satisified_constraints):
-                    continue  # Skip if we've already done a constraint for this subject
-                constraint_venues = set(constraint.category.venues.all())
-                if eligible_venues.isdisjoint(constraint_venues):
-                    logger.debug("Unfilfilled: %s", constraint)
-                else:
-                    eligible_venues &= constraint_venues
-                    satisified_constraints.append(constraint)
-
-            # If no eligible venues are preferred venues, drop the last preferred venue.
-            preferred_venues = set(self._preferred_venues)
-            if eligible_venues.isdisjoint(preferred_venues):
-                logger.debug("No preferred venues available: %s", debate)
-                self._preferred_venues = self._preferred_venues[:-1]
-            else:
-                eligible_venues &= preferred_venues
-
-            # Finally, assign the venue.
-            venue = random.choice(list(eligible_venues))
-            debate_venues[debate] = venue
-            self._all_venues.remove(venue)
-            if venue in self._preferred_venues:
-                self._preferred_venues.remove(venue)
-            logger.debug("Assigning %s to %s", venue, debate)
-
-        return debate_venues
-
-    def allocate_unconstrained_venues(self, debates):
-        """Allocates unconstrained venues by randomly shuffling the remaining
-        preferred venues."""
-
-        if len(debates) - len(self._preferred_venues) != self._venue_shortage:
-            logger.error("preferred venues to unconstrained debates mismatch: "
-                "%s preferred venues, %d debates", len(self._preferred_venues), len(debates))
-            # we'll still keep going, since zip() stops at the end of the shorter list
-        elif len(debates) != len(self._preferred_venues):
-            logger.warning("%s preferred venues, %d debates, matches expected venue shortage %s",
-                len(self._preferred_venues), len(debates), self._venue_shortage)
-
-        random.shuffle(debates)
-        return {debate: venue for debate, venue in zip(debates, self._preferred_venues)}
+    def collect_category_venues(self, debate_constraints):
+        """Returns a dict mapping the ID of each venue category used by a
+        constraint in `debate_constraints` to the set of IDs of venues in that
+        category, using a single query."""
+        category_ids = {vc.category_id for constraints in debate_constraints.values() for vc in constraints}
+        memberships = VenueCategory.venues.through.objects.filter(
+            venuecategory_id__in=category_ids).values_list('venuecategory_id', 'venue_id')
+
+        category_venues = {category_id: set() for category_id in category_ids}
+        for category_id, venue_id in memberships:
+            category_venues[category_id].add(venue_id)
+        return category_venues
+
+    def make_cost_matrix(self, debates, venues, preferred_venues, debate_constraints, category_venues):
+        """Returns a NumPy array of the cost of allocating each venue (columns)
+        to each debate (rows)."""
+        venue_ids = np.array([venue.id for venue in venues])
+        category_masks = {category_id: np.isin(venue_ids, list(ids))
+                          for category_id, ids in category_venues.items()}
+
+        priorities = [vc.priority for constraints in debate_constraints.values() for vc in constraints]
+        base_priority = min(priorities) - 1 if priorities else 0
+
+        constraint_costs = np.zeros((len(debates), len(venues)), dtype=np.int64)
+        for i, debate in enumerate(debates):
+            for subject_constraints in self.group_by_subject(debate_constraints.get(debate, [])):
+                top_priority = subject_constraints[0].priority
+                subject_costs = np.full(len(venues), top_priority - base_priority, dtype=np.int64)
+                unsatisfied = np.ones(len(venues), dtype=bool)
+                for vc in subject_constraints:  # in descending order of priority
+                    satisfied = unsatisfied & category_masks[vc.category_id]
+                    subject_costs[satisfied] = top_priority - vc.priority
+                    unsatisfied &= ~satisfied
+                constraint_costs[i] += subject_costs
+
+        # Scale constraint costs so that one unit outweighs any number of debates
+        # in non-preferred venues
+        venue_costs = np.array([0 if venue in preferred_venues else 1 for venue in venues], dtype=np.int64)
+        return constraint_costs * (len(debates) + 1) + venue_costs
+
+    @staticmethod
+    def group_by_subject(constraints):
+        """Groups `constraints`, which must be sorted by descending priority,
+        into a list of lists, one for each subject, each still in descending
+        order of priority."""
+        by_subject = {}
+        for vc in constraints:
+            by_subject.setdefault((vc.subject_content_type_id, vc.subject_id), []).append(vc)
+        return list(by_subject.values())
 
     def save_venues(self, debate_venues):
+        """Saves the venues in `debate_venues` using a single query."""
+        if not debate_venues:
+            return
         for debate, venue in debate_venues.items():
             logger.debug("Saving %s for %s", venue, debate)
             debate.venue = venue
-            debate.save()
+        Debate.objects.filter(pk__in=[debate.pk for debate in debate_venues]).update(venue=Case(
+            *[When(pk=debate.pk, then=Value(debate.venue_id)) for debate in debate_venues],
+            output_field=Debate._meta.get_field('venue'),
+        ))
@@ -0,0 +1,215 @@
+import logging
+import random
+import time
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from adjallocation.models import DebateAdjudicator
+from availability.models import RoundAvailability
+from draw.models import Debate, DebateTeam
+from utils.management.base import RoundCommand
+
+from ...allocator import VenueAllocator
+from ...models import Venue, VenueCategory
+
+logger = logging.getLogger(__name__)
+
+
+class LegacyVenueAllocator(VenueAllocator):
+    """The greedy venue allocator used before venues were allocated as an
+    assignment problem, kept here for comparison. It allocates from the debate
+    with the highest-priority constraint to the debate with the lowest-priority
+    constraint, choosing at random if more than one venue is available, and
+    saves each debate separately."""
+
+    def allocate(self, round, debates=None):
+        if debates is None:
+            debates = round.debate_set_with_prefetches(speakers=False, institutions=True)
+        self._all_venues = list(round.active_venues.order_by('-priority'))
+        self._preferred_venues = self._all_venues[:len(debates)]
+        self._venue_shortage = max(0, len(debates) - len(self._all_venues))
+
+        debate_constraints = self.collect_constraints(debates)
+        debate_venues = self.allocate_constrained_venues(debate_constraints)
+
+        unconstrained_debates = [d for d in debates if d not in debate_venues]
+        unconstrained_venues = self.allocate_unconstrained_venues(unconstrained_debates)
+        debate_venues.update(unconstrained_venues)
+
+        debates_without_venues = [d for d in debates if d not in debate_venues]
+        debate_venues.update({debate: None for debate in debates_without_venues})
+
+        self.save_venues(debate_venues)
+
+    def allocate_constrained_venues(self, debate_constraints):
+        """Allocates venues for debates that have one or more constraints on
+        them. `debate_constraints` should be
+
+        For each debate, it finds the set of venues that meet all its
+        constraints, or if that set is empty, then it satisfies as many
+        constraints as it can, with higher-priority constraints taking absolute
+        precedence over lower-priority constraints. It then chooses a random
+        venue from the preferred venues in that set, or if there are no
+        preferred venues, then from all venues in that set.
+
+        It runs through debates in descending order of priority, where the
+        priority of a debate is the priority of its highest-priority constraint.
+        """
+
+        debate_venues = dict()
+
+        while len(debate_constraints) > 0:
+            debate, constraints = debate_constraints.pop(0)
+
+            highest_constraint = constraints.pop(0)
+            eligible_venues = set(highest_constraint.category.venues.all()) & set(self._all_venues)
+
+            # If we can't fulfil the highest constraint, bump it down the list.
+            if len(eligible_venues) == 0:
+                logger.debug("Unfulfilled (highest): %s", highest_constraint)
+                if len(constraints) == 0:
+                    logger.debug("%s is now unconstrained", debate)
+                    continue  # Failed all constraints, debate is now unconstrained
+                new_priority = constraints[0].priority
+                for i, dc in enumerate(debate_constraints):
+                    if new_priority >= dc[1][0].priority:
+                        break
+                else:
+                    i = 0
+                debate_constraints.insert(i, (debate, constraints))
+                continue
+
+            # If we get this far, we have at least one eligible venue.
+
+            # Find the set of eligible venues satisfying the best set of constraints.
+            satisified_constraints = []
+            for constraint in constraints:
+                if any(sc.subject == constraint.subject for sc in satisified_constraints):
+                    continue  # Skip if we've already done a constraint for this subject
+                constraint_venues = set(constraint.category.venues.all())
+                if eligible_venues.isdisjoint(constraint_venues):
+                    logger.debug("Unfilfilled: %s", constraint)
+                else:
+                    eligible_venues &= constraint_venues
+                    satisified_constraints.append(constraint)
+
+            # If no eligible venues are preferred venues, drop the last preferred venue.
+            preferred_venues = set(self._preferred_venues)
+            if eligible_venues.isdisjoint(preferred_venues):
+                logger.debug("No preferred venues available: %s", debate)
+                self._preferred_venues = self._preferred_venues[:-1]
+            else:
+                eligible_venues &= preferred_venues
+
+            # Finally, assign the venue.
+            venue = random.choice(list(eligible_venues))
+            debate_venues[debate] = venue
+            self._all_venues.remove(venue)
+            if venue in self._preferred_venues:
+                self._preferred_venues.remove(venue)
+            logger.debug("Assigning %s to %s", venue, debate)
+
+        return debate_venues
+
+    def allocate_unconstrained_venues(self, debates):
+        """Allocates unconstrained venues by randomly shuffling the remaining
+        preferred venues."""
+
+        if len(debates) - len(self._preferred_venues) != self._venue_shortage:
+            logger.error("preferred venues to unconstrained debates mismatch: "
+                "%s preferred venues, %d debates", len(self._preferred_venues), len(debates))
+            # we'll still keep going, since zip() stops at the end of the shorter list
+        elif len(debates) != len(self._preferred_venues):
+            logger.warning("%s preferred venues, %d debates, matches expected venue shortage %s",
+                len(self._preferred_venues), len(debates), self._venue_shortage)
+
+        random.shuffle(debates)
+        return {debate: venue for debate, venue in zip(debates, self._preferred_venues)}
+
+    def save_venues(self, debate_venues):
+        for debate, venue in debate_venues.items():
+            logger.debug("Saving %s for %s", venue, debate)
+            debate.venue = venue
+            debate.save()
+
+
+class Command(RoundCommand):
+
+    help = "Times venue allocation for a round, with the draw and venues copied to make up " \
+           "a larger tournament (four times as large by default), using both the current " \
+           "allocator and the greedy one it replaced, and compares how well each satisfies " \
+           "venue constraints. Everything is rolled back afterwards, so the database isn't " \
+           "modified."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument("--scale", type=int, default=4,
+            help="Number of copies of the draw and venues to allocate (default 4)")
+
+    def scale_up(self, round, scale):
+        """Copies the round's debates and active venues so that there are
+        `scale` of each. Venue copies are in the same categories, and debate
+        copies have the same teams and adjudicators, so they have the same
+        constraints."""
+        venues = list(round.active_venues)
+        debates = list(round.debate_set.prefetch_related('debateteam_set', 'debateadjudicator_set'))
+        through = VenueCategory.venues.through
+        memberships = list(through.objects.filter(venue__in=venues).values_list('venue_id', 'venuecategory_id'))
+        venue_content_type = ContentType.objects.get_for_model(Venue)
+
+        for k in range(2, scale + 1):
+            copies = Venue.objects.bulk_create([Venue(name="{:s} ({:d})".format(venue.name[:32], k),
+                    priority=venue.priority, tournament=venue.tournament) for venue in venues])
+            copy_ids = {venue.id: copy.id for venue, copy in zip(venues, copies)}
+            through.objects.bulk_create([through(venue_id=copy_ids[venue_id], venuecategory_id=category_id)
+                    for venue_id, category_id in memberships])
+            RoundAvailability.objects.bulk_create([RoundAvailability(content_type=venue_content_type,
+                    object_id=copy.id, round=round) for copy in copies])
+
+            new_debates = Debate.objects.bulk_create([Debate(round=round, bracket=debate.bracket,
+                    room_rank=debate.room_rank, division=debate.division) for debate in debates])
+            DebateTeam.objects.bulk_create([DebateTeam(debate=new, team_id=dt.team_id, side=dt.side)
+                    for debate, new in zip(debates, new_debates) for dt in debate.debateteam_set.all()])
+            DebateAdjudicator.objects.bulk_create([DebateAdjudicator(debate=new,
+                    adjudicator_id=da.adjudicator_id, type=da.type)
+                    for debate, new in zip(debates, new_debates) for da in debate.debateadjudicator_set.all()])
+
+    def evaluate(self, round):
+        """Returns a tuple `(satisfied, total, cost)`, where `total` is the
+        number of subjects with constraints in debates, `satisfied` is the
+        number of those whose venue meets at least one of their constraints, and
+        `cost` is the sum of the highest priorities of those that aren't."""
+        allocator = VenueAllocator()
+        debates = list(round.debate_set_with_prefetches(speakers=False, institutions=True))
+        debate_constraints = dict(allocator.collect_constraints(debates))
+        category_venues = allocator.collect_category_venues(debate_constraints)
+
+        satisfied = total = cost = 0
+        for debate, constraints in debate_constraints.items():
+            for subject_constraints in allocator.group_by_subject(constraints):
+                total += 1
+                if any(debate.venue_id in category_venues[vc.category_id] for vc in subject_constraints):
+                    satisfied += 1
+                else:
+                    cost += subject_constraints[0].priority
+        return satisfied, total, cost
+
+    def handle_round(self, round, **options):
+        with transaction.atomic():
+            self.scale_up(round, options["scale"])
+            self.stdout.write("Venue allocation in {:s} at {:d}x scale ({:d} debates, {:d} venues):".format(
+                    round.name, options["scale"], round.debate_set.count(), round.active_venues.count()))
+
+            for name, allocator in [("greedy", LegacyVenueAllocator()), ("assignment", VenueAllocator())]:
+                with CaptureQueriesContext(connection) as context:
+                    start = time.perf_counter()
+                    allocator.allocate(round)
+                    elapsed = time.perf_counter() - start
+                satisfied, total, cost = self.evaluate(round)
+                self.stdout.write("  {:<12s} {:8.1f} ms, {:5d} queries, {:d} of {:d} constrained subjects "
+                        "satisfied, unsatisfied priority {:d}".format(name, elapsed * 1000,
+                        len(context.captured_queries), satisfied, total, cost))
+
+            transaction.set_rollback(True)
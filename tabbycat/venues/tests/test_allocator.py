@@ -0,0 +1,78 @@
+import unittest
+from collections import namedtuple
+
+from django.test import TestCase
+
+from availability.models import RoundAvailability
+from draw.models import Debate
+from tournaments.models import Round, Tournament
+
+from ..allocator import allocate_venues, VenueAllocator
+from ..models import Venue
+
+TestVenue = namedtuple('TestVenue', ['id'])
+TestConstraint = namedtuple('TestConstraint', ['priority', 'category_id', 'subject_content_type_id', 'subject_id'])
+
+
+class TestMakeCostMatrix(unittest.TestCase):
+    """Tests the `make_cost_matrix()` method of VenueAllocator."""
+
+    def setUp(self):
+        self.allocator = VenueAllocator()
+        self.debates = ["debate %d" % i for i in range(4)]
+        self.venues = [TestVenue(i) for i in range(4)]
+
+    def make_cost_matrix(self, constraints, category_venues, preferred_venues=()):
+        return self.allocator.make_cost_matrix(self.debates, self.venues, set(preferred_venues),
+                {self.debates[0]: constraints}, category_venues)
+
+    def test_higher_priority_constraint_preferred(self):
+        constraints = [TestConstraint(10, 'high', 1, 1), TestConstraint(5, 'low', 1, 1)]
+        costs = self.make_cost_matrix(constraints, {'high': {0}, 'low': {1}}, preferred_venues=self.venues)
+        self.assertEqual(costs[0, 0], 0)
+        self.assertLess(costs[0, 0], costs[0, 1])
+        self.assertLess(costs[0, 1], costs[0, 2])
+        self.assertEqual(costs[0, 2], costs[0, 3])
+
+    def test_subjects_costed_separately(self):
+        constraints = [TestConstraint(10, 'a', 1, 1), TestConstraint(10, 'b', 1, 2)]
+        costs = self.make_cost_matrix(constraints, {'a': {0, 2}, 'b': {1, 2}}, preferred_venues=self.venues)
+        self.assertEqual(costs[0, 2], 0)
+        self.assertEqual(costs[0, 0], costs[0, 1])
+        self.assertLess(costs[0, 0], costs[0, 3])
+
+    def test_venue_penalty_smaller_than_constraint_unit(self):
+        # Satisfy the constraint in a non-preferred venue (0) rather than use a
+        # preferred one (1), even with every other debate in a non-preferred venue
+        constraints = [TestConstraint(2, 'a', 1, 1), TestConstraint(1, 'b', 1, 1)]
+        costs = self.make_cost_matrix(constraints, {'a': {0}, 'b': {1}}, preferred_venues=self.venues[1:])
+        self.assertEqual(costs[1:].max(axis=1).tolist(), [1, 1, 1])
+        self.assertLess(costs[0, 0] + costs[1:].max(axis=1).sum(), costs[0, 1])
+
+
+class TestVenueAllocator(TestCase):
+
+    def setUp(self):
+        self.t = Tournament.objects.create(slug="venueallocatortest")
+        self.round = Round.objects.create(tournament=self.t, seq=1, abbreviation="R1")
+        self.debates = [Debate.objects.create(round=self.round) for i in range(3)]
+        self.venues = [Venue.objects.create(tournament=self.t, name=str(i), priority=i) for i in range(2)]
+        for venue in self.venues:
+            RoundAvailability.objects.create(content_object=venue, round=self.round)
+
+    def tearDown(self):
+        self.t.delete()
+
+    def test_venue_shortage(self):
+        allocate_venues(self.round)
+        venue_ids = [debate.venue_id for debate in Debate.objects.filter(round=self.round)]
+        self.assertEqual(venue_ids.count(None), 1)
+        self.assertCountEqual([v for v in venue_ids if v is not None], [venue.id for venue in self.venues])
+
+    def test_save_venues_in_one_query(self):
+        debate_venues = {self.debates[0]: self.venues[1], self.debates[1]: self.venues[0], self.debates[2]: None}
+        with self.assertNumQueries(1):
+            VenueAllocator().save_venues(debate_venues)
+        for debate, venue in debate_venues.items():
+            debate.refresh_from_db()
+            self.assertEqual(debate.venue, venue)